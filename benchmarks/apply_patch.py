@@ -0,0 +1,87 @@
+import argparse
+import contextlib
+import itertools
+import timeit
+from typing import Any, Callable, Iterator, Optional
+
+from pytorch_pip_shim.utils import make_wrapper
+
+
+def evaluate_link(self: Any, link: str) -> Any:
+    return True, link
+
+
+def preprocessing(args: Any, kwargs: Any) -> Any:
+    return args, kwargs
+
+
+@contextlib.contextmanager
+def context(args: Any, kwargs: Any) -> Iterator[None]:
+    yield
+
+
+def postprocessing(args: Any, kwargs: Any, output: Any) -> Any:
+    return output
+
+
+def make_generic_wrapper(
+    fn: Callable,
+    preprocessing: Optional[Callable] = None,
+    context: Optional[Callable] = None,
+    postprocessing: Optional[Callable] = None,
+) -> Callable:
+    # This is how apply_patch wrapped the functions before it was specialized: absent
+    # hooks are replaced by no-ops that are called anyway.
+    @contextlib.contextmanager
+    def context_noop(args: Any, kwargs: Any) -> Iterator[None]:
+        yield
+
+    preprocessing_ = preprocessing or (lambda args, kwargs: (args, kwargs))
+    context_ = context or context_noop
+    postprocessing_ = postprocessing or (lambda args, kwargs, output: output)
+
+    def new(*args: Any, **kwargs: Any) -> Any:
+        args, kwargs = preprocessing_(args, kwargs)
+        with context_(args, kwargs):
+            output = fn(*args, **kwargs)
+        return postprocessing_(args, kwargs, output)
+
+    return new
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Measure the calls per second of the wrappers apply_patch generates for "
+            "every combination of hooks and compare them against the generic wrapper "
+            "that calls no-ops for the absent hooks."
+        )
+    )
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    def measure(fn: Callable) -> float:
+        seconds = min(
+            timeit.repeat(
+                lambda: fn(None, "link"), number=args.calls, repeat=args.repeat
+            )
+        )
+        return args.calls / seconds
+
+    print(f"{'hooks':<40} {'specialized':>14} {'generic':>14}")
+    print(f"{'unpatched':<40} {measure(evaluate_link):12.0f}/s")
+    for has_pre, has_context, has_post in itertools.product((False, True), repeat=3):
+        hooks = dict(
+            preprocessing=preprocessing if has_pre else None,
+            context=context if has_context else None,
+            postprocessing=postprocessing if has_post else None,
+        )
+        name = ", ".join(name for name, hook in hooks.items() if hook) or "none"
+        specialized = measure(make_wrapper(evaluate_link, **hooks))
+        generic = measure(make_generic_wrapper(evaluate_link, **hooks))
+        print(f"{name:<40} {specialized:12.0f}/s {generic:12.0f}/s")
+
+
+if __name__ == "__main__":
+    main()
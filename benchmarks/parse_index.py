@@ -0,0 +1,37 @@
+import argparse
+import timeit
+
+from synthetic import make_filenames, make_html, make_json
+
+from pytorch_pip_shim import index
+
+URL = "https://download.pytorch.org/whl/torch_stable.html"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare parsing the PyTorch index as HTML and as PEP 691 JSON."
+    )
+    parser.add_argument("--files", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    filenames = make_filenames(args.files)
+    contents = {
+        "html": (index.parse, make_html(filenames)),
+        "json": (index.parse_json, make_json(filenames)),
+    }
+
+    for format, (parse, content) in contents.items():
+        assert len(parse(content, URL)) == args.files
+        seconds = min(
+            timeit.repeat(lambda: parse(content, URL), number=1, repeat=args.repeat)
+        )
+        print(
+            f"{format:>4}: {seconds * 1e3:8.1f} ms "
+            f"({args.files / seconds:10.0f} links/s, {len(content) / 1e6:5.1f} MB)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from os import path
+from typing import Dict, List
+
+import pip
+
+from pytorch_pip_shim import shim
+
+ROOT = path.abspath(path.join(path.dirname(__file__), ".."))
+
+
+def measure(code: str, env: Dict[str, str], repeat: int) -> List[float]:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], env=env, check=True)
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def report(name: str, durations: List[float]) -> None:
+    print(
+        f"{name:<40} "
+        f"{statistics.median(durations) * 1e3:8.1f} ms (median) "
+        f"{min(durations) * 1e3:8.1f} ms (min)"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Compare the interpreter startup and the import of pip's main module "
+            "between the file rewrite and the import hook activation."
+        )
+    )
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        # Work on a copy of pip to leave the installed one untouched.
+        packages = path.join(root, "packages")
+        shutil.copytree(path.dirname(pip.__file__), path.join(packages, "pip"))
+        file = path.join(packages, "pip", "_internal", "cli", "main.py")
+        shim.remove(file)
+
+        site_dir = path.join(root, "site")
+        empty_site_dir = path.join(root, "empty")
+        os.makedirs(empty_site_dir)
+        os.makedirs(site_dir)
+        shim.insert_hook(path.join(site_dir, "pytorch-pip-shim.pth"))
+
+        env = os.environ.copy()
+        env["PYTHONPATH"] = os.pathsep.join((packages, ROOT))
+
+        def code(site_dir: str, import_pip: bool) -> str:
+            lines = ["import site", f"site.addsitedir({site_dir!r})"]
+            if import_pip:
+                lines.append("import pip._internal.cli.main")
+            return "; ".join(lines)
+
+        # Warm up the bytecode of the unmodified copy.
+        measure(code(empty_site_dir, True), env, 1)
+
+        report(
+            "startup without hook",
+            measure(code(empty_site_dir, False), env, args.repeat),
+        )
+        report("startup with hook", measure(code(site_dir, False), env, args.repeat))
+
+        report(
+            "pip import, unpatched",
+            measure(code(empty_site_dir, True), env, args.repeat),
+        )
+        report("pip import, hook", measure(code(site_dir, True), env, args.repeat))
+
+        shim.insert(file)
+        report(
+            "pip import, file rewrite (first run)",
+            measure(code(empty_site_dir, True), env, 1),
+        )
+        report(
+            "pip import, file rewrite",
+            measure(code(empty_site_dir, True), env, args.repeat),
+        )
+
+
+if __name__ == "__main__":
+    main()
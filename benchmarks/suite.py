@@ -0,0 +1,313 @@
+import argparse
+import contextlib
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import timeit
+from os import path
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+from unittest import mock
+
+from startup import measure
+from synthetic import make_filenames, make_html
+
+from pip._internal.index.package_finder import CandidateEvaluator, LinkEvaluator
+from pip._internal.models.candidate import InstallationCandidate
+from pip._internal.models.link import Link
+from pip._internal.models.wheel import Wheel
+from pip._internal.network.session import PipSession
+from pip._vendor.packaging.specifiers import SpecifierSet
+from pip._vendor.packaging.tags import Tag
+
+from pytorch_pip_shim import computation_backend as cb
+from pytorch_pip_shim import index, shim
+from pytorch_pip_shim.patch import patch_candidate_selection, patch_link_evaluation
+
+from tests.utils import fake_server
+
+HERE = path.dirname(__file__)
+ROOT = path.abspath(path.join(HERE, ".."))
+BASELINE = path.join(HERE, "baseline.json")
+
+SIZES = (1_000, 20_000, 200_000)
+NUM_ITEMS = 20_000
+COMPUTATION_BACKEND = cb.CPUBackend()
+TAGS = [Tag("cp38", "cp38", "linux_x86_64")]
+
+# Absolute timings depend on the machine. Thus, every benchmark compares the shimmed
+# against the unshimmed variant of the same task and only the ratio between them is
+# compared against the baseline.
+Benchmark = Tuple[Callable[[], Any], Callable[[], Any]]
+
+
+def time_min(fn: Callable[[], Any], repeat: int) -> float:
+    return min(timeit.repeat(fn, number=1, repeat=repeat))
+
+
+@contextlib.contextmanager
+def serve_index(sizes: Sequence[int]) -> Iterator[str]:
+    pages = {}
+    for size in sizes:
+        for nightly in (False, True):
+            url = index.make_url(COMPUTATION_BACKEND, nightly, base=f"/{size}/")
+            pages[url] = (make_html(make_filenames(size, nightly=nightly)), "text/html")
+    with fake_server(pages) as base:
+        yield base
+
+
+def pinned_specifier(size: int, nightly: bool) -> SpecifierSet:
+    # Pin the version in the middle of the torch wheels for the computation backend
+    # to not favor the early termination.
+    filenames = [
+        filename
+        for filename in make_filenames(size, nightly=nightly)
+        if filename.startswith(f"{COMPUTATION_BACKEND}/torch-")
+    ]
+    version = filenames[len(filenames) // 2].split("-")[1].split("%2B")[0]
+    return SpecifierSet(f"=={version}")
+
+
+def resolution_benchmarks(
+    base: str, sizes: Sequence[int]
+) -> Iterator[Tuple[str, Benchmark]]:
+    session = PipSession()
+    for size in sizes:
+        for nightly in (False, True):
+            url = index.make_url(COMPUTATION_BACKEND, nightly, base=f"{base}{size}/")
+            specifier = pinned_specifier(size, nightly)
+
+            # Without the shim, pip fetches and parses the complete page given with -f
+            # before it evaluates any link.
+            def unshimmed(url: str = url) -> List[Link]:
+                return index.parse(index.fetch(url, session=session), url)
+
+            def shimmed(url: str = url) -> Tuple[List[Link], bool]:
+                return index.collect_links(
+                    url, session, "torch", COMPUTATION_BACKEND, tags=TAGS
+                )
+
+            def shimmed_pinned(
+                url: str = url, specifier: SpecifierSet = specifier
+            ) -> Tuple[List[Link], bool]:
+                return index.collect_links(
+                    url,
+                    session,
+                    "torch",
+                    COMPUTATION_BACKEND,
+                    specifier=specifier,
+                    tags=TAGS,
+                )
+
+            page = "nightly" if nightly else "stable"
+            yield f"resolution-{page}-{size}", (unshimmed, shimmed)
+            yield f"resolution-{page}-pinned-{size}", (unshimmed, shimmed_pinned)
+
+
+def link_evaluation_benchmark(num_links: int) -> Benchmark:
+    links = [
+        Link(f"https://download.pytorch.org/whl/{filename}")
+        for filename in make_filenames(num_links)
+    ]
+
+    # pip's evaluation depends on a lot of state. Thus, it is replaced by a stub that
+    # does the bulk of its work: parsing the wheel filename and checking the tags.
+    def evaluate_link(self: Any, link: Link) -> Tuple[bool, str]:
+        wheel = Wheel(link.filename)
+        return wheel.supported(TAGS), wheel.version
+
+    def evaluate(evaluate_link: Callable[[Any, Link], Any]) -> None:
+        for link in links:
+            evaluate_link(None, link)
+
+    def unshimmed() -> None:
+        with mock.patch.object(LinkEvaluator, "evaluate_link", new=evaluate_link):
+            evaluate(LinkEvaluator.evaluate_link)
+
+    def shimmed() -> None:
+        with mock.patch.object(LinkEvaluator, "evaluate_link", new=evaluate_link):
+            with patch_link_evaluation():
+                evaluate(LinkEvaluator.evaluate_link)
+
+    return unshimmed, shimmed
+
+
+def candidate_selection_benchmark(num_candidates: int) -> Benchmark:
+    candidates = []
+    for filename in make_filenames(num_candidates):
+        project, version = filename.split("/")[1].split("-")[:2]
+        candidates.append(
+            InstallationCandidate(
+                project,
+                version.replace("%2B", "+"),
+                Link(f"https://download.pytorch.org/whl/{filename}"),
+            )
+        )
+
+    specifier = SpecifierSet(">=0.1")
+
+    # Similar to pip, the stub filters the candidates by the specifier and sorts them.
+    def get_applicable_candidates(
+        self: Any, candidates: List[InstallationCandidate]
+    ) -> List[InstallationCandidate]:
+        return sorted(
+            (
+                candidate
+                for candidate in candidates
+                if specifier.contains(str(candidate.version), prereleases=True)
+            ),
+            key=lambda candidate: candidate.version,
+        )
+
+    def select() -> None:
+        CandidateEvaluator.get_applicable_candidates(None, candidates)
+
+    def unshimmed() -> None:
+        with mock.patch.object(
+            CandidateEvaluator,
+            "get_applicable_candidates",
+            new=get_applicable_candidates,
+        ):
+            select()
+
+    def shimmed() -> None:
+        with mock.patch.object(
+            CandidateEvaluator,
+            "get_applicable_candidates",
+            new=get_applicable_candidates,
+        ):
+            with patch_candidate_selection(COMPUTATION_BACKEND):
+                select()
+
+    return unshimmed, shimmed
+
+
+def startup_benchmark(root: str, repeat: int) -> Tuple[float, float]:
+    site_dir = path.join(root, "site")
+    empty_site_dir = path.join(root, "empty")
+    os.makedirs(site_dir)
+    os.makedirs(empty_site_dir)
+    shim.insert_hook(path.join(site_dir, "pytorch-pip-shim.pth"))
+
+    env = os.environ.copy()
+    env["PYTHONPATH"] = ROOT
+
+    def code(site_dir: str) -> str:
+        return f"import site; site.addsitedir({site_dir!r})"
+
+    measure(code(empty_site_dir), env, 1)
+    return (
+        statistics.median(measure(code(empty_site_dir), env, repeat)),
+        statistics.median(measure(code(site_dir), env, repeat)),
+    )
+
+
+def run(sizes: Sequence[int], repeat: int) -> Dict[str, Dict[str, float]]:
+    results = {}
+
+    def add(name: str, unshimmed: float, shimmed: float) -> None:
+        results[name] = dict(
+            unshimmed=unshimmed, shimmed=shimmed, ratio=shimmed / unshimmed
+        )
+        print(
+            f"{name:<40} {unshimmed * 1e3:10.1f} ms {shimmed * 1e3:10.1f} ms "
+            f"{shimmed / unshimmed:8.2f}x",
+            flush=True,
+        )
+
+    print(f"{'benchmark':<40} {'unshimmed':>13} {'shimmed':>13} {'ratio':>9}")
+    with serve_index(sizes) as base:
+        # The pinned and unpinned resolution share the unshimmed variant.
+        unshimmed_times: Dict[Callable[[], Any], float] = {}
+        for name, (unshimmed, shimmed) in resolution_benchmarks(base, sizes):
+            if unshimmed not in unshimmed_times:
+                unshimmed_times[unshimmed] = time_min(unshimmed, repeat)
+            add(name, unshimmed_times[unshimmed], time_min(shimmed, repeat))
+
+    for name, (unshimmed, shimmed) in (
+        ("link-evaluation", link_evaluation_benchmark(NUM_ITEMS)),
+        ("candidate-selection", candidate_selection_benchmark(NUM_ITEMS)),
+    ):
+        add(name, time_min(unshimmed, repeat), time_min(shimmed, repeat))
+
+    with tempfile.TemporaryDirectory() as root:
+        add("startup", *startup_benchmark(root, max(repeat, 10)))
+
+    return results
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    threshold: float,
+) -> List[str]:
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        limit = baseline[name]["ratio"] * (1 + threshold)
+        if result["ratio"] > limit:
+            regressions.append(
+                f"{name}: {result['ratio']:.2f}x exceeds {limit:.2f}x "
+                f"(baseline {baseline[name]['ratio']:.2f}x)"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Time shimmed versus unshimmed resolution against synthetic PyTorch "
+            "indices served locally, link evaluation, candidate selection, and "
+            "startup. The ratios are compared against a stored baseline and a "
+            "regression beyond the threshold fails the run."
+        )
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", type=str, default=BASELINE)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Allowed relative increase of the ratios over the baseline.",
+    )
+    parser.add_argument(
+        "--save",
+        action="store_true",
+        help="Store the results as new baseline instead of comparing against it.",
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = run(args.sizes, args.repeat)
+    print(f"\nFinished in {time.perf_counter() - start:.1f} s")
+
+    if args.save:
+        with open(args.baseline, "w") as fh:
+            json.dump(results, fh, indent=2, sort_keys=True)
+            fh.write("\n")
+        print(f"Stored baseline in {args.baseline}")
+        return
+
+    try:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+    except FileNotFoundError:
+        print(f"No baseline found at {args.baseline}. Run with --save to create it.")
+        return
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print("\nRegressions:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print("No regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import itertools
+import json
+from typing import Iterator, List, Sequence
+
+__all__ = ["make_filenames", "make_html", "make_json"]
+
+PROJECTS = ("torch", "torchvision", "torchaudio", "torchtext")
+COMPUTATION_BACKENDS = ("cpu", "cu92", "cu101", "cu102", "cu110", "cu111")
+PYTHON_VERSIONS = ("36", "37", "38", "39")
+PLATFORMS = ("linux_x86_64", "macosx_10_9_x86_64", "win_amd64")
+
+
+def iter_versions() -> Iterator[str]:
+    for major in itertools.count(0):
+        for minor in range(10):
+            for patch in range(3):
+                yield f"{major}.{minor}.{patch}"
+
+
+def make_filenames(num_files: int, nightly: bool = False) -> List[str]:
+    filenames = []
+    for version in iter_versions():
+        for idx, (project, computation_backend, python, platform) in enumerate(
+            itertools.product(
+                PROJECTS, COMPUTATION_BACKENDS, PYTHON_VERSIONS, PLATFORMS
+            )
+        ):
+            if len(filenames) == num_files:
+                return sorted(filenames)
+
+            version_ = f"{version}.dev2020{idx % 12 + 1:02d}01" if nightly else version
+            filenames.append(
+                f"{computation_backend}/{project}-{version_}%2B{computation_backend}-"
+                f"cp{python}-cp{python}-{platform}.whl"
+            )
+    raise RuntimeError
+
+
+def make_html(filenames: Sequence[str]) -> str:
+    lines = ["<!DOCTYPE html>", "<html>", "<body>"]
+    lines.extend(f'<a href="{name}">{name}</a><br>' for name in filenames)
+    lines.extend(["</body>", "</html>"])
+    return "\n".join(lines)
+
+
+def make_json(filenames: Sequence[str]) -> str:
+    return json.dumps(
+        {
+            "meta": {"api-version": "1.0"},
+            "name": "torch",
+            "files": [
+                {
+                    "filename": name.split("/")[-1].replace("%2B", "+"),
+                    "url": name,
+                    "hashes": {},
+                }
+                for name in filenames
+            ],
+        }
+    )
@@ -0,0 +1,114 @@
+import contextlib
+import json
+import os
+import sys
+import zlib
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+
+__all__ = ["ENV_VAR", "SAMPLE_ENV_VAR", "Audit"]
+
+ENV_VAR = "PYTORCH_PIP_SHIM_AUDIT"
+SAMPLE_ENV_VAR = "PYTORCH_PIP_SHIM_AUDIT_SAMPLE"
+SAMPLE_RATE = 0.1
+SUMMARY_SIZE = 10
+
+FIELDS = ("type", "project_name", "computation_backend", "decision", "reason")
+Key = Tuple[str, str, str, str, str]
+
+
+def get_sample_rate() -> float:
+    try:
+        sample_rate = float(os.environ.get(SAMPLE_ENV_VAR, SAMPLE_RATE))
+    except ValueError:
+        return SAMPLE_RATE
+    return min(max(sample_rate, 0.0), 1.0)
+
+
+def get_reason_group(reason: str) -> str:
+    # pip appends the details to the reason, e.g. the tags of the wheel. Counting
+    # them separately would give one group per link.
+    return reason.split(":", 1)[0]
+
+
+class Audit:
+    def __init__(self, file: str, sample_rate: float = SAMPLE_RATE) -> None:
+        self.file = file
+        self.sample_rate = sample_rate
+        self.counts: Dict[Key, int] = {}
+        self.records: List[Dict[str, Any]] = []
+
+    @classmethod
+    def from_env(cls) -> Optional["Audit"]:
+        file = os.environ.get(ENV_VAR)
+        return cls(file, sample_rate=get_sample_rate()) if file else None
+
+    def is_sampled(self, url: str) -> bool:
+        # The sampling is deterministic such that the same links are recorded across
+        # runs, which makes the logs comparable.
+        return zlib.crc32(url.encode("utf-8")) < self.sample_rate * 2**32
+
+    def record(
+        self,
+        kind: str,
+        project_name: Optional[str],
+        computation_backend: Optional[str],
+        decision: str,
+        reason: str,
+        url: str,
+        **details: Any,
+    ) -> None:
+        key = (
+            kind,
+            project_name or "",
+            computation_backend or "",
+            decision,
+            get_reason_group(reason),
+        )
+        self.counts[key] = self.counts.get(key, 0) + 1
+        if self.is_sampled(url):
+            self.records.append(
+                dict(
+                    type=kind,
+                    project_name=project_name,
+                    computation_backend=computation_backend,
+                    decision=decision,
+                    reason=reason,
+                    url=url,
+                    **details,
+                )
+            )
+
+    def summarize(self) -> List[Dict[str, Any]]:
+        return [
+            dict(zip(FIELDS, key), count=count)
+            for key, count in sorted(self.counts.items(), key=lambda item: -item[1])
+        ]
+
+    def write(self, fh: Optional[TextIO] = None) -> None:
+        summary = self.summarize()
+        # As for the cache, a failing audit must never break an installation.
+        with contextlib.suppress(OSError):
+            with open(self.file, "w") as log:
+                for record in self.records:
+                    log.write(json.dumps(record) + "\n")
+                log.write(
+                    json.dumps(
+                        dict(
+                            type="summary",
+                            sample_rate=self.sample_rate,
+                            counts=summary,
+                        )
+                    )
+                    + "\n"
+                )
+
+        if fh is None:
+            fh = sys.stderr
+        fh.write(f"pytorch-pip-shim audit written to {self.file}\n")
+        for entry in summary[:SUMMARY_SIZE]:
+            fh.write(
+                "  {count:>8} {type} {decision}: {reason} "
+                "({project_name}, {computation_backend})\n".format(
+                    **{key: value or "-" for key, value in entry.items()}
+                )
+            )
@@ -0,0 +1,234 @@
+import os
+import statistics
+import subprocess
+import sys
+import sysconfig
+import tempfile
+import time
+import zipfile
+from os import path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from pip._internal.models.link import Link
+from pip._internal.network.session import PipSession
+from pip._vendor.packaging.tags import sys_tags
+from pip._vendor.requests import RequestException
+
+from . import daemon, index, metrics, mirrors
+from .computation_backend import ComputationBackend, detect_from_nvcc
+from .patch import PYTORCH_DISTRIBUTIONS
+
+__all__ = [
+    "bench_detection",
+    "bench_index",
+    "bench_link_evaluation",
+    "bench_import",
+    "bench_unpack",
+    "run",
+    "format_table",
+]
+
+Result = Dict[str, Any]
+
+UNPACK_FILE_SIZE = 256 * 1024
+
+
+def make_result(name: str, value: Any, unit: str = "", detail: str = "") -> Result:
+    return dict(name=name, value=value, unit=unit, detail=detail)
+
+
+def timed(fn: Callable[[], Any]) -> Tuple[float, Any]:
+    start = time.perf_counter()
+    output = fn()
+    return time.perf_counter() - start, output
+
+
+def bench_detection() -> Tuple[List[Result], ComputationBackend]:
+    seconds, computation_backend = timed(daemon.detect)
+    results = [
+        make_result(
+            "detection: daemon",
+            seconds * 1e3,
+            "ms",
+            str(computation_backend) if computation_backend else "not running",
+        )
+    ]
+
+    seconds, nvcc_computation_backend = timed(detect_from_nvcc)
+    results.append(
+        make_result(
+            "detection: nvcc", seconds * 1e3, "ms", str(nvcc_computation_backend)
+        )
+    )
+    return results, computation_backend or nvcc_computation_backend
+
+
+def bench_index(
+    session: PipSession, base: str, url: str
+) -> Tuple[List[Result], Optional[List[Link]]]:
+    latency = mirrors.probe(session, base)
+    results = [
+        make_result(
+            f"index latency: {base}",
+            latency * 1e3 if latency is not None else None,
+            "ms",
+            "" if latency is not None else "unreachable",
+        )
+    ]
+    if latency is None:
+        return results, None
+
+    run = metrics.Run()
+    try:
+        seconds, links = timed(lambda: list(index.iter_links(url, session, run=run)))
+    except (RequestException, OSError) as error:
+        results.append(
+            make_result(f"index throughput: {url}", None, "MB/s", str(error))
+        )
+        return results, None
+
+    size = run.values.get("index_bytes", 0.0)
+    results.append(
+        make_result(
+            f"index throughput: {url}",
+            size / 1e6 / seconds,
+            "MB/s",
+            f"{size / 1e6:.1f} MB, {len(links)} links in {seconds:.2f} s",
+        )
+    )
+    return results, links
+
+
+def bench_link_evaluation(
+    links: Sequence[Link], computation_backend: ComputationBackend
+) -> List[Result]:
+    tags = list(sys_tags())
+    seconds, _ = timed(
+        lambda: [
+            index.filter_links(links, project_name, computation_backend, tags=tags)
+            for project_name in PYTORCH_DISTRIBUTIONS
+        ]
+    )
+    return [
+        make_result(
+            "link evaluation",
+            len(PYTORCH_DISTRIBUTIONS) * len(links) / seconds,
+            "links/s",
+            f"{len(links)} links for {len(PYTORCH_DISTRIBUTIONS)} distributions",
+        )
+    ]
+
+
+def bench_import(repeat: int = 5) -> List[Result]:
+    def measure(code: str) -> float:
+        durations = []
+        for _ in range(repeat):
+            seconds, _ = timed(
+                lambda: subprocess.run([sys.executable, "-c", code], check=True)
+            )
+            durations.append(seconds)
+        return statistics.median(durations)
+
+    baseline = measure("import pip._internal.cli.main")
+    shimmed = measure("import pip._internal.cli.main, pytorch_pip_shim")
+    return [
+        make_result(
+            "shim import overhead",
+            (shimmed - baseline) * 1e3,
+            "ms",
+            f"{shimmed * 1e3:.0f} ms with vs. {baseline * 1e3:.0f} ms without",
+        )
+    ]
+
+
+def get_unpack_dir() -> str:
+    # pip unpacks wheels into the site-packages. If we cannot write there, the
+    # temporary directory is the best we can do.
+    dir = sysconfig.get_paths()["purelib"]
+    return dir if os.access(dir, os.W_OK) else tempfile.gettempdir()
+
+
+def bench_unpack(size: int, dir: Optional[str] = None) -> List[Result]:
+    if dir is None:
+        dir = get_unpack_dir()
+
+    with tempfile.TemporaryDirectory(dir=dir, prefix=".pytorch-pip-shim-") as root:
+        # Random data does not compress. Thus, this is the worst case for the disk
+        # rather than for the decompression.
+        archive = path.join(root, "archive.whl")
+        num_files = max(size // UNPACK_FILE_SIZE, 1)
+        with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            for idx in range(num_files):
+                zf.writestr(f"torch/lib/{idx}.so", os.urandom(UNPACK_FILE_SIZE))
+
+        def unpack() -> None:
+            with zipfile.ZipFile(archive) as zf:
+                zf.extractall(path.join(root, "unpacked"))
+
+        seconds, _ = timed(unpack)
+
+    total = num_files * UNPACK_FILE_SIZE
+    return [
+        make_result(
+            "unpack",
+            total / 1e6 / seconds,
+            "MB/s",
+            f"{total / 1e6:.0f} MB in {num_files} files to {dir}",
+        )
+    ]
+
+
+def run(
+    bases: Sequence[str] = (index.BASE,),
+    nightly: bool = False,
+    computation_backend: Optional[ComputationBackend] = None,
+    unpack_size: int = 64 * 1024 * 1024,
+    repeat: int = 5,
+    session: Optional[PipSession] = None,
+) -> List[Result]:
+    if session is None:
+        session = PipSession()
+
+    results, detected = bench_detection()
+    if computation_backend is None:
+        computation_backend = detected
+
+    links = None
+    for base in bases:
+        url = index.make_url(computation_backend, nightly, base=base)
+        index_results, index_links = bench_index(session, base, url)
+        results.extend(index_results)
+        if links is None:
+            links = index_links
+
+    if links:
+        results.extend(bench_link_evaluation(links, computation_backend))
+    else:
+        results.append(
+            make_result("link evaluation", None, "links/s", "no index available")
+        )
+
+    results.extend(bench_import(repeat=repeat))
+    if unpack_size > 0:
+        results.extend(bench_unpack(unpack_size))
+    return results
+
+
+def format_table(results: Sequence[Result]) -> str:
+    rows = [
+        (
+            result["name"],
+            f"{result['value']:.1f}" if result["value"] is not None else "-",
+            result["unit"],
+            result["detail"],
+        )
+        for result in results
+    ]
+    widths = [max(len(row[idx]) for row in rows) for idx in range(3)]
+    lines = []
+    for name, value, unit, detail in rows:
+        line = (
+            f"{name:<{widths[0]}}  {value:>{widths[1]}} {unit:<{widths[2]}}  {detail}"
+        )
+        lines.append(line.rstrip())
+    return "\n".join(lines)
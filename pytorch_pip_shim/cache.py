@@ -0,0 +1,47 @@
+import json
+import os
+import tempfile
+from os import path
+from typing import Any, Optional
+
+from pip._internal.utils.appdirs import user_cache_dir
+
+__all__ = ["is_enabled", "get_dir", "load", "store"]
+
+DIR_ENV_VAR = "PYTORCH_PIP_SHIM_CACHE_DIR"
+DISABLE_ENV_VAR = "PYTORCH_PIP_SHIM_NO_CACHE"
+
+
+def is_enabled() -> bool:
+    return not os.environ.get(DISABLE_ENV_VAR)
+
+
+def get_dir(*parts: str) -> str:
+    root = os.environ.get(DIR_ENV_VAR) or user_cache_dir("pytorch-pip-shim")
+    return path.join(root, *parts)
+
+
+def load(file: str) -> Optional[Any]:
+    try:
+        with open(file, "r") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def store(file: str, obj: Any) -> None:
+    # A broken cache must never break an installation. Thus, all errors are ignored
+    # and the file is replaced atomically to never leave a partially written file.
+    try:
+        dir = path.dirname(file)
+        os.makedirs(dir, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=dir)
+        try:
+            with os.fdopen(fd, "w") as fh:
+                json.dump(obj, fh)
+            os.replace(tmp, file)
+        except BaseException:
+            os.remove(tmp)
+            raise
+    except OSError:
+        pass
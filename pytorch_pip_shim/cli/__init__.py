@@ -1,10 +1,13 @@
 import argparse
 import sys
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 import pytorch_pip_shim
 
-from ..utils import canocialize_name
+from ..fleet import ACTIONS
+from ..matrix import parse_requirement
+from ..resolution import PYPI
+from ..utils import canocialize_name, computation_backend_options
 from .commands import make_command
 
 __all__ = ["main"]
@@ -39,6 +42,15 @@ def make_parser() -> argparse.ArgumentParser:
     add_remove_parser(subparsers)
     add_status_parser(subparsers)
     add_detect_parser(subparsers)
+    add_lock_parser(subparsers)
+    add_matrix_parser(subparsers)
+    add_wheelhouse_parser(subparsers)
+    add_find_links_parser(subparsers)
+    add_switch_parser(subparsers)
+    add_daemon_parser(subparsers)
+    add_fleet_parser(subparsers)
+    add_stats_parser(subparsers)
+    add_bench_parser(subparsers)
 
     return parser
 
@@ -49,8 +61,16 @@ def add_file_argument(parser: argparse.ArgumentParser) -> None:
         type=str,
         nargs="?",
         help=(
-            "pip main file. If not specified it is derived from pip associated with "
-            "the running interpreter."
+            "pip main file or .pth file if '--hook' is given. If not specified it is "
+            "derived from pip associated with the running interpreter."
+        ),
+    )
+    parser.add_argument(
+        "--hook",
+        action="store_true",
+        help=(
+            "Activate the shim with a .pth file and an import hook instead of "
+            "rewriting the pip main file. This survives upgrades of pip."
         ),
     )
 
@@ -93,3 +113,423 @@ def add_detect_parser(subparsers: SubParsers) -> None:
             "preferring CUDA over CPU."
         ),
     )
+
+
+def add_computation_backend_arguments(parser: argparse.ArgumentParser) -> None:
+    for option in computation_backend_options():
+        kwargs: Dict[str, Any] = dict(help=option.help)
+        if option.action == "store_true":
+            kwargs["action"] = "store_true"
+        parser.add_argument(str(option), **kwargs)
+
+
+def add_index_arguments(parser: argparse.ArgumentParser) -> None:
+    # Mirrors pip's own options for the indices and the network access.
+    parser.add_argument(
+        "-i",
+        "--index-url",
+        type=str,
+        default=PYPI,
+        help=f"Index for all but the PyTorch distributions. Defaults to {PYPI}.",
+    )
+    parser.add_argument(
+        "--extra-index-url",
+        dest="extra_index_urls",
+        metavar="URL",
+        type=str,
+        action="append",
+        default=[],
+        help="Additional index to use besides '--index-url'.",
+    )
+    parser.add_argument(
+        "--no-index",
+        action="store_true",
+        help="Ignore '--index-url' and '--extra-index-url'.",
+    )
+    parser.add_argument(
+        "-f",
+        "--find-links",
+        metavar="URL",
+        type=str,
+        action="append",
+        default=[],
+        help="Look for wheels in the given local directory or HTML page.",
+    )
+    parser.add_argument("--proxy", type=str, help="Proxy to use for all requests.")
+    parser.add_argument(
+        "--cert", type=str, help="Path to an alternate CA bundle to verify with."
+    )
+    parser.add_argument(
+        "--client-cert",
+        type=str,
+        help="Path to an SSL client certificate containing the private key.",
+    )
+    parser.add_argument(
+        "--trusted-host",
+        dest="trusted_hosts",
+        metavar="HOST",
+        type=str,
+        action="append",
+        default=[],
+        help="Mark the given host as trusted even without valid HTTPS.",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=15.0,
+        help="Socket timeout in seconds. Defaults to 15.",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=5,
+        help="Maximum number of retries of each request. Defaults to 5.",
+    )
+
+
+def add_lock_parser(subparsers: SubParsers) -> None:
+    parser = subparsers.add_parser(
+        "lock",
+        description=(
+            "Resolve the requirements and their dependencies once and write a "
+            "requirements file of exact wheel URLs with hashes. Installing from it "
+            "with 'pip install -r' skips the PyTorch index entirely."
+        ),
+    )
+    parser.add_argument(
+        "requirements", type=str, nargs="*", help="Requirements to resolve."
+    )
+    parser.add_argument(
+        "-r",
+        "--requirement",
+        dest="requirement_files",
+        metavar="FILE",
+        type=str,
+        action="append",
+        default=[],
+        help="Resolve the requirements from the given requirements file.",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        help="Lock file to write. If not specified, it is written to STDOUT.",
+    )
+    parser.add_argument(
+        "--pre",
+        dest="nightly",
+        action="store_true",
+        help="Resolve nightly instead of stable releases.",
+    )
+    parser.add_argument(
+        "--no-hashes",
+        dest="hashes",
+        action="store_false",
+        help=(
+            "Do not add hashes. Otherwise, hashes not advertised by the index are "
+            "computed by downloading the wheels."
+        ),
+    )
+    parser.add_argument(
+        "--no-deps",
+        dest="dependencies",
+        action="store_false",
+        help=(
+            "Only lock the given requirements, but not their dependencies. Since "
+            "pip requires hashes for all installed distributions, install from such "
+            "a lock file with 'pip install --no-deps -r'."
+        ),
+    )
+    add_index_arguments(parser)
+    add_computation_backend_arguments(parser)
+
+
+def pytorch_requirement(requirement: str) -> str:
+    try:
+        parse_requirement(requirement)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(str(error)) from error
+    return requirement
+
+
+def add_matrix_parser(subparsers: SubParsers) -> None:
+    parser = subparsers.add_parser(
+        "matrix",
+        description=(
+            "Resolve PyTorch distributions for multiple computation backends at once "
+            "and print the results as JSON."
+        ),
+    )
+    parser.add_argument(
+        "requirements",
+        type=pytorch_requirement,
+        nargs="+",
+        help="PyTorch distributions to resolve.",
+    )
+    parser.add_argument(
+        "-b",
+        "--computation-backends",
+        type=str,
+        nargs="+",
+        required=True,
+        help="Computation backends to resolve for, e.g. 'cpu cu102 cu111'.",
+    )
+    parser.add_argument(
+        "--pre",
+        dest="nightly",
+        action="store_true",
+        help="Resolve nightly instead of stable releases.",
+    )
+    parser.add_argument(
+        "--no-sizes",
+        dest="sizes",
+        action="store_false",
+        help="Do not query the size of the resolved wheels.",
+    )
+
+
+def add_wheelhouse_parser(subparsers: SubParsers) -> None:
+    parser = subparsers.add_parser(
+        "wheelhouse",
+        description=(
+            "Resolve requirements and their dependencies for one or more "
+            "computation backends and download the wheels concurrently into a "
+            "directory per computation backend. Wheels "
+            "shared between computation backends are hard linked. Every directory "
+            "gets an index file such that 'pip install --no-index --find-links' can "
+            "install from it without any index access."
+        ),
+    )
+    parser.add_argument(
+        "requirements", type=str, nargs="*", help="Requirements to resolve."
+    )
+    parser.add_argument(
+        "-r",
+        "--requirement",
+        dest="requirement_files",
+        metavar="FILE",
+        type=str,
+        action="append",
+        default=[],
+        help="Resolve the requirements from the given requirements file.",
+    )
+    parser.add_argument(
+        "-d",
+        "--dest",
+        dest="dir",
+        metavar="DIR",
+        type=str,
+        default="wheelhouse",
+        help="Directory to export the wheels to. Defaults to 'wheelhouse'.",
+    )
+    parser.add_argument(
+        "-b",
+        "--computation-backends",
+        type=str,
+        nargs="+",
+        help=(
+            "Computation backends to export for, e.g. 'cpu cu102 cu111'. If not "
+            "specified, the computation backend is detected from the available "
+            "hardware."
+        ),
+    )
+    parser.add_argument(
+        "--pre",
+        dest="nightly",
+        action="store_true",
+        help="Resolve nightly instead of stable releases.",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="Number of parallel downloads.",
+    )
+    parser.add_argument(
+        "--no-deps",
+        dest="dependencies",
+        action="store_false",
+        help="Only export the given requirements, but not their dependencies.",
+    )
+    add_index_arguments(parser)
+
+
+def add_find_links_parser(subparsers: SubParsers) -> None:
+    parser = subparsers.add_parser(
+        "find-links",
+        description=(
+            "Build or update an index of local '--find-links' directories grouped by "
+            "project and computation backend. If a directory is indexed, the shim "
+            "only hands the links of the requested project and computation backend "
+            "to pip instead of letting it list and parse the whole directory. The "
+            "shim updates the index on its own if files are added or removed."
+        ),
+    )
+    parser.add_argument(
+        "dirs", metavar="DIR", type=str, nargs="+", help="Directories to index."
+    )
+
+
+def add_switch_parser(subparsers: SubParsers) -> None:
+    parser = subparsers.add_parser(
+        "switch",
+        description=(
+            "Switch the installed PyTorch distributions to another computation "
+            "backend. Only the files that differ between the computation backends "
+            "are replaced."
+        ),
+    )
+    parser.add_argument(
+        "distributions",
+        type=str,
+        nargs="*",
+        help=(
+            "PyTorch distributions to switch. If not specified, all installed "
+            "PyTorch distributions are switched."
+        ),
+    )
+    add_computation_backend_arguments(parser)
+
+
+def add_daemon_parser(subparsers: SubParsers) -> None:
+    parser = subparsers.add_parser(
+        "daemon",
+        description=(
+            "Keep the detected computation backend and the parsed PyTorch indices in "
+            "memory and serve them to the shim over a Unix socket."
+        ),
+    )
+    parser.add_argument(
+        "--socket",
+        type=str,
+        help=(
+            "Path of the Unix socket. If not specified, it is read from "
+            "PYTORCH_PIP_SHIM_SOCKET or placed in the cache directory."
+        ),
+    )
+    parser.add_argument(
+        "--refresh-interval",
+        type=float,
+        default=600.0,
+        metavar="SECONDS",
+        help="Interval in which the indices are refreshed in the background.",
+    )
+    parser.add_argument(
+        "--pre",
+        dest="nightly",
+        action="store_true",
+        help="Also load the nightly index on startup.",
+    )
+
+
+def add_fleet_parser(subparsers: SubParsers) -> None:
+    parser = subparsers.add_parser(
+        "fleet",
+        description=(
+            "Insert, remove, or check the shim for many pip installations in parallel "
+            "and print a summary as JSON. For status, returns 0 if the shim is "
+            "inserted in all of them."
+        ),
+    )
+    parser.add_argument("action", choices=ACTIONS, help="Action to apply.")
+    parser.add_argument(
+        "-p",
+        "--python",
+        dest="interpreters",
+        metavar="INTERPRETER",
+        type=str,
+        nargs="+",
+        default=[],
+        help="Python interpreters whose pip should be handled.",
+    )
+    parser.add_argument(
+        "-r",
+        "--root",
+        dest="roots",
+        metavar="DIR",
+        type=str,
+        nargs="+",
+        default=[],
+        help=(
+            "Environments or directories containing environments, e.g. the 'envs' "
+            "directory of conda, that are scanned for pip installations."
+        ),
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="Number of parallel workers. Defaults to the number of CPUs.",
+    )
+
+
+def add_stats_parser(subparsers: SubParsers) -> None:
+    parser = subparsers.add_parser(
+        "stats",
+        description=(
+            "Print percentiles of the metrics recorded for past pip runs and the hit "
+            "ratios of the caches."
+        ),
+    )
+    parser.add_argument(
+        "-n",
+        "--last",
+        type=int,
+        metavar="N",
+        help="Only consider the last N runs.",
+    )
+    parser.add_argument(
+        "--textfile",
+        type=str,
+        metavar="FILE",
+        help=(
+            "Also write the statistics to FILE in the OpenMetrics text format, e.g. "
+            "for the textfile collector of the Prometheus node exporter."
+        ),
+    )
+
+
+def add_bench_parser(subparsers: SubParsers) -> None:
+    parser = subparsers.add_parser(
+        "bench",
+        description=(
+            "Diagnose a slow environment by measuring the detection probes, the "
+            "latency and throughput of the PyTorch index and its mirrors, the import "
+            "overhead of the shim, the link evaluation rate, and the unpack speed of "
+            "the local disk."
+        ),
+    )
+    parser.add_argument(
+        "--pre",
+        dest="nightly",
+        action="store_true",
+        help="Measure the nightly instead of the stable index.",
+    )
+    parser.add_argument(
+        "--pytorch-mirror",
+        dest="pytorch_mirrors",
+        metavar="URL",
+        type=str,
+        action="append",
+        help=(
+            "Base URL of a mirror of the PyTorch index. Can be given multiple times. "
+            "If not specified, the official index is measured."
+        ),
+    )
+    parser.add_argument(
+        "--unpack-size",
+        type=int,
+        default=64,
+        metavar="MB",
+        help="Size of the archive that is unpacked. Pass 0 to skip this.",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="Number of interpreter starts to measure the import overhead.",
+    )
+    parser.add_argument(
+        "--json", action="store_true", help="Print the results as JSON."
+    )
+    add_computation_backend_arguments(parser)
@@ -1,14 +1,34 @@
 import argparse
+import contextlib
+import json
 import sys
 from abc import ABC, abstractmethod
 from os import path
 from typing import Dict, NoReturn, Optional, Type
 
+from pip._internal.index.package_finder import PackageFinder
+from pip._internal.network.session import PipSession
+
 import pytorch_pip_shim
 
-from .. import shim
-from ..computation_backend import detect
-from ..utils import canocialize_name
+from .. import (
+    bench,
+    daemon,
+    findlinks,
+    fleet,
+    index,
+    lock,
+    metrics,
+    preflight,
+    shim,
+    wheelhouse,
+)
+from ..computation_backend import ComputationBackend, detect
+from ..matrix import resolve_matrix
+from ..patch import PYTORCH_DISTRIBUTIONS
+from ..resolution import make_finder, resolve
+from ..switch import switch
+from ..utils import canocialize_name, process_computation_backend
 
 __all__ = ["make_command"]
 
@@ -37,17 +57,27 @@ class GlobalCommand(Command):
 
 class InsertCommand(Command):
     def _run(self, args: argparse.Namespace) -> None:
-        shim.insert(args.file)
+        if args.hook:
+            shim.insert_hook(args.file)
+        else:
+            shim.insert(args.file)
 
 
 class RemoveCommand(Command):
     def _run(self, args: argparse.Namespace) -> None:
-        shim.remove(args.file)
+        if args.hook:
+            shim.remove_hook(args.file)
+        else:
+            shim.remove(args.file)
 
 
 class StatusCommand(Command):
     def _run(self, args: argparse.Namespace) -> bool:
-        is_inserted = shim.is_inserted(args.file)
+        is_inserted = (
+            shim.is_hook_inserted(args.file)
+            if args.hook
+            else shim.is_inserted(args.file)
+        )
         if not args.quiet:
             print(f"The shim {'is' if is_inserted else 'is NOT'} inserted.")
         return is_inserted
@@ -58,12 +88,223 @@ class DetectCommand(Command):
         print(detect())
 
 
+def make_session(args: argparse.Namespace) -> PipSession:
+    return preflight.make_session(
+        proxy=args.proxy,
+        cert=args.cert,
+        client_cert=args.client_cert,
+        trusted_hosts=args.trusted_hosts,
+        timeout=args.timeout,
+        retries=args.retries,
+    )
+
+
+def make_index_finder(args: argparse.Namespace, session: PipSession) -> PackageFinder:
+    return make_finder(
+        session=session,
+        index_urls=() if args.no_index else (args.index_url, *args.extra_index_urls),
+        find_links=args.find_links,
+        nightly=args.nightly,
+    )
+
+
+class LockCommand(Command):
+    def _run(self, args: argparse.Namespace) -> None:
+        session = make_session(args)
+        requirements = list(args.requirements)
+        for file in args.requirement_files:
+            requirements.extend(lock.read_requirements(file, session=session))
+
+        candidates = resolve(
+            requirements,
+            process_computation_backend(args),
+            nightly=args.nightly,
+            finder=make_index_finder(args, session),
+            dependencies=args.dependencies,
+        )
+
+        with contextlib.ExitStack() as stack:
+            fh = (
+                stack.enter_context(open(args.output, "w"))
+                if args.output
+                else sys.stdout
+            )
+            lock.write(fh, candidates, hashes=args.hashes, session=session)
+
+
+class MatrixCommand(Command):
+    def _run(self, args: argparse.Namespace) -> None:
+        results = resolve_matrix(
+            args.requirements,
+            [
+                ComputationBackend.from_str(computation_backend)
+                for computation_backend in args.computation_backends
+            ],
+            nightly=args.nightly,
+            sizes=args.sizes,
+        )
+        print(json.dumps(results, indent=2))
+
+
+class WheelhouseCommand(Command):
+    def _run(self, args: argparse.Namespace) -> None:
+        session = make_session(args)
+        requirements = list(args.requirements)
+        for file in args.requirement_files:
+            requirements.extend(lock.read_requirements(file, session=session))
+
+        computation_backends = (
+            [
+                ComputationBackend.from_str(computation_backend)
+                for computation_backend in args.computation_backends
+            ]
+            if args.computation_backends
+            else [detect()]
+        )
+        candidates = wheelhouse.resolve_wheelhouse(
+            requirements,
+            computation_backends,
+            nightly=args.nightly,
+            finder=make_index_finder(args, session),
+            dependencies=args.dependencies,
+        )
+        manifest = wheelhouse.export(
+            candidates, args.dir, session=session, max_workers=args.jobs
+        )
+
+        for computation_backend, entries in manifest.items():
+            counts: Dict[str, int] = {}
+            for entry in entries:
+                counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+            print(
+                f"{computation_backend}: {len(entries)} wheels in "
+                f"{path.join(args.dir, computation_backend)} ("
+                + ", ".join(f"{count} {status}" for status, count in counts.items())
+                + ")"
+            )
+
+
+class FindLinksCommand(Command):
+    def _run(self, args: argparse.Namespace) -> None:
+        for dir in args.dirs:
+            idx, changed = findlinks.build(dir)
+            print(
+                f"{dir}: {len(idx.filenames)} files of {len(idx.projects)} projects "
+                f"({'updated' if changed else 'unchanged'})"
+            )
+
+
+class SwitchCommand(Command):
+    def _run(self, args: argparse.Namespace) -> None:
+        computation_backend = process_computation_backend(args)
+        results = switch(
+            computation_backend,
+            project_names=args.distributions or PYTORCH_DISTRIBUTIONS,
+        )
+        if not results:
+            print(f"Nothing to switch to {computation_backend}.")
+
+        for project_name, (old_version, new_version, plan) in results.items():
+            print(
+                f"{project_name}: {old_version} -> {new_version} "
+                f"({len(plan.write)} written, {len(plan.remove)} removed, "
+                f"{len(plan.keep)} kept)"
+            )
+
+
+class DaemonCommand(Command):
+    def _run(self, args: argparse.Namespace) -> None:
+        server = daemon.Daemon(refresh_interval=args.refresh_interval)
+        preload = [index.make_url(server.computation_backend, False)]
+        if args.nightly:
+            preload.append(index.make_url(server.computation_backend, True))
+
+        socket_path = args.socket or daemon.get_socket_path()
+        print(f"Serving {server.computation_backend} on {socket_path}")
+        with contextlib.suppress(KeyboardInterrupt):
+            daemon.serve(server, socket_path=socket_path, preload=preload)
+
+
+class FleetCommand(Command):
+    def _run(self, args: argparse.Namespace) -> bool:
+        files = fleet.discover(
+            interpreters=args.interpreters, roots=args.roots, max_workers=args.jobs
+        )
+        summary = fleet.run(args.action, files, max_workers=args.jobs)
+        print(json.dumps(summary, indent=2))
+        if summary["errors"]:
+            return False
+
+        return args.action != "status" or bool(summary["inserted"] == summary["total"])
+
+
+class StatsCommand(Command):
+    def _run(self, args: argparse.Namespace) -> bool:
+        runs = metrics.load(last=args.last)
+        if not runs:
+            print(f"No runs recorded in {metrics.get_file()}")
+            return False
+
+        print(f"{len(runs)} runs recorded in {metrics.get_file()}")
+        print()
+        header = ("metric", "p50", "p90", "p99", "max")
+        rows = [
+            (name, *[f"{summary[column]:.4g}" for column in header[1:]])
+            for name, summary in metrics.summarize(runs).items()
+        ]
+        widths = [max(len(row[idx]) for row in (header, *rows)) for idx in range(5)]
+        for row in (header, *rows):
+            print(
+                "  ".join(
+                    cell.ljust(width) if idx == 0 else cell.rjust(width)
+                    for idx, (cell, width) in enumerate(zip(row, widths))
+                )
+            )
+
+        hit_rates = metrics.hit_rates(runs)
+        if hit_rates:
+            print()
+            for name, rate in hit_rates.items():
+                print(f"{name} hit ratio: {rate:.1%}")
+
+        if args.textfile:
+            metrics.write_textfile(args.textfile, runs)
+        return True
+
+
+class BenchCommand(Command):
+    def _run(self, args: argparse.Namespace) -> None:
+        results = bench.run(
+            bases=args.pytorch_mirrors or (index.BASE,),
+            nightly=args.nightly,
+            computation_backend=(
+                process_computation_backend(args)
+                if args.computation_backend is not None or args.cpu
+                else None
+            ),
+            unpack_size=args.unpack_size * 1024 * 1024,
+            repeat=args.repeat,
+        )
+        print(
+            json.dumps(results, indent=2) if args.json else bench.format_table(results)
+        )
+
+
 COMMAD_CLASSES: Dict[Optional[str], Type[Command]] = {
     None: GlobalCommand,
     "insert": InsertCommand,
     "remove": RemoveCommand,
     "status": StatusCommand,
     "detect": DetectCommand,
+    "lock": LockCommand,
+    "matrix": MatrixCommand,
+    "wheelhouse": WheelhouseCommand,
+    "find-links": FindLinksCommand,
+    "switch": SwitchCommand,
+    "daemon": DaemonCommand,
+    "fleet": FleetCommand,
+    "stats": StatsCommand,
+    "bench": BenchCommand,
 }
 
 
@@ -0,0 +1,117 @@
+import functools
+import json
+import os
+from os import path
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+
+from pip._vendor.packaging.version import InvalidVersion, Version
+
+__all__ = ["CompatibilityError", "Matrix", "load"]
+
+ENV_VAR = "PYTORCH_PIP_SHIM_COMPATIBILITY"
+FILE = path.join(path.dirname(__file__), "compatibility.json")
+
+Release = Mapping[str, Sequence[str]]
+
+
+class CompatibilityError(RuntimeError):
+    pass
+
+
+def normalize(version: str) -> Optional[str]:
+    try:
+        return Version(version).public
+    except InvalidVersion:
+        return None
+
+
+class Matrix:
+    def __init__(self, releases: Iterable[Release]) -> None:
+        # Maps a version of one project to the compatible versions of another one.
+        self._compatible: Dict[Tuple[str, str, str], Set[str]] = {}
+        for release in releases:
+            versions = {
+                project_name: {
+                    version
+                    for version in map(normalize, project_versions)
+                    if version is not None
+                }
+                for project_name, project_versions in release.items()
+            }
+            for project_name, project_versions in versions.items():
+                for other, other_versions in versions.items():
+                    if other == project_name:
+                        continue
+
+                    for version in project_versions:
+                        self._compatible.setdefault(
+                            (project_name, version, other), set()
+                        ).update(other_versions)
+
+    def get_compatible_versions(
+        self, project_name: str, version: str, other: str
+    ) -> Optional[Set[str]]:
+        normalized = normalize(version)
+        if normalized is None:
+            return None
+        return self._compatible.get((project_name, normalized, other))
+
+    def is_compatible(
+        self, pins: Mapping[str, str], project_name: str, version: str
+    ) -> bool:
+        normalized = normalize(version)
+        if normalized is None:
+            return True
+
+        for pinned_project_name, pinned_version in pins.items():
+            if pinned_project_name == project_name:
+                continue
+
+            # If the matrix does not know a release, we cannot prune anything.
+            compatible_versions = self.get_compatible_versions(
+                pinned_project_name, pinned_version, project_name
+            )
+            if (
+                compatible_versions is not None
+                and normalized not in compatible_versions
+            ):
+                return False
+
+        return True
+
+
+def read(file: str) -> List[Release]:
+    try:
+        with open(file, "r") as fh:
+            releases = json.load(fh)
+    except (OSError, ValueError) as error:
+        raise CompatibilityError(
+            f"Unable to read the compatibility matrix {file}: {error}"
+        ) from error
+
+    if not isinstance(releases, list) or not all(
+        isinstance(release, dict)
+        and all(isinstance(versions, list) for versions in release.values())
+        for release in releases
+    ):
+        raise CompatibilityError(
+            f"The compatibility matrix {file} has to be a list of objects that map "
+            "project names to lists of versions."
+        )
+    return releases
+
+
+def load(file: Optional[str] = None) -> Matrix:
+    # The bundled matrix can be extended without a new release by pointing the
+    # environment variable to a file with additional releases.
+    if file is None:
+        file = os.environ.get(ENV_VAR) or None
+    return _load(file)
+
+
+@functools.lru_cache()
+def _load(file: Optional[str]) -> Matrix:
+    releases = read(FILE)
+    if file is not None:
+        releases.extend(read(file))
+    return Matrix(releases)
@@ -3,6 +3,8 @@ import subprocess
 from abc import ABC, abstractmethod
 from typing import Any
 
+from . import trace
+
 __all__ = [
     "ComputationBackend",
     "CPUBackend",
@@ -79,6 +81,16 @@ NVCC_RELEASE_PATTERN = re.compile(r"release (?P<major>\d+)[.](?P<minor>\d+)")
 
 
 def detect() -> ComputationBackend:
+    if not trace.is_enabled():
+        return detect_from_nvcc()
+
+    with trace.span("detect") as span:
+        computation_backend = detect_from_nvcc()
+        span["output"] = str(computation_backend)
+        return computation_backend
+
+
+def detect_from_nvcc() -> ComputationBackend:
     fallback = CPUBackend()
     try:
         output = (
@@ -0,0 +1,262 @@
+import contextlib
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from pip._internal.models.link import Link
+from pip._internal.network.session import PipSession
+from pip._vendor.packaging.tags import Tag
+from pip._vendor.packaging.utils import canonicalize_name
+
+from . import cache, index
+from .computation_backend import ComputationBackend
+from .computation_backend import detect as detect_computation_backend
+
+__all__ = [
+    "DaemonError",
+    "get_socket_path",
+    "Daemon",
+    "serve",
+    "query",
+    "detect",
+    "collect_links",
+]
+
+SOCKET_ENV_VAR = "PYTORCH_PIP_SHIM_SOCKET"
+# The daemon is only an accelerator. If it does not answer almost immediately, falling
+# back to the in-process behavior is faster than waiting for it.
+TIMEOUT = 0.2
+REFRESH_INTERVAL = 10 * 60
+
+
+class DaemonError(RuntimeError):
+    pass
+
+
+def get_socket_path() -> str:
+    return os.environ.get(SOCKET_ENV_VAR) or cache.get_dir("daemon.sock")
+
+
+def serialize(link: Link) -> Dict[str, Any]:
+    return dict(
+        url=link.url,
+        requires_python=link.requires_python,
+        yanked_reason=link.yanked_reason,
+    )
+
+
+def deserialize(obj: Dict[str, Any]) -> Link:
+    return Link(
+        obj["url"],
+        requires_python=obj["requires_python"],
+        yanked_reason=obj["yanked_reason"],
+    )
+
+
+class Daemon:
+    def __init__(
+        self,
+        session: Optional[PipSession] = None,
+        refresh_interval: float = REFRESH_INTERVAL,
+    ) -> None:
+        self.session = session or PipSession()
+        self.refresh_interval = refresh_interval
+        self.computation_backend = detect_computation_backend()
+        # The links of every index page are bucketed by project, since every request
+        # only asks for the links of a single project.
+        self.pages: Dict[str, Dict[str, List[Link]]] = {}
+        self.loading: Dict[str, threading.Thread] = {}
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+
+    def load(self, url: str) -> None:
+        try:
+            links = index.fetch_links(url, session=self.session)
+        except Exception:
+            return
+        finally:
+            with self.lock:
+                self.loading.pop(url, None)
+
+        buckets: Dict[str, List[Link]] = {}
+        for link in links:
+            buckets.setdefault(index.get_project_name(link), []).append(link)
+        with self.lock:
+            self.pages[url] = buckets
+
+    def load_in_background(self, url: str) -> None:
+        with self.lock:
+            if url in self.loading:
+                return
+
+            thread = threading.Thread(target=self.load, args=(url,), daemon=True)
+            self.loading[url] = thread
+        thread.start()
+
+    def stop(self) -> None:
+        self.stopped.set()
+
+    def refresh(self) -> None:
+        while not self.stopped.wait(self.refresh_interval):
+            self.computation_backend = detect_computation_backend()
+            with self.lock:
+                urls = list(self.pages)
+            for url in urls:
+                self.load(url)
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        command = request.get("command")
+        if command == "ping":
+            return dict(ok=True)
+        elif command == "detect":
+            return dict(computation_backend=str(self.computation_backend))
+        elif command == "links":
+            return self.handle_links(request)
+        else:
+            return dict(error=f"Unknown command {command}.")
+
+    def handle_links(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        url = request["url"]
+        with self.lock:
+            buckets = self.pages.get(url)
+        if buckets is None:
+            # The client will not wait for the index to be fetched. Thus, we only
+            # answer from memory and load the page for the next requests.
+            self.load_in_background(url)
+            return dict(links=None)
+
+        project_name = canonicalize_name(request["project_name"])
+        tags = request.get("tags")
+        links = index.filter_links(
+            buckets.get(project_name, []),
+            project_name,
+            ComputationBackend.from_str(request["computation_backend"]),
+            tags=(
+                [Tag(*tag.split("-", 2)) for tag in tags] if tags is not None else None
+            ),
+        )
+        return dict(links=[serialize(link) for link in links])
+
+
+def serve(
+    daemon: Daemon,
+    socket_path: Optional[str] = None,
+    preload: Sequence[str] = (),
+    ready: Optional[threading.Event] = None,
+) -> None:
+    if not hasattr(socket, "AF_UNIX"):
+        raise DaemonError("The daemon requires support for Unix sockets.")
+
+    if socket_path is None:
+        socket_path = get_socket_path()
+    os.makedirs(os.path.dirname(socket_path) or ".", exist_ok=True)
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(socket_path)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self) -> None:
+            try:
+                request = json.loads(self.rfile.readline())
+                response = daemon.handle(request)
+            except Exception as error:
+                response = dict(error=str(error))
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+    class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    for url in preload:
+        daemon.load_in_background(url)
+
+    threading.Thread(target=daemon.refresh, daemon=True).start()
+    with Server(socket_path, Handler) as server:
+
+        def shutdown() -> None:
+            daemon.stopped.wait()
+            server.shutdown()
+
+        threading.Thread(target=shutdown, daemon=True).start()
+        if ready is not None:
+            ready.set()
+        try:
+            server.serve_forever(poll_interval=0.1)
+        finally:
+            daemon.stop()
+            with contextlib.suppress(OSError):
+                os.remove(socket_path)
+
+
+def query(
+    request: Dict[str, Any],
+    socket_path: Optional[str] = None,
+    timeout: float = TIMEOUT,
+) -> Optional[Dict[str, Any]]:
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+
+    if socket_path is None:
+        socket_path = get_socket_path()
+    if not os.path.exists(socket_path):
+        return None
+
+    deadline = time.monotonic() + timeout
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(socket_path)
+            sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+            chunks: List[bytes] = []
+            while not chunks or not chunks[-1].endswith(b"\n"):
+                sock.settimeout(max(deadline - time.monotonic(), 1e-3))
+                chunk = sock.recv(64 * 1024)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        response = json.loads(b"".join(chunks))
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(response, dict) or "error" in response:
+        return None
+    return response
+
+
+def detect(socket_path: Optional[str] = None) -> Optional[ComputationBackend]:
+    response = query(dict(command="detect"), socket_path=socket_path)
+    if response is None:
+        return None
+
+    try:
+        return ComputationBackend.from_str(response["computation_backend"])
+    except Exception:
+        return None
+
+
+def collect_links(
+    url: str,
+    project_name: str,
+    computation_backend: ComputationBackend,
+    tags: Optional[Sequence[Tag]] = None,
+    socket_path: Optional[str] = None,
+) -> Optional[List[Link]]:
+    response = query(
+        dict(
+            command="links",
+            url=url,
+            project_name=project_name,
+            computation_backend=str(computation_backend),
+            tags=[str(tag) for tag in tags] if tags is not None else None,
+        ),
+        socket_path=socket_path,
+    )
+    if response is None or response.get("links") is None:
+        return None
+
+    try:
+        return [deserialize(obj) for obj in response["links"]]
+    except (KeyError, TypeError):
+        return None
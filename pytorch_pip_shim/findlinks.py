@@ -0,0 +1,166 @@
+import os
+from os import path
+from typing import Dict, List, Optional, Set, Tuple
+
+from pip._internal.models.link import Link
+from pip._internal.utils.urls import path_to_url, url_to_path
+
+from . import cache, index
+from .computation_backend import ComputationBackend
+
+__all__ = [
+    "INDEX_FILE",
+    "Index",
+    "get_dir",
+    "load",
+    "build",
+    "is_indexed",
+    "load_location",
+]
+
+INDEX_FILE = ".pytorch-pip-shim-index.json"
+FORMAT_VERSION = 1
+
+# Only wheels encode the project name unambiguously in their file name. All other
+# files are grouped under this key and are always handed to pip.
+OTHER = ""
+ANY = "any"
+
+
+def classify(filename: str) -> Tuple[str, str]:
+    if not filename.endswith(".whl"):
+        return OTHER, ANY
+
+    link = Link(filename)
+    return index.get_project_name(link), index.get_computation_backend(link) or ANY
+
+
+class Index:
+    def __init__(
+        self, dir: str, projects: Optional[Dict[str, Dict[str, List[str]]]] = None
+    ) -> None:
+        self.dir = dir
+        self.projects = projects if projects is not None else {}
+
+    @property
+    def file(self) -> str:
+        return path.join(self.dir, INDEX_FILE)
+
+    @property
+    def filenames(self) -> Set[str]:
+        return {
+            filename
+            for groups in self.projects.values()
+            for filenames in groups.values()
+            for filename in filenames
+        }
+
+    def add(self, filename: str) -> None:
+        project_name, computation_backend = classify(filename)
+        self.projects.setdefault(project_name, {}).setdefault(
+            computation_backend, []
+        ).append(filename)
+
+    def remove(self, filenames: Set[str]) -> None:
+        for project_name, groups in list(self.projects.items()):
+            for computation_backend, group in list(groups.items()):
+                group[:] = [filename for filename in group if filename not in filenames]
+                if not group:
+                    del groups[computation_backend]
+            if not groups:
+                del self.projects[project_name]
+
+    def update(self) -> bool:
+        # Listing the directory is cheap compared to parsing all file names. Thus,
+        # only the files that were added since the last update are parsed.
+        current = {
+            entry.name
+            for entry in os.scandir(self.dir)
+            if entry.is_file() and not entry.name.startswith(".")
+        }
+        known = self.filenames
+        added = current - known
+        removed = known - current
+        for filename in sorted(added):
+            self.add(filename)
+        if removed:
+            self.remove(removed)
+        return bool(added or removed)
+
+    def save(self) -> None:
+        cache.store(self.file, dict(version=FORMAT_VERSION, projects=self.projects))
+
+    def get_filenames(
+        self,
+        project_name: str,
+        computation_backend: Optional[ComputationBackend] = None,
+    ) -> List[str]:
+        groups = self.projects.get(project_name, {})
+        if computation_backend is None:
+            filenames = [filename for group in groups.values() for filename in group]
+        else:
+            filenames = [
+                *groups.get(str(computation_backend), []),
+                *groups.get(ANY, []),
+            ]
+        return [*filenames, *self.projects.get(OTHER, {}).get(ANY, [])]
+
+    def get_links(
+        self,
+        project_name: str,
+        computation_backend: Optional[ComputationBackend] = None,
+    ) -> List[Link]:
+        return [
+            Link(path_to_url(path.join(self.dir, filename)))
+            for filename in self.get_filenames(project_name, computation_backend)
+        ]
+
+
+def get_dir(location: str) -> Optional[str]:
+    if location.startswith("file:"):
+        location = url_to_path(location)
+    elif "://" in location:
+        return None
+
+    return path.abspath(location) if path.isdir(location) else None
+
+
+def load(dir: str) -> Optional[Index]:
+    obj = cache.load(path.join(dir, INDEX_FILE))
+    if not isinstance(obj, dict) or obj.get("version") != FORMAT_VERSION:
+        return None
+
+    projects = obj.get("projects")
+    if not isinstance(projects, dict):
+        return None
+
+    return Index(dir, projects=projects)
+
+
+def build(dir: str) -> Tuple[Index, bool]:
+    idx = load(dir)
+    if idx is None:
+        idx = Index(dir)
+        idx.update()
+        changed = True
+    else:
+        changed = idx.update()
+    if changed:
+        idx.save()
+    return idx, changed
+
+
+def is_indexed(location: str) -> bool:
+    dir = get_dir(location)
+    return dir is not None and path.exists(path.join(dir, INDEX_FILE))
+
+
+def load_location(location: str) -> Optional[Index]:
+    # Only directories that were indexed explicitly are used. Otherwise, every
+    # --find-links directory would silently get an index file.
+    dir = get_dir(location)
+    if dir is None or not path.exists(path.join(dir, INDEX_FILE)):
+        return None
+
+    idx, _ = build(dir)
+    return idx
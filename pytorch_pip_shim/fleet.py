@@ -0,0 +1,100 @@
+import concurrent.futures
+import glob
+import subprocess
+from os import path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+
+from . import shim
+
+__all__ = ["ACTIONS", "find_pip_main", "scan", "discover", "apply", "run"]
+
+ACTIONS = ("insert", "remove", "status")
+
+# Equivalent to shim.FILE, but evaluated by the target interpreter.
+FIND_SCRIPT = (
+    "import os, pip; "
+    "print(os.path.abspath(os.path.join("
+    "os.path.dirname(pip.__file__), '_internal', 'cli', 'main.py')))"
+)
+MAIN = path.join("pip", "_internal", "cli", "main.py")
+SITE_PACKAGES_PATTERNS = (
+    path.join("lib", "python*", "site-packages"),
+    path.join("Lib", "site-packages"),
+)
+
+
+def find_pip_main(interpreter: str, timeout: float = 30.0) -> Optional[str]:
+    try:
+        output = subprocess.check_output(
+            [interpreter, "-c", FIND_SCRIPT],
+            stderr=subprocess.DEVNULL,
+            timeout=timeout,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+    file = output.decode().strip()
+    return file if path.isfile(file) else None
+
+
+def scan(root: str) -> List[str]:
+    # The root can either be an environment itself, e.g. the base environment of
+    # conda, or contain environments, e.g. the envs directory of conda.
+    files: Set[str] = set()
+    for env_pattern in ("", "*"):
+        for site_packages_pattern in SITE_PACKAGES_PATTERNS:
+            pattern = path.join(
+                glob.escape(root), env_pattern, site_packages_pattern, MAIN
+            )
+            files.update(path.abspath(file) for file in glob.glob(pattern))
+    return sorted(files)
+
+
+def discover(
+    interpreters: Sequence[str] = (),
+    roots: Sequence[str] = (),
+    max_workers: Optional[int] = None,
+) -> List[str]:
+    files: Set[str] = set()
+    for root in roots:
+        files.update(scan(root))
+
+    # Finding the pip of an interpreter means starting it. Since this mostly waits for
+    # the subprocesses, threads are sufficient.
+    with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+        files.update(file for file in executor.map(find_pip_main, interpreters) if file)
+    return sorted(files)
+
+
+def apply(action: str, file: str) -> Dict[str, Any]:
+    result: Dict[str, Any] = dict(file=file, inserted=None, error=None)
+    try:
+        if action == "insert":
+            shim.insert(file)
+        elif action == "remove":
+            shim.remove(file)
+        elif action != "status":
+            raise ValueError(f"Unknown action {action}.")
+        result["inserted"] = shim.is_inserted(file)
+    except Exception as error:
+        result["error"] = f"{type(error).__name__}: {error}"
+    return result
+
+
+def run(
+    action: str, files: Iterable[str], max_workers: Optional[int] = None
+) -> Dict[str, Any]:
+    if action not in ACTIONS:
+        raise ValueError(f"Unknown action {action}.")
+
+    files = list(files)
+    with concurrent.futures.ProcessPoolExecutor(max_workers) as executor:
+        results = list(executor.map(apply, [action] * len(files), files))
+
+    return dict(
+        action=action,
+        total=len(results),
+        inserted=sum(bool(result["inserted"]) for result in results),
+        errors=sum(result["error"] is not None for result in results),
+        results=results,
+    )
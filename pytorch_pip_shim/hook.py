@@ -0,0 +1,72 @@
+# This module is loaded from a .pth file during the startup of every interpreter of the
+# environment. Thus, it must do as little as possible until pip is actually imported.
+# Even typing and importlib.abc are too expensive to import here, so the annotations
+# are only evaluated by the type checker.
+import sys
+
+MYPY = False
+if MYPY:
+    import types
+    from importlib.machinery import ModuleSpec
+    from typing import Any, Optional, Sequence
+
+__all__ = ["PipMainFinder", "install"]
+
+TARGET = "pip._internal.cli.main"
+
+
+class PipMainLoader:
+    def __init__(self, loader: "Any") -> None:
+        self.loader = loader
+
+    def __getattr__(self, name: str) -> "Any":
+        return getattr(self.loader, name)
+
+    def create_module(self, spec: "ModuleSpec") -> "Any":
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module: "types.ModuleType") -> None:
+        self.loader.exec_module(module)
+
+        main = getattr(module, "main", None)
+        # If the shim was also inserted into the file, pip is already patched.
+        if main is None or hasattr(main, "__wrapped__"):
+            return
+
+        try:
+            import pytorch_pip_shim
+        except Exception:
+            return
+
+        module.main = pytorch_pip_shim.patch(main)  # type: ignore[attr-defined]
+
+
+class PipMainFinder:
+    def find_spec(
+        self,
+        fullname: str,
+        path: "Optional[Sequence[str]]",
+        target: "Optional[types.ModuleType]" = None,
+    ) -> "Optional[ModuleSpec]":
+        if fullname != TARGET:
+            return None
+
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+
+            spec = finder.find_spec(fullname, path, target)
+            if spec is None:
+                continue
+
+            if spec.loader is not None:
+                spec.loader = PipMainLoader(spec.loader)  # type: ignore[assignment]
+            return spec
+
+        return None
+
+
+def install() -> None:
+    # The hook might be loaded multiple times under different module names.
+    if not any(type(finder).__name__ == "PipMainFinder" for finder in sys.meta_path):
+        sys.meta_path.insert(0, PipMainFinder())
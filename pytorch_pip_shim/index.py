@@ -0,0 +1,371 @@
+import codecs
+import json
+import posixpath
+import re
+from html.parser import HTMLParser
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+from urllib.parse import urljoin
+
+from pip._internal.exceptions import InvalidWheelFilename
+from pip._internal.models.link import Link
+from pip._internal.models.wheel import Wheel
+from pip._internal.network.session import PipSession
+from pip._vendor.packaging.specifiers import BaseSpecifier
+from pip._vendor.packaging.tags import Tag
+from pip._vendor.packaging.utils import canonicalize_name
+
+from . import metrics
+from .computation_backend import ComputationBackend
+from .installation import is_pinned
+
+__all__ = [
+    "BASE",
+    "make_url",
+    "fetch",
+    "parse",
+    "parse_json",
+    "fetch_links",
+    "iter_links",
+    "get_project_name",
+    "get_version",
+    "get_computation_backend",
+    "filter_links",
+    "Page",
+    "PageCache",
+    "collect_links",
+]
+
+BASE = "https://download.pytorch.org/whl/"
+CHUNK_SIZE = 64 * 1024
+
+JSON_CONTENT_TYPE = "application/vnd.pypi.simple.v1+json"
+# See https://peps.python.org/pep-0691/#version-format-selection
+ACCEPT = ", ".join(
+    (
+        JSON_CONTENT_TYPE,
+        "application/vnd.pypi.simple.v1+html;q=0.2",
+        "text/html;q=0.01",
+    )
+)
+HEADERS = {"Accept": ACCEPT, "Cache-Control": "max-age=0"}
+
+
+def make_url(
+    computation_backend: ComputationBackend, nightly: bool, base: str = BASE
+) -> str:
+    url = (
+        f"nightly/{computation_backend}/torch_nightly.html"
+        if nightly
+        else "torch_stable.html"
+    )
+    return urljoin(base, url)
+
+
+def fetch(url: str, session: Optional[PipSession] = None) -> str:
+    if session is None:
+        session = PipSession()
+
+    response = session.get(url, headers={"Cache-Control": "max-age=0"})
+    response.raise_for_status()
+    return str(response.text)
+
+
+class LinkParser(HTMLParser):
+    def __init__(self, url: str) -> None:
+        super().__init__()
+        self.url = url
+        self.links: List[Link] = []
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if tag != "a":
+            return
+
+        attrs_: Dict[str, Optional[str]] = dict(attrs)
+        href = attrs_.get("href")
+        if not href:
+            return
+
+        self.links.append(
+            Link(
+                urljoin(self.url, href),
+                comes_from=self.url,
+                requires_python=attrs_.get("data-requires-python"),
+            )
+        )
+
+    def pop(self) -> List[Link]:
+        links = self.links
+        self.links = []
+        return links
+
+
+def parse(content: str, url: str) -> List[Link]:
+    parser = LinkParser(url)
+    parser.feed(content)
+    parser.close()
+    return parser.pop()
+
+
+def parse_json(content: str, url: str) -> List[Link]:
+    files = json.loads(content).get("files", [])
+    links = []
+    for file in files:
+        href = file.get("url")
+        if not href:
+            continue
+
+        # pip only understands hashes that are encoded in the URL fragment.
+        href, _, _ = href.partition("#")
+        hashes = file.get("hashes") or {}
+        for name in ("sha256", "sha384", "sha512", "md5"):
+            if name in hashes:
+                href = f"{href}#{name}={hashes[name]}"
+                break
+
+        yanked: Any = file.get("yanked")
+        links.append(
+            Link(
+                urljoin(url, href),
+                comes_from=url,
+                requires_python=file.get("requires-python"),
+                yanked_reason=(
+                    yanked if isinstance(yanked, str) else ("" if yanked else None)
+                ),
+            )
+        )
+    return links
+
+
+def is_json(response: Any) -> bool:
+    content_type = response.headers.get("Content-Type", "")
+    return str(content_type).split(";", 1)[0].strip().lower() == JSON_CONTENT_TYPE
+
+
+def fetch_links(url: str, session: Optional[PipSession] = None) -> List[Link]:
+    if session is None:
+        session = PipSession()
+
+    response = session.get(url, headers=HEADERS)
+    response.raise_for_status()
+    content = str(response.text)
+    return parse_json(content, url) if is_json(response) else parse(content, url)
+
+
+def iter_links(
+    url: str,
+    session: Optional[PipSession] = None,
+    chunk_size: int = CHUNK_SIZE,
+    run: Optional[metrics.Run] = None,
+) -> Iterator[Link]:
+    if session is None:
+        session = PipSession()
+    if run is None:
+        run = metrics.Run()
+
+    parser = LinkParser(url)
+    with session.get(url, headers=HEADERS, stream=True) as response:
+        response.raise_for_status()
+        # JSON cannot be parsed incrementally with the standard library, but it is
+        # still a lot cheaper to decode than HTML.
+        if is_json(response):
+            content = b"".join(response.iter_content(chunk_size))
+            run.increment("index_bytes", len(content))
+            yield from parse_json(content.decode(response.encoding or "utf-8"), url)
+            return
+
+        decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(
+            errors="replace"
+        )
+        for chunk in response.iter_content(chunk_size):
+            run.increment("index_bytes", len(chunk))
+            parser.feed(decoder.decode(chunk))
+            yield from parser.pop()
+
+        parser.feed(decoder.decode(b"", final=True))
+        parser.close()
+        yield from parser.pop()
+
+
+def get_project_name(link: Link) -> str:
+    return canonicalize_name(link.filename.split("-", 1)[0])
+
+
+def get_version(link: Link) -> Optional[str]:
+    parts = link.filename.split("-")
+    return parts[1] if len(parts) > 2 else None
+
+
+LOCAL_PATTERN = re.compile(r"[+](?P<computation_backend>cpu|cu\d+)$")
+PATH_PATTERN = re.compile(r"/(?P<computation_backend>cpu|cu\d+)/[^/]+$")
+
+
+def get_computation_backend(link: Link) -> Optional[str]:
+    version = get_version(link)
+    match = LOCAL_PATTERN.search(version) if version is not None else None
+    if match is None:
+        match = PATH_PATTERN.search(link.path)
+    return match.group("computation_backend") if match is not None else None
+
+
+def make_matcher(
+    project_name: str,
+    computation_backend: ComputationBackend,
+    tags: Optional[Sequence[Tag]] = None,
+    specifier: Optional[BaseSpecifier] = None,
+) -> Callable[[Link], bool]:
+    project_name = canonicalize_name(project_name)
+
+    def matches(link: Link) -> bool:
+        if get_project_name(link) != project_name:
+            return False
+
+        link_computation_backend = get_computation_backend(link)
+        if (
+            link_computation_backend is not None
+            and link_computation_backend != computation_backend
+        ):
+            return False
+
+        if tags is not None and link.is_wheel:
+            try:
+                if not Wheel(link.filename).supported(tags):
+                    return False
+            except InvalidWheelFilename:
+                return False
+
+        if specifier is None:
+            return True
+
+        version = get_version(link)
+        return version is not None and specifier.contains(version, prereleases=True)
+
+    return matches
+
+
+def filter_links(
+    links: Iterable[Link],
+    project_name: str,
+    computation_backend: ComputationBackend,
+    tags: Optional[Sequence[Tag]] = None,
+) -> List[Link]:
+    matches = make_matcher(project_name, computation_backend, tags=tags)
+    return [link for link in links if matches(link)]
+
+
+class Page:
+    def __init__(
+        self,
+        url: str,
+        session: Optional[PipSession] = None,
+        run: Optional[metrics.Run] = None,
+    ) -> None:
+        self.url = url
+        self.complete = False
+        self.failed = False
+        self._links = iter_links(url, session=session, run=run)
+        self._buckets: Dict[str, List[Link]] = {}
+
+    def _parse_next(self) -> None:
+        try:
+            link = next(self._links)
+        except StopIteration:
+            self.complete = True
+            return
+        except BaseException:
+            self.failed = True
+            raise
+        self._buckets.setdefault(get_project_name(link), []).append(link)
+
+    def iter_links(self, project_name: str) -> Iterator[Link]:
+        # The page is only parsed as far as the callers consume it. The links of
+        # other projects that are parsed along the way are kept for later calls.
+        project_name = canonicalize_name(project_name)
+        idx = 0
+        while True:
+            bucket = self._buckets.get(project_name, ())
+            if idx < len(bucket):
+                yield bucket[idx]
+                idx += 1
+            elif self.complete:
+                return
+            else:
+                self._parse_next()
+
+
+class PageCache:
+    def __init__(self) -> None:
+        self._pages: Dict[str, Page] = {}
+
+    def get(
+        self,
+        url: str,
+        session: Optional[PipSession] = None,
+        run: Optional[metrics.Run] = None,
+    ) -> Page:
+        page = self._pages.get(url)
+        # A page that failed halfway cannot be resumed. Thus, it is fetched again.
+        if page is None or page.failed:
+            page = self._pages[url] = Page(url, session=session, run=run)
+        return page
+
+
+def collect_links(
+    url: str,
+    session: PipSession,
+    project_name: str,
+    computation_backend: ComputationBackend,
+    specifier: Optional[BaseSpecifier] = None,
+    tags: Optional[Sequence[Tag]] = None,
+    run: Optional[metrics.Run] = None,
+    pages: Optional[PageCache] = None,
+) -> Tuple[List[Link], bool]:
+    if run is None:
+        run = metrics.Run()
+
+    # Stopping early is only safe if we know which wheels are supported. Otherwise,
+    # the supported ones might be listed after a run of unsupported ones.
+    pinned_specifier = specifier if tags is not None and is_pinned(specifier) else None
+    matches = make_matcher(
+        project_name, computation_backend, tags=tags, specifier=pinned_specifier
+    )
+
+    # The index is sorted. Thus, all distributions of a pinned version in the same
+    # directory are listed next to each other and we can stop as soon as we leave
+    # the groups that contained a match.
+    links: List[Link] = []
+    groups: Set[Tuple[str, str, Optional[str]]] = set()
+    seen = 0
+    complete = True
+    source = (
+        pages.get(url, session=session, run=run).iter_links(project_name)
+        if pages is not None
+        else iter_links(url, session=session, run=run)
+    )
+    for link in source:
+        seen += 1
+        group = (
+            posixpath.dirname(link.path),
+            get_project_name(link),
+            get_version(link),
+        )
+        if matches(link):
+            links.append(link)
+            groups.add(group)
+        elif pinned_specifier is not None and groups and group not in groups:
+            complete = False
+            break
+
+    run.increment("index_links_seen", seen)
+    run.increment("index_links_kept", len(links))
+    return links, complete
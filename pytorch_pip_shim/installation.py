@@ -0,0 +1,114 @@
+import sys
+from typing import List, NamedTuple, Optional
+
+from pip._internal.models.candidate import InstallationCandidate
+from pip._internal.models.link import Link
+from pip._internal.utils.urls import path_to_url
+from pip._vendor.packaging.specifiers import BaseSpecifier, SpecifierSet
+from pip._vendor.packaging.version import parse as parse_version
+
+from .computation_backend import ComputationBackend
+
+if sys.version_info >= (3, 8):
+    from importlib import metadata as importlib_metadata
+
+__all__ = [
+    "Distribution",
+    "get_distribution",
+    "is_pinned",
+    "find_installed_candidates",
+]
+
+
+class Distribution(NamedTuple):
+    project_name: str
+    version: str
+    location: str
+    egg_info: str
+
+
+def get_distribution(project_name: str) -> Optional[Distribution]:
+    # importlib.metadata is only available for Python>=3.8
+    if sys.version_info < (3, 8):  # pragma: no cover
+        return get_legacy_distribution(project_name)
+
+    try:
+        dist = importlib_metadata.distribution(project_name)
+    except importlib_metadata.PackageNotFoundError:
+        return None
+
+    # Only distributions installed into a directory have a location.
+    if not isinstance(dist, importlib_metadata.PathDistribution):
+        return None
+
+    return Distribution(
+        project_name=dist.metadata["Name"],
+        version=dist.version,
+        location=str(dist.locate_file("")),
+        egg_info=str(dist._path),
+    )
+
+
+def get_legacy_distribution(
+    project_name: str,
+) -> Optional[Distribution]:  # pragma: no cover
+    from pip._vendor import pkg_resources
+
+    try:
+        dist = pkg_resources.get_distribution(project_name)
+    except pkg_resources.DistributionNotFound:
+        return None
+
+    return Distribution(
+        project_name=dist.project_name,
+        version=dist.version,
+        location=dist.location,
+        egg_info=dist.egg_info,
+    )
+
+
+def is_pinned(specifier: Optional[BaseSpecifier]) -> bool:
+    if not isinstance(specifier, SpecifierSet):
+        return False
+
+    return any(
+        spec.operator in ("==", "===") and not spec.version.endswith(".*")
+        for spec in specifier
+    )
+
+
+def find_installed_candidates(
+    project_name: str,
+    specifier: Optional[BaseSpecifier],
+    computation_backend: ComputationBackend,
+    nightly: bool = False,
+    upgrade: bool = False,
+) -> Optional[List[InstallationCandidate]]:
+    dist = get_distribution(project_name)
+    if dist is None:
+        return None
+
+    version = parse_version(dist.version)
+    # Without a local specifier we cannot know for which computation backend the
+    # distribution was compiled. Thus, we only take the fast path if it is explicit.
+    if version.local is None or version.local != computation_backend:
+        return None
+
+    if version.is_prerelease and not nightly:
+        return None
+
+    if specifier is not None and not specifier.contains(str(version), prereleases=True):
+        return None
+
+    # While upgrading, only a pinned version guarantees that the index cannot offer
+    # anything newer.
+    if upgrade and not is_pinned(specifier):
+        return None
+
+    return [
+        InstallationCandidate(
+            name=dist.project_name,
+            version=str(version),
+            link=Link(path_to_url(dist.location)),
+        )
+    ]
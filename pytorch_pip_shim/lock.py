@@ -0,0 +1,84 @@
+import hashlib
+from typing import BinaryIO, Iterable, List, Optional, TextIO
+
+from pip._internal.models.candidate import InstallationCandidate
+from pip._internal.models.link import Link
+from pip._internal.network.session import PipSession
+from pip._internal.req.req_file import parse_requirements
+
+__all__ = [
+    "HashMismatchError",
+    "read_requirements",
+    "download",
+    "compute_hash",
+    "format_requirement",
+    "write",
+]
+
+HASH_NAME = "sha256"
+CHUNK_SIZE = 1024 * 1024
+
+
+class HashMismatchError(RuntimeError):
+    pass
+
+
+def read_requirements(file: str, session: Optional[PipSession] = None) -> List[str]:
+    if session is None:
+        session = PipSession()
+
+    return [
+        parsed_requirement.requirement
+        for parsed_requirement in parse_requirements(file, session)
+    ]
+
+
+def download(
+    link: Link, fh: Optional[BinaryIO] = None, session: Optional[PipSession] = None
+) -> str:
+    if session is None:
+        session = PipSession()
+
+    hash = hashlib.new(HASH_NAME)
+    with session.get(link.url_without_fragment, stream=True) as response:
+        response.raise_for_status()
+        for chunk in response.iter_content(CHUNK_SIZE):
+            hash.update(chunk)
+            if fh is not None:
+                fh.write(chunk)
+
+    digest = hash.hexdigest()
+    if link.hash_name == HASH_NAME and link.hash and link.hash != digest:
+        raise HashMismatchError(
+            f"The {HASH_NAME} hash of {link.url_without_fragment} does not match: "
+            f"expected {link.hash}, but got {digest}."
+        )
+    return digest
+
+
+def compute_hash(link: Link, session: Optional[PipSession] = None) -> str:
+    if link.hash_name == HASH_NAME and link.hash:
+        return link.hash
+
+    return download(link, session=session)
+
+
+def format_requirement(candidate: InstallationCandidate, hash: Optional[str]) -> str:
+    line = f"{candidate.name} @ {candidate.link.url_without_fragment}"
+    if hash is not None:
+        line += f" --hash={HASH_NAME}:{hash}"
+    return line
+
+
+def write(
+    fh: TextIO,
+    candidates: Iterable[InstallationCandidate],
+    hashes: bool = True,
+    session: Optional[PipSession] = None,
+) -> None:
+    if hashes and session is None:
+        session = PipSession()
+
+    for candidate in candidates:
+        hash = compute_hash(candidate.link, session=session) if hashes else None
+        fh.write(f"{format_requirement(candidate, hash)}\n")
@@ -0,0 +1,146 @@
+import concurrent.futures
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from pip._internal.index.package_finder import PackageFinder
+from pip._internal.models.candidate import InstallationCandidate
+from pip._internal.models.link import Link
+from pip._internal.network.session import PipSession
+from pip._vendor.packaging.requirements import Requirement
+from pip._vendor.packaging.utils import canonicalize_name
+
+from . import compatibility, index, installation
+from .computation_backend import ComputationBackend
+from .patch import PYTORCH_DISTRIBUTIONS, annotate_version, is_compatible
+from .resolution import make_finder
+from .utils import is_link_candidate
+
+__all__ = ["parse_requirement", "resolve_matrix"]
+
+
+def parse_requirement(requirement: str) -> Requirement:
+    req = Requirement(requirement)
+    req.name = canonicalize_name(req.name)
+    if req.name not in PYTORCH_DISTRIBUTIONS:
+        raise ValueError(f"{req.name} is not a PyTorch distribution.")
+    return req
+
+
+def evaluate_links(
+    finder: PackageFinder, project_name: str, links: Sequence[Link]
+) -> List[InstallationCandidate]:
+    link_evaluator = finder.make_link_evaluator(project_name)
+    candidates = []
+    for link in links:
+        is_candidate, result = link_evaluator.evaluate_link(link)
+        if not is_link_candidate(is_candidate):
+            continue
+
+        candidates.append(
+            InstallationCandidate(
+                name=project_name, version=annotate_version(link, result), link=link
+            )
+        )
+    return candidates
+
+
+def fetch_size(session: PipSession, link: Link) -> Optional[int]:
+    try:
+        response = session.head(link.url_without_fragment, allow_redirects=True)
+        response.raise_for_status()
+        return int(response.headers["content-length"])
+    except Exception:
+        return None
+
+
+def resolve_matrix(
+    requirements: Sequence[str],
+    computation_backends: Sequence[ComputationBackend],
+    nightly: bool = False,
+    session: Optional[PipSession] = None,
+    finder: Optional[PackageFinder] = None,
+    sizes: bool = True,
+    matrix: Optional[compatibility.Matrix] = None,
+) -> Dict[str, List[Dict[str, Any]]]:
+    if session is None:
+        session = PipSession()
+    if finder is None:
+        finder = make_finder(session=session, nightly=nightly)
+    if matrix is None:
+        matrix = compatibility.load()
+
+    reqs = [parse_requirement(requirement) for requirement in requirements]
+
+    urls = {
+        computation_backend: index.make_url(computation_backend, nightly)
+        for computation_backend in computation_backends
+    }
+
+    # The stable index is shared by all computation backends and the link evaluation
+    # does not depend on the computation backend. Thus, every page is only fetched,
+    # parsed, and evaluated once before the computation backends are resolved.
+    pages = sorted(set(urls.values()))
+    keys = [(url, req.name) for url in pages for req in reqs]
+
+    def fetch_links(url: str) -> List[Link]:
+        return index.fetch_links(url, session=session)
+
+    def evaluate(key: Tuple[str, str]) -> List[InstallationCandidate]:
+        url, project_name = key
+        return evaluate_links(finder, project_name, links[url])
+
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        links = dict(zip(pages, executor.map(fetch_links, pages)))
+        candidates = dict(zip(keys, executor.map(evaluate, keys)))
+
+    def resolve(computation_backend: ComputationBackend) -> List[Dict[str, Any]]:
+        pins: Dict[str, str] = {}
+        best_candidates: Dict[str, Optional[InstallationCandidate]] = {}
+        # The pinned requirements are resolved first, since they restrict the
+        # compatible versions of the other PyTorch distributions.
+        for req in sorted(
+            reqs, key=lambda req: not installation.is_pinned(req.specifier)
+        ):
+            available = [
+                candidate
+                for candidate in candidates[urls[computation_backend], req.name]
+                if is_compatible(candidate, computation_backend)
+            ]
+            # The matrix might be outdated. Thus, the candidates are only pruned if
+            # any of them is left.
+            available = [
+                candidate
+                for candidate in available
+                if matrix.is_compatible(pins, candidate.name, str(candidate.version))
+            ] or available
+            best_candidate = (
+                finder.make_candidate_evaluator(req.name, specifier=req.specifier)
+                .compute_best_candidate(available)
+                .best_candidate
+            )
+            if best_candidate is not None and installation.is_pinned(req.specifier):
+                pins[req.name] = str(best_candidate.version)
+            best_candidates[req.name] = best_candidate
+
+        results = []
+        for req in reqs:
+            best_candidate = best_candidates[req.name]
+            result: Dict[str, Any] = dict(
+                requirement=str(req), name=req.name, version=None, url=None, size=None
+            )
+            if best_candidate is not None:
+                link = best_candidate.link
+                result.update(
+                    version=str(best_candidate.version),
+                    url=link.url_without_fragment,
+                    size=fetch_size(session, link) if sizes else None,
+                )
+            results.append(result)
+        return results
+
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        return {
+            str(computation_backend): result
+            for computation_backend, result in zip(
+                computation_backends, executor.map(resolve, computation_backends)
+            )
+        }
@@ -0,0 +1,91 @@
+import functools
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Sequence
+
+from pip._internal.models.candidate import InstallationCandidate
+from pip._internal.models.link import Link
+from pip._internal.network.session import PipSession
+from pip._vendor.packaging.specifiers import BaseSpecifier
+from pip._vendor.packaging.utils import canonicalize_name
+
+from . import cache
+from .computation_backend import ComputationBackend
+
+__all__ = ["get_index_version", "make_key", "load", "store"]
+
+
+@functools.lru_cache(maxsize=None)
+def get_index_version(session: PipSession, url: str) -> Optional[str]:
+    try:
+        response = session.head(url, headers={"Cache-Control": "max-age=0"})
+        response.raise_for_status()
+    except Exception:
+        return None
+
+    for header in ("ETag", "Last-Modified"):
+        version = response.headers.get(header)
+        if version:
+            return str(version)
+    return None
+
+
+def make_key(
+    project_name: str,
+    specifier: Optional[BaseSpecifier],
+    tags: Sequence[str],
+    computation_backend: ComputationBackend,
+    url: str,
+    index_version: str,
+) -> str:
+    obj = [
+        canonicalize_name(project_name),
+        str(specifier) if specifier is not None else "",
+        list(tags),
+        str(computation_backend),
+        url,
+        index_version,
+    ]
+    return hashlib.sha256(json.dumps(obj).encode("utf-8")).hexdigest()
+
+
+def get_file(key: str) -> str:
+    return cache.get_dir("resolutions", f"{key}.json")
+
+
+def serialize(candidate: InstallationCandidate) -> Dict[str, Any]:
+    return dict(
+        name=candidate.name,
+        version=str(candidate.version),
+        url=candidate.link.url,
+        requires_python=candidate.link.requires_python,
+        yanked_reason=candidate.link.yanked_reason,
+    )
+
+
+def deserialize(obj: Dict[str, Any]) -> InstallationCandidate:
+    return InstallationCandidate(
+        name=obj["name"],
+        version=obj["version"],
+        link=Link(
+            obj["url"],
+            requires_python=obj["requires_python"],
+            # Entries written without it are treated as a cache miss by load().
+            yanked_reason=obj["yanked_reason"],
+        ),
+    )
+
+
+def load(key: str) -> Optional[List[InstallationCandidate]]:
+    objs = cache.load(get_file(key))
+    if objs is None:
+        return None
+
+    try:
+        return [deserialize(obj) for obj in objs]
+    except (KeyError, TypeError):
+        return None
+
+
+def store(key: str, candidates: Sequence[InstallationCandidate]) -> None:
+    cache.store(get_file(key), [serialize(candidate) for candidate in candidates])
@@ -0,0 +1,209 @@
+import contextlib
+import json
+import math
+import os
+import tempfile
+import time
+from os import path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from . import cache
+
+__all__ = [
+    "Run",
+    "is_enabled",
+    "get_file",
+    "record",
+    "load",
+    "percentile",
+    "summarize",
+    "hit_rates",
+    "to_openmetrics",
+    "write_textfile",
+]
+
+DISABLE_ENV_VAR = "PYTORCH_PIP_SHIM_NO_METRICS"
+PREFIX = "pytorch_pip_shim"
+QUANTILES = (0.5, 0.9, 0.99)
+MAX_SIZE = 1024 * 1024
+CACHES = ("installed", "memoization", "nightly_window", "daemon")
+
+
+class Run:
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.values: Dict[str, float] = {}
+        self.labels: Dict[str, str] = {}
+
+    def increment(self, name: str, value: float = 1.0) -> None:
+        self.values[name] = self.values.get(name, 0.0) + value
+
+    def label(self, name: str, value: Any) -> None:
+        self.labels[name] = str(value)
+
+    @contextlib.contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.increment(name, time.perf_counter() - start)
+
+    def finish(self) -> Dict[str, Any]:
+        values = dict(self.values, wall_seconds=time.perf_counter() - self.start)
+        return dict(time=time.time(), labels=dict(self.labels), values=values)
+
+
+def is_enabled() -> bool:
+    return not os.environ.get(DISABLE_ENV_VAR)
+
+
+def get_file() -> str:
+    return cache.get_dir("metrics.jsonl")
+
+
+def record(run: Run, file: Optional[str] = None, max_size: int = MAX_SIZE) -> None:
+    if not is_enabled():
+        return
+
+    if file is None:
+        file = get_file()
+    # A single short write to a file opened in append mode is not interleaved with
+    # the writes of concurrent runs. As for the cache, errors are never raised.
+    line = json.dumps(run.finish()) + "\n"
+    with contextlib.suppress(OSError):
+        os.makedirs(path.dirname(file), exist_ok=True)
+        with open(file, "a") as fh:
+            fh.write(line)
+        if os.stat(file).st_size > max_size:
+            truncate(file, max_size // 2)
+
+
+def truncate(file: str, size: int) -> None:
+    with open(file, "r") as fh:
+        lines = fh.readlines()
+
+    kept: List[str] = []
+    for line in reversed(lines):
+        size -= len(line)
+        if size < 0:
+            break
+        kept.append(line)
+
+    # Runs recorded concurrently while truncating might get lost. Since only the
+    # recent runs are of interest, this is acceptable.
+    fd, tmp = tempfile.mkstemp(dir=path.dirname(file), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as fh:
+            fh.writelines(reversed(kept))
+        os.replace(tmp, file)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+def load(
+    file: Optional[str] = None, last: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    if file is None:
+        file = get_file()
+
+    runs = []
+    with contextlib.suppress(OSError):
+        with open(file, "r") as fh:
+            for line in fh:
+                try:
+                    run = json.loads(line)
+                except ValueError:
+                    # A run might have been killed while writing its line.
+                    continue
+                if isinstance(run, dict) and isinstance(run.get("values"), dict):
+                    runs.append(run)
+
+    return runs[-last:] if last else runs
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    # nearest-rank method
+    values = sorted(values)
+    return values[max(math.ceil(q * len(values)) - 1, 0)]
+
+
+def collect_values(runs: Sequence[Dict[str, Any]]) -> Dict[str, List[float]]:
+    values: Dict[str, List[float]] = {}
+    for run in runs:
+        for name, value in run["values"].items():
+            if isinstance(value, (int, float)):
+                values.setdefault(name, []).append(float(value))
+    return values
+
+
+def summarize(runs: Sequence[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    return {
+        name: dict(
+            count=len(values),
+            sum=sum(values),
+            max=max(values),
+            **{f"p{int(q * 100)}": percentile(values, q) for q in QUANTILES},
+        )
+        for name, values in sorted(collect_values(runs).items())
+    }
+
+
+def hit_rates(runs: Sequence[Dict[str, Any]]) -> Dict[str, float]:
+    values = collect_values(runs)
+    rates = {}
+    for name in CACHES:
+        hits = sum(values.get(f"{name}_hits", []))
+        misses = sum(values.get(f"{name}_misses", []))
+        if hits + misses:
+            rates[name] = hits / (hits + misses)
+    return rates
+
+
+def to_openmetrics(runs: Sequence[Dict[str, Any]]) -> str:
+    lines = [
+        f"# HELP {PREFIX}_runs Number of recorded runs.",
+        f"# TYPE {PREFIX}_runs gauge",
+        f"{PREFIX}_runs {len(runs)}",
+    ]
+    for name, summary in summarize(runs).items():
+        metric = f"{PREFIX}_{name}"
+        lines.extend(
+            (
+                f"# HELP {metric} Per-run {name.replace('_', ' ')}.",
+                f"# TYPE {metric} summary",
+                *[
+                    f'{metric}{{quantile="{q}"}} {summary[f"p{int(q * 100)}"]}'
+                    for q in QUANTILES
+                ],
+                f"{metric}_sum {summary['sum']}",
+                f"{metric}_count {summary['count']}",
+            )
+        )
+    for name, rate in hit_rates(runs).items():
+        metric = f"{PREFIX}_{name}_hit_ratio"
+        lines.extend(
+            (
+                f"# HELP {metric} Hit ratio of the {name.replace('_', ' ')} lookups.",
+                f"# TYPE {metric} gauge",
+                f"{metric} {rate}",
+            )
+        )
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+def write_textfile(file: str, runs: Sequence[Dict[str, Any]]) -> None:
+    # The textfile collector of the node exporter might read the file at any time.
+    # Thus, it has to be replaced atomically.
+    dir = path.dirname(path.abspath(file))
+    fd, tmp = tempfile.mkstemp(dir=dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as fh:
+            fh.write(to_openmetrics(runs))
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, file)
+    except BaseException:
+        os.remove(tmp)
+        raise
@@ -0,0 +1,140 @@
+import concurrent.futures
+import time
+from typing import Callable, Dict, List, Optional, Sequence, TypeVar
+
+from pip._internal.network.session import PipSession
+from pip._vendor.requests import RequestException
+
+from . import cache
+
+__all__ = ["MirrorError", "probe", "load_scores", "store_scores", "Mirrors"]
+
+T = TypeVar("T")
+
+TIMEOUT = 2.0
+# Stored scores younger than this are trusted without probing the mirrors again.
+MAX_AGE = 10 * 60
+# Weight of the newest measurement in the moving average of the latency.
+ALPHA = 0.5
+
+
+class MirrorError(RuntimeError):
+    pass
+
+
+def probe(session: PipSession, base: str, timeout: float = TIMEOUT) -> Optional[float]:
+    start = time.perf_counter()
+    try:
+        response = session.head(
+            base, headers={"Cache-Control": "max-age=0"}, timeout=timeout
+        )
+    except (RequestException, OSError):
+        return None
+    latency = time.perf_counter() - start
+
+    # Some mirrors do not allow to list the base directory. As long as the server
+    # answers without an error on its side, we consider it healthy.
+    if response.status_code >= 500:
+        return None
+    return latency
+
+
+def get_file() -> str:
+    return cache.get_dir("mirrors.json")
+
+
+def load_scores() -> Dict[str, Dict[str, float]]:
+    obj = cache.load(get_file()) if cache.is_enabled() else None
+    if not isinstance(obj, dict):
+        return {}
+
+    return {
+        base: score
+        for base, score in obj.items()
+        if isinstance(score, dict) and {"latency", "time"} <= set(score)
+    }
+
+
+def store_scores(scores: Dict[str, Dict[str, float]]) -> None:
+    if cache.is_enabled():
+        cache.store(get_file(), scores)
+
+
+class Mirrors:
+    def __init__(self, bases: Sequence[str], timeout: float = TIMEOUT) -> None:
+        if not bases:
+            raise MirrorError("At least one index base is required.")
+
+        self.bases = list(dict.fromkeys(bases))
+        self.timeout = timeout
+        self._ranked: Optional[List[str]] = None
+
+    def _update(
+        self, latencies: Dict[str, Optional[float]]
+    ) -> Dict[str, Dict[str, float]]:
+        scores = load_scores()
+        now = time.time()
+        for base, latency in latencies.items():
+            # An unreachable mirror is penalized, but not banned forever, since it
+            # might only have been temporarily down.
+            measured = latency if latency is not None else 10 * self.timeout
+            old = scores.get(base)
+            if old is not None:
+                measured = ALPHA * measured + (1 - ALPHA) * old["latency"]
+            scores[base] = dict(latency=measured, time=now)
+        store_scores(scores)
+        return scores
+
+    def rank(self, session: PipSession) -> List[str]:
+        if self._ranked is not None:
+            return self._ranked
+
+        if len(self.bases) == 1:
+            self._ranked = list(self.bases)
+            return self._ranked
+
+        scores = load_scores()
+        now = time.time()
+        if all(
+            base in scores and now - scores[base]["time"] < MAX_AGE
+            for base in self.bases
+        ):
+            latencies = {base: scores[base]["latency"] for base in self.bases}
+            healthy = set(self.bases)
+        else:
+            with concurrent.futures.ThreadPoolExecutor(len(self.bases)) as executor:
+                probes = dict(
+                    zip(
+                        self.bases,
+                        executor.map(
+                            lambda base: probe(session, base, timeout=self.timeout),
+                            self.bases,
+                        ),
+                    )
+                )
+            scores = self._update(probes)
+            latencies = {base: scores[base]["latency"] for base in self.bases}
+            healthy = {base for base, latency in probes.items() if latency is not None}
+
+        # Unhealthy mirrors are still kept as a last resort.
+        self._ranked = sorted(
+            self.bases, key=lambda base: (base not in healthy, latencies[base])
+        )
+        return self._ranked
+
+    def fail(self, base: str) -> None:
+        if self._ranked is not None and base in self._ranked:
+            self._ranked.remove(base)
+            self._ranked.append(base)
+        self._update({base: None})
+
+    def call(self, session: PipSession, fn: Callable[[str], T]) -> T:
+        errors = []
+        for base in list(self.rank(session)):
+            try:
+                return fn(base)
+            except (RequestException, OSError) as error:
+                errors.append(f"{base}: {error}")
+                self.fail(base)
+
+        raise MirrorError("All PyTorch indices failed:\n{}".format("\n".join(errors)))
@@ -0,0 +1,106 @@
+import datetime
+import hashlib
+import json
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+from pip._internal.models.link import Link
+from pip._vendor.packaging.utils import canonicalize_name
+
+from . import cache
+from .index import get_version
+
+__all__ = ["get_dev_date", "apply_window", "make_key", "load", "store"]
+
+DEV_PATTERN = re.compile(r"[.]dev(?P<date>\d{8})")
+
+
+def get_dev_date(version: Optional[str]) -> Optional[datetime.date]:
+    if version is None:
+        return None
+
+    match = DEV_PATTERN.search(version)
+    if match is None:
+        return None
+
+    try:
+        return datetime.datetime.strptime(match.group("date"), "%Y%m%d").date()
+    except ValueError:
+        return None
+
+
+def apply_window(
+    links: Sequence[Link],
+    days: Optional[int] = None,
+    builds: Optional[int] = None,
+    today: Optional[datetime.date] = None,
+) -> List[Link]:
+    dates = {link: get_dev_date(get_version(link)) for link in links}
+    dev_dates = {date for date in dates.values() if date is not None}
+
+    min_dates = []
+    if days is not None:
+        if today is None:
+            today = datetime.date.today()
+        min_dates.append(today - datetime.timedelta(days=max(days - 1, 0)))
+    if builds is not None and dev_dates:
+        min_dates.append(sorted(dev_dates, reverse=True)[: max(builds, 1)][-1])
+
+    if not min_dates:
+        return list(links)
+
+    min_date = max(min_dates)
+
+    def is_recent(link: Link) -> bool:
+        date = dates[link]
+        # Links without a dev date, e.g. release candidates, cannot be judged by their
+        # age. Thus, they are always kept.
+        return date is None or date >= min_date
+
+    return [link for link in links if is_recent(link)]
+
+
+def make_key(
+    url: str,
+    project_name: str,
+    tags: Optional[Sequence[str]],
+    days: Optional[int],
+    builds: Optional[int],
+    today: datetime.date,
+) -> str:
+    obj = [
+        url,
+        canonicalize_name(project_name),
+        list(tags) if tags is not None else None,
+        days,
+        builds,
+        today.isoformat(),
+    ]
+    return hashlib.sha256(json.dumps(obj).encode("utf-8")).hexdigest()
+
+
+def get_file(key: str) -> str:
+    return cache.get_dir("nightly-window", f"{key}.json")
+
+
+def serialize(link: Link) -> Dict[str, Any]:
+    return dict(url=link.url, requires_python=link.requires_python)
+
+
+def deserialize(obj: Dict[str, Any]) -> Link:
+    return Link(obj["url"], requires_python=obj["requires_python"])
+
+
+def load(key: str) -> Optional[List[Link]]:
+    objs = cache.load(get_file(key))
+    if objs is None:
+        return None
+
+    try:
+        return [deserialize(obj) for obj in objs]
+    except (KeyError, TypeError):
+        return None
+
+
+def store(key: str, links: Sequence[Link]) -> None:
+    cache.store(get_file(key), [serialize(link) for link in links])
@@ -1,24 +1,70 @@
 import contextlib
+import datetime
 import functools
+import logging
 import optparse
 import re
 import sys
-from typing import Any, Callable, Dict, Iterator, List, Optional, Text, Tuple, cast
+from types import SimpleNamespace
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Text,
+    Tuple,
+    cast,
+)
 from unittest import mock
-from urllib.parse import urljoin
 
 from pip._internal.index.collector import LinkCollector
+from pip._internal.index.package_finder import BestCandidateResult, PackageFinder
 from pip._internal.models.candidate import InstallationCandidate
 from pip._internal.models.link import Link
 from pip._internal.models.search_scope import SearchScope
+from pip._internal.models.target_python import TargetPython
 from pip._internal.req.req_uninstall import UninstallPathSet
-
-from . import shim
-from .computation_backend import ComputationBackend
-from .utils import apply_patch, computation_backend_options, parse_pip_args
+from pip._internal.utils.hashes import Hashes
+from pip._vendor.packaging.specifiers import BaseSpecifier
+from pip._vendor.packaging.tags import Tag
+from pip._vendor.packaging.utils import canonicalize_name
+
+from . import (
+    audit,
+    cache,
+    compatibility,
+    daemon,
+    findlinks,
+    index,
+    installation,
+    memoization,
+    metrics,
+    mirrors,
+    nightly_window,
+    preflight,
+    shim,
+    trace,
+    uninstallation,
+)
+from .computation_backend import ComputationBackend, detect
+from .utils import (
+    apply_patch,
+    computation_backend_options,
+    is_link_candidate,
+    mirror_options,
+    nightly_window_options,
+    parse_pip_args,
+    preflight_options,
+)
 
 __all__ = ["patch"]
 
+logger = logging.getLogger(__name__)
+
 PATCHED_SUB_CMDS = ("install", "uninstall")
 PYTORCH_DISTRIBUTIONS = ("torch", "torchvision", "torchaudio", "torchtext")
 
@@ -29,27 +75,141 @@ def patch(pip_main: Callable[..., int]) -> Callable[..., int]:
         if args is None:
             args = sys.argv[1:]
 
-        with apply_patches(args):
+        with contextlib.ExitStack() as stack:
+            if trace.is_enabled():
+                stack.enter_context(trace.span("pip", args=" ".join(args)))
+            try:
+                stack.enter_context(apply_patches(args))
+            except preflight.PreflightError as error:
+                sys.stderr.write(f"ERROR: {error}\n")
+                return 1
             return pip_main(args=args)
 
     return shim
 
 
+def detect_computation_backend(
+    run: Optional[metrics.Run] = None,
+) -> ComputationBackend:
+    if run is None:
+        run = metrics.Run()
+
+    with run.timer("detection_seconds"):
+        computation_backend = daemon.detect()
+        source = "daemon"
+        if computation_backend is None:
+            computation_backend = detect()
+            source = "nvcc"
+    run.label("detection_source", source)
+    return computation_backend
+
+
 @contextlib.contextmanager
 def apply_patches(args: List[str]) -> Iterator[contextlib.ExitStack]:
-    args = parse_pip_args(args)
+    run = metrics.Run()
+    command = args[0] if args else ""
+    run.label("command", command)
+    args = parse_pip_args(
+        args, detect=functools.partial(detect_computation_backend, run=run)
+    )
+    run.label("computation_backend", args.computation_backend)
+    index_mirrors = mirrors.Mirrors(args.pytorch_mirrors or (index.BASE,))
+    audit_log = audit.Audit.from_env()
+    pages = index.PageCache()
 
     with contextlib.ExitStack() as stack:
+        # Only the installations are of interest for the metrics.
+        if command == "install":
+            stack.callback(metrics.record, run)
+        prefetched = run_preflight(args, index_mirrors, run=run, pages=pages)
+        if audit_log is not None:
+            stack.callback(audit_log.write)
         stack.enter_context(patch_cli_options())
         stack.enter_context(
-            patch_link_collection(args.computation_backend, args.nightly)
+            patch_link_collection(
+                args.computation_backend,
+                args.nightly,
+                index_mirrors=index_mirrors,
+                nightly_window_days=args.nightly_window_days,
+                nightly_window_builds=args.nightly_window_builds,
+                run=run,
+                prefetched=prefetched,
+                pages=pages,
+            )
+        )
+        stack.enter_context(patch_link_evaluation(run=run, audit_log=audit_log))
+        stack.enter_context(
+            patch_candidate_selection(
+                args.computation_backend, run=run, audit_log=audit_log
+            )
+        )
+        stack.enter_context(patch_candidate_pruning(run=run, audit_log=audit_log))
+        stack.enter_context(
+            patch_candidate_lookup(
+                args.computation_backend,
+                args.nightly,
+                index_mirrors=index_mirrors,
+                upgrade=args.upgrade,
+                force_reinstall=args.force_reinstall,
+                nightly_window_days=args.nightly_window_days,
+                nightly_window_builds=args.nightly_window_builds,
+                run=run,
+            )
         )
-        stack.enter_context(patch_link_evaluation())
-        stack.enter_context(patch_candidate_selection(args.computation_backend))
         stack.enter_context(patch_self_uninstallation())
+        stack.enter_context(patch_pytorch_uninstallation())
         yield stack
 
 
+def run_preflight(
+    args: SimpleNamespace,
+    index_mirrors: mirrors.Mirrors,
+    run: Optional[metrics.Run] = None,
+    pages: Optional[index.PageCache] = None,
+) -> preflight.Links:
+    # With a custom target, the tags of the running interpreter are meaningless.
+    # Without an index, the installation must not reach out to the network.
+    if not args.pytorch_preflight or args.custom_target or args.no_index:
+        return {}
+
+    requirements = [
+        requirement
+        for requirement in preflight.get_requirements(
+            args.requirements, PYTORCH_DISTRIBUTIONS
+        )
+        if args.force_reinstall
+        or installation.find_installed_candidates(
+            canonicalize_name(requirement.name),
+            requirement.specifier,
+            args.computation_backend,
+            nightly=args.nightly,
+            upgrade=args.upgrade,
+        )
+        is None
+    ]
+    try:
+        return preflight.check_requirements(
+            requirements,
+            args.computation_backend,
+            args.nightly,
+            TargetPython().get_tags(),
+            index_mirrors=index_mirrors,
+            session=preflight.make_session(
+                proxy=args.proxy,
+                cert=args.cert,
+                client_cert=args.client_cert,
+                trusted_hosts=args.trusted_hosts,
+                timeout=args.timeout,
+                retries=args.retries,
+            ),
+            run=run,
+            pages=pages,
+        )
+    except mirrors.MirrorError:
+        # If the index is not reachable, pip will report that in more detail.
+        return {}
+
+
 @contextlib.contextmanager
 def patch_cli_options() -> Iterator[None]:
     def postprocessing(
@@ -57,7 +217,12 @@ def patch_cli_options() -> Iterator[None]:
     ) -> None:
         (cmd_opts,) = args
 
-        for option in computation_backend_options():
+        for option in (
+            *computation_backend_options(),
+            *nightly_window_options(),
+            *mirror_options(),
+            *preflight_options(),
+        ):
             cmd_opts.add_option(option)
 
     with apply_patch(
@@ -69,60 +234,281 @@ def patch_cli_options() -> Iterator[None]:
 
 @contextlib.contextmanager
 def patch_link_collection(
-    computation_backend: ComputationBackend, nightly: bool
+    computation_backend: ComputationBackend,
+    nightly: bool,
+    index_mirrors: Optional[mirrors.Mirrors] = None,
+    nightly_window_days: Optional[int] = None,
+    nightly_window_builds: Optional[int] = None,
+    run: Optional[metrics.Run] = None,
+    prefetched: Optional[preflight.Links] = None,
+    pages: Optional[index.PageCache] = None,
 ) -> Iterator[None]:
-    base = "https://download.pytorch.org/whl/"
-    url = (
-        f"nightly/{computation_backend}/torch_nightly.html"
-        if nightly
-        else "torch_stable.html"
+    if index_mirrors is None:
+        index_mirrors = mirrors.Mirrors((index.BASE,))
+    if run is None:
+        run = metrics.Run()
+    if prefetched is None:
+        prefetched = {}
+    # All PyTorch distributions are listed on the same page. Thus, it is only fetched
+    # and parsed once per run and every project is served from its own bucket.
+    if pages is None:
+        pages = index.PageCache()
+    search_scope = SearchScope.create([], [])
+    local_indices: Dict[str, Optional[findlinks.Index]] = {}
+    requests: Dict[str, Tuple[Optional[BaseSpecifier], List[Tag]]] = {}
+    windowed = nightly and (
+        nightly_window_days is not None or nightly_window_builds is not None
     )
-    search_scope = SearchScope.create([urljoin(base, url)], [])
+
+    def collect_windowed_links(
+        url: str, session: Any, project_name: str, tags: Optional[List[Tag]]
+    ) -> List[Link]:
+        today = datetime.date.today()
+        key = nightly_window.make_key(
+            url,
+            project_name,
+            [str(tag) for tag in tags] if tags is not None else None,
+            nightly_window_days,
+            nightly_window_builds,
+            today,
+        )
+        if cache.is_enabled():
+            links = nightly_window.load(key)
+            if links is not None:
+                run.increment("nightly_window_hits")
+                return links
+            run.increment("nightly_window_misses")
+
+        links, _ = index.collect_links(
+            url,
+            session,
+            project_name,
+            computation_backend,
+            tags=tags,
+            run=run,
+            pages=pages,
+        )
+        links = nightly_window.apply_window(
+            links,
+            days=nightly_window_days,
+            builds=nightly_window_builds,
+            today=today,
+        )
+        if cache.is_enabled():
+            nightly_window.store(key, links)
+        return links
 
     @contextlib.contextmanager
-    def context(args: Tuple[LinkCollector, str], kwargs: Any) -> Iterator[None]:
-        self, project_name, *_ = args
+    def find_context(args: Tuple[Any, ...], kwargs: Any) -> Iterator[None]:
+        self, project_name, *other_args = args
         if project_name not in PYTORCH_DISTRIBUTIONS:
             yield
             return
 
-        with mock.patch.object(self, "search_scope", search_scope):
+        specifier = other_args[0] if other_args else kwargs.get("specifier")
+        requests[project_name] = (specifier, self.target_python.get_tags())
+        try:
+            yield
+        finally:
+            del requests[project_name]
+            # If the links were collected for a pinned version, pip must not reuse
+            # the candidates for other requirements of the same project.
+            if installation.is_pinned(specifier):
+                cache_clear = getattr(
+                    PackageFinder.find_all_candidates, "cache_clear", None
+                )
+                if cache_clear is not None:
+                    cache_clear()
+
+    def get_local_indices(find_links: List[str]) -> Dict[str, findlinks.Index]:
+        indices = {}
+        for location in find_links:
+            if location not in local_indices:
+                local_indices[location] = findlinks.load_location(location)
+            local_index = local_indices[location]
+            if local_index is not None:
+                indices[location] = local_index
+        return indices
+
+    def collect_local_links(
+        self: LinkCollector,
+        project_name: str,
+        computation_backend: Optional[ComputationBackend] = None,
+    ) -> List[Link]:
+        links = [
+            link
+            for local_index in get_local_indices(self.search_scope.find_links).values()
+            for link in local_index.get_links(
+                canonicalize_name(project_name), computation_backend
+            )
+        ]
+        run.increment("local_links", len(links))
+        return links
+
+    @contextlib.contextmanager
+    def collect_context(args: Tuple[LinkCollector, str], kwargs: Any) -> Iterator[None]:
+        self, project_name, *_ = args
+        if project_name in PYTORCH_DISTRIBUTIONS:
+            with mock.patch.object(self, "search_scope", search_scope):
+                yield
+            return
+
+        # pip would list and parse every file of an indexed directory. Instead, only
+        # the links of the project are added afterwards.
+        indices = get_local_indices(self.search_scope.find_links)
+        if not indices:
+            yield
+            return
+
+        find_links = [
+            location
+            for location in self.search_scope.find_links
+            if location not in indices
+        ]
+        with mock.patch.object(self.search_scope, "find_links", find_links):
             yield
 
+    def collect_postprocessing(
+        args: Tuple[LinkCollector, str], kwargs: Any, output: Any
+    ) -> Any:
+        self, project_name, *_ = args
+        if project_name not in PYTORCH_DISTRIBUTIONS:
+            if not get_local_indices(self.search_scope.find_links):
+                return output
+
+            return type(output)(
+                files=[*output.files, *collect_local_links(self, project_name)],
+                find_links=output.find_links,
+                project_urls=output.project_urls,
+            )
+
+        local_links = collect_local_links(self, project_name, computation_backend)
+        specifier, tags = requests.get(project_name, (None, None))
+
+        def collect_links(base: str) -> List[Link]:
+            run.label("index_mirror", base)
+            url = index.make_url(computation_backend, nightly, base=base)
+            # An explicitly pinned nightly is always honored, regardless of its age.
+            if windowed and not installation.is_pinned(specifier):
+                return collect_windowed_links(url, self.session, project_name, tags)
+
+            # The preflight already collected the links for the running interpreter.
+            links = prefetched.get((url, project_name))
+            if links is not None:
+                return links
+
+            links = daemon.collect_links(
+                url, project_name, computation_backend, tags=tags
+            )
+            if links is not None:
+                run.increment("daemon_hits")
+                return links
+            run.increment("daemon_misses")
+
+            links, _ = index.collect_links(
+                url,
+                self.session,
+                project_name,
+                computation_backend,
+                specifier=specifier,
+                tags=tags,
+                run=run,
+                pages=pages,
+            )
+            return links
+
+        with run.timer("index_fetch_seconds"):
+            try:
+                links = index_mirrors.call(self.session, collect_links)
+            except mirrors.MirrorError as error:
+                # Offline builds can still succeed from an indexed local directory.
+                # Otherwise, pip will report the missing distribution in more detail.
+                if not local_links:
+                    logger.warning(str(error))
+                links = []
+        return type(output)(files=local_links, find_links=links, project_urls=[])
+
     with apply_patch(
+        "pip._internal.index.package_finder.PackageFinder.find_best_candidate",
+        context=find_context,
+    ), apply_patch(
         "pip._internal.index.collector.LinkCollector.collect_links",
-        context=context,  # type: ignore[arg-type]
+        context=collect_context,  # type: ignore[arg-type]
+        postprocessing=collect_postprocessing,  # type: ignore[arg-type]
     ):
         yield
 
 
-@contextlib.contextmanager
-def patch_link_evaluation() -> Iterator[None]:
-    HAS_LOCAL_PATTERN = re.compile(r"[+](cpu|cu\d+)$")
-    COMPUTATION_BACKEND_PATTERN = re.compile(
-        r"^/whl/(?P<computation_backend>(cpu|cu\d+))/"
+HAS_LOCAL_PATTERN = re.compile(r"[+](cpu|cu\d+)$")
+COMPUTATION_BACKEND_PATTERN = re.compile(
+    r"/(?P<computation_backend>(cpu|cu\d+))/[^/]+$"
+)
+
+
+def annotate_version(link: Link, version: Text) -> Text:
+    has_local = HAS_LOCAL_PATTERN.search(version) is not None
+    if has_local:
+        return version
+
+    computation_backend = COMPUTATION_BACKEND_PATTERN.search(link.path)
+    if not computation_backend:
+        return version
+
+    return f"{version}+{computation_backend.group('computation_backend')}"
+
+
+def audit_link(
+    audit_log: audit.Audit,
+    self: Any,
+    link: Link,
+    output: Tuple[Any, Optional[Text]],
+    version: Optional[Text],
+) -> None:
+    is_candidate, result = output
+    if not is_link_candidate(is_candidate):
+        decision, reason = "rejected", str(result)
+    elif version != result:
+        decision, reason = "annotated", "computation backend from the path"
+    elif HAS_LOCAL_PATTERN.search(cast(Text, result)):
+        decision, reason = "kept", "computation backend from the version"
+    else:
+        decision, reason = "kept", "no computation backend"
+    audit_log.record(
+        "link",
+        getattr(self, "project_name", None),
+        index.get_computation_backend(link),
+        decision,
+        reason,
+        link.url,
+        version=version,
     )
 
+
+@contextlib.contextmanager
+def patch_link_evaluation(
+    run: Optional[metrics.Run] = None, audit_log: Optional[audit.Audit] = None
+) -> Iterator[None]:
+    if run is None:
+        run = metrics.Run()
+
     def postprocessing(
         args: Tuple[Any, Link],
         kwargs: Any,
-        output: Tuple[bool, Optional[Text]],
-    ) -> Tuple[bool, Optional[Text]]:
-        _, link = args
+        output: Tuple[Any, Optional[Text]],
+    ) -> Tuple[Any, Optional[Text]]:
+        self, link = args
         is_candidate, result = output
-        if not is_candidate:
-            return output
-
-        result = cast(Text, result)
-        has_local = HAS_LOCAL_PATTERN.search(result) is not None
-        if has_local:
-            return output
-
-        computation_backend = COMPUTATION_BACKEND_PATTERN.match(link.path)
-        if not computation_backend:
+        run.increment("links_evaluated")
+        if not is_link_candidate(is_candidate):
+            run.increment("links_rejected")
+            if audit_log is not None:
+                audit_link(audit_log, self, link, output, None)
             return output
 
-        return True, f"{result}+{computation_backend.group('computation_backend')}"
+        version = annotate_version(link, cast(Text, result))
+        if audit_log is not None:
+            audit_link(audit_log, self, link, output, version)
+        return is_candidate, version
 
     with apply_patch(
         "pip._internal.index.package_finder.LinkEvaluator.evaluate_link",
@@ -131,22 +517,67 @@ def patch_link_evaluation() -> Iterator[None]:
         yield
 
 
+def is_compatible(
+    candidate: InstallationCandidate, computation_backend: ComputationBackend
+) -> bool:
+    return (
+        candidate.name not in PYTORCH_DISTRIBUTIONS
+        or candidate.version.local is None
+        or candidate.version.local == computation_backend
+    )
+
+
+def audit_candidate(
+    audit_log: audit.Audit,
+    candidate: InstallationCandidate,
+    computation_backend: ComputationBackend,
+) -> None:
+    compatible = is_compatible(candidate, computation_backend)
+    local = candidate.version.local
+    if candidate.name not in PYTORCH_DISTRIBUTIONS:
+        reason = "no PyTorch distribution"
+    elif local is None:
+        reason = "no computation backend"
+    elif compatible:
+        reason = "matching computation backend"
+    else:
+        reason = f"other computation backend: {local} instead of {computation_backend}"
+    audit_log.record(
+        "candidate",
+        candidate.name,
+        local,
+        "kept" if compatible else "rejected",
+        reason,
+        candidate.link.url,
+        version=str(candidate.version),
+    )
+
+
 @contextlib.contextmanager
 def patch_candidate_selection(
     computation_backend: ComputationBackend,
+    run: Optional[metrics.Run] = None,
+    audit_log: Optional[audit.Audit] = None,
 ) -> Iterator[None]:
+    if run is None:
+        run = metrics.Run()
+
     def postprocessing(
         args: Any,
         kwargs: Any,
         output: List[InstallationCandidate],
     ) -> List[InstallationCandidate]:
-        return [
+        candidates = [
             candidate
             for candidate in output
-            if candidate.name not in PYTORCH_DISTRIBUTIONS
-            or candidate.version.local is None
-            or candidate.version.local == computation_backend
+            if is_compatible(candidate, computation_backend)
         ]
+        if audit_log is not None:
+            for candidate in output:
+                audit_candidate(audit_log, candidate, computation_backend)
+        run.increment("candidates_seen", len(output))
+        run.increment("candidates_kept", len(candidates))
+        return candidates
 
     with apply_patch(
         "pip._internal.index.package_finder.CandidateEvaluator.get_applicable_candidates",
@@ -155,6 +586,202 @@ def patch_candidate_selection(
         yield
 
 
+@contextlib.contextmanager
+def patch_candidate_pruning(
+    matrix: Optional[compatibility.Matrix] = None,
+    run: Optional[metrics.Run] = None,
+    audit_log: Optional[audit.Audit] = None,
+) -> Iterator[None]:
+    if matrix is None:
+        matrix = compatibility.load()
+    if run is None:
+        run = metrics.Run()
+    pins: Dict[str, str] = {}
+
+    def find_postprocessing(
+        args: Tuple[Any, ...], kwargs: Any, output: BestCandidateResult
+    ) -> BestCandidateResult:
+        _, project_name, *other_args = args
+        if project_name not in PYTORCH_DISTRIBUTIONS or output.best_candidate is None:
+            return output
+
+        specifier = other_args[0] if other_args else kwargs.get("specifier")
+        # Only a pin that could actually be satisfied is used for pruning. Otherwise,
+        # the resolver could not backtrack to the other distributions anymore.
+        if installation.is_pinned(specifier):
+            pins[project_name] = str(output.best_candidate.version)
+        return output
+
+    def select_postprocessing(
+        args: Any, kwargs: Any, output: List[InstallationCandidate]
+    ) -> List[InstallationCandidate]:
+        if not pins:
+            return output
+
+        candidates = []
+        pruned = []
+        for candidate in output:
+            if candidate.name not in PYTORCH_DISTRIBUTIONS or matrix.is_compatible(
+                pins, candidate.name, str(candidate.version)
+            ):
+                candidates.append(candidate)
+            else:
+                pruned.append(candidate)
+        # The matrix might be outdated. Rather than failing the resolution, we leave
+        # it to pip.
+        if not candidates:
+            return output
+
+        run.increment("candidates_pruned", len(pruned))
+        if audit_log is not None:
+            reason = "incompatible with: {}".format(
+                ", ".join(f"{name}=={version}" for name, version in pins.items())
+            )
+            for candidate in pruned:
+                audit_log.record(
+                    "candidate",
+                    candidate.name,
+                    candidate.version.local,
+                    "pruned",
+                    reason,
+                    candidate.link.url,
+                    version=str(candidate.version),
+                )
+        return candidates
+
+    with apply_patch(
+        "pip._internal.index.package_finder.PackageFinder.find_best_candidate",
+        postprocessing=find_postprocessing,
+    ), apply_patch(
+        "pip._internal.index.package_finder.CandidateEvaluator.get_applicable_candidates",
+        postprocessing=select_postprocessing,
+    ):
+        yield
+
+
+@contextlib.contextmanager
+def patch_candidate_lookup(
+    computation_backend: ComputationBackend,
+    nightly: bool,
+    index_mirrors: Optional[mirrors.Mirrors] = None,
+    upgrade: bool = False,
+    force_reinstall: bool = False,
+    nightly_window_days: Optional[int] = None,
+    nightly_window_builds: Optional[int] = None,
+    run: Optional[metrics.Run] = None,
+) -> Iterator[None]:
+    if index_mirrors is None:
+        index_mirrors = mirrors.Mirrors((index.BASE,))
+    if run is None:
+        run = metrics.Run()
+    windowed = nightly and (
+        nightly_window_days is not None or nightly_window_builds is not None
+    )
+
+    def find_installed_candidates(
+        finder: PackageFinder,
+        project_name: str,
+        specifier: Optional[BaseSpecifier] = None,
+        hashes: Optional[Hashes] = None,
+    ) -> Optional[List[InstallationCandidate]]:
+        if force_reinstall:
+            return None
+
+        return installation.find_installed_candidates(
+            project_name,
+            specifier,
+            computation_backend,
+            nightly=nightly,
+            upgrade=upgrade,
+        )
+
+    def make_key(
+        finder: PackageFinder,
+        project_name: str,
+        specifier: Optional[BaseSpecifier] = None,
+        hashes: Optional[Hashes] = None,
+    ) -> Optional[str]:
+        if hashes or not cache.is_enabled():
+            return None
+        # The windowed links depend on the current date and are already cached on
+        # their own.
+        if windowed and not installation.is_pinned(specifier):
+            return None
+        # The links from indexed --find-links directories are added to the candidates,
+        # but the contents of the directories are not covered by the key.
+        if any(findlinks.is_indexed(location) for location in finder.find_links):
+            return None
+
+        session = finder._link_collector.session
+        base, *_ = index_mirrors.rank(session)
+        url = index.make_url(computation_backend, nightly, base=base)
+        index_version = memoization.get_index_version(session, url)
+        if index_version is None:
+            return None
+
+        return memoization.make_key(
+            project_name,
+            specifier,
+            [str(tag) for tag in finder.target_python.get_tags()],
+            computation_backend,
+            url,
+            index_version,
+        )
+
+    @contextlib.contextmanager
+    def context(args: Tuple[PackageFinder, str], kwargs: Any) -> Iterator[None]:
+        self, project_name, *_ = args
+        if project_name not in PYTORCH_DISTRIBUTIONS:
+            yield
+            return
+
+        candidates = find_installed_candidates(*args, **kwargs)
+        if candidates is not None:
+            run.increment("installed_hits")
+        else:
+            run.increment("installed_misses")
+            key = make_key(*args, **kwargs)
+            if key is not None:
+                candidates = memoization.load(key)
+                run.increment(
+                    "memoization_hits"
+                    if candidates is not None
+                    else "memoization_misses"
+                )
+
+        if candidates is None:
+            yield
+            return
+
+        with mock.patch.object(self, "find_all_candidates", return_value=candidates):
+            yield
+
+    def postprocessing(
+        args: Tuple[PackageFinder, str], kwargs: Any, output: BestCandidateResult
+    ) -> BestCandidateResult:
+        project_name = args[1]
+        if (
+            project_name not in PYTORCH_DISTRIBUTIONS
+            or output.best_candidate is None
+            or find_installed_candidates(*args, **kwargs) is not None
+        ):
+            return output
+
+        key = make_key(*args, **kwargs)
+        if key is not None:
+            # The applicable candidates depend on what else was pinned during this
+            # run. Thus, all found candidates are stored and evaluated again.
+            memoization.store(key, list(output.iter_all()))
+        return output
+
+    with apply_patch(
+        "pip._internal.index.package_finder.PackageFinder.find_best_candidate",
+        context=context,  # type: ignore[arg-type]
+        postprocessing=postprocessing,  # type: ignore[arg-type]
+    ):
+        yield
+
+
 @contextlib.contextmanager
 def patch_self_uninstallation() -> Iterator[None]:
     def preprocessing(
@@ -163,6 +790,7 @@ def patch_self_uninstallation() -> Iterator[None]:
         self, *_ = args
         if self.dist.project_name == "pytorch-pip-shim":
             shim.remove()
+            shim.remove_hook()
         return args, kwargs
 
     with apply_patch(
@@ -170,3 +798,62 @@ def patch_self_uninstallation() -> Iterator[None]:
         preprocessing=preprocessing,
     ):
         yield
+
+
+@contextlib.contextmanager
+def patch_pytorch_uninstallation() -> Iterator[None]:
+    def is_pytorch_distribution(self: UninstallPathSet) -> bool:
+        return self.dist.project_name in PYTORCH_DISTRIBUTIONS
+
+    @contextlib.contextmanager
+    def remove_context(
+        args: Tuple[UninstallPathSet, ...], kwargs: Any
+    ) -> Iterator[None]:
+        self, *other_args = args
+        auto_confirm = other_args[0] if other_args else kwargs.get("auto_confirm")
+        # Without auto confirmation pip asks the user. Thus, we leave the listing of
+        # the files to pip and only speed up the non-interactive case.
+        if not (is_pytorch_distribution(self) and auto_confirm):
+            yield
+            return
+
+        owned_dirs = uninstallation.get_owned_dirs(self.dist)
+
+        def compress_for_rename(paths: Iterable[str]) -> Set[str]:
+            return uninstallation.compress_for_rename(paths, owned_dirs)
+
+        with mock.patch(
+            "pip._internal.req.req_uninstall.compress_for_rename",
+            new=compress_for_rename,
+        ):
+            yield
+
+    @contextlib.contextmanager
+    def commit_context(
+        args: Tuple[UninstallPathSet, ...], kwargs: Any
+    ) -> Iterator[None]:
+        self, *_ = args
+        if not is_pytorch_distribution(self):
+            yield
+            return
+
+        moved_paths = self._moved_paths
+
+        def commit() -> None:
+            uninstallation.remove_in_background(
+                [save_dir.path for save_dir in moved_paths._save_dirs.values()]
+            )
+            moved_paths._moves = []
+            moved_paths._save_dirs = {}
+
+        with mock.patch.object(moved_paths, "commit", new=commit):
+            yield
+
+    with apply_patch(
+        "pip._internal.req.req_uninstall.UninstallPathSet.remove",
+        context=remove_context,
+    ), apply_patch(
+        "pip._internal.req.req_uninstall.UninstallPathSet.commit",
+        context=commit_context,
+    ):
+        yield
@@ -0,0 +1,230 @@
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pip._internal.exceptions import InvalidWheelFilename
+from pip._internal.models.link import Link
+from pip._internal.models.wheel import Wheel
+from pip._internal.network.session import PipSession
+from pip._vendor.packaging.requirements import InvalidRequirement, Requirement
+from pip._vendor.packaging.specifiers import SpecifierSet
+from pip._vendor.packaging.tags import Tag
+from pip._vendor.packaging.utils import canonicalize_name
+from pip._vendor.packaging.version import InvalidVersion, Version
+
+from . import daemon, index, metrics, mirrors
+from .computation_backend import ComputationBackend
+
+__all__ = [
+    "PreflightError",
+    "get_requirements",
+    "check_requirement",
+    "make_session",
+    "check_requirements",
+]
+
+MAX_VERSIONS = 5
+# The preflight is only a convenience. Thus, it must not block the installation for
+# long if the index is slow to respond.
+TIMEOUT = 5.0
+
+Links = Dict[Tuple[str, str], List[Link]]
+
+
+class PreflightError(RuntimeError):
+    pass
+
+
+def get_requirements(
+    args: Iterable[str], project_names: Iterable[str]
+) -> List[Requirement]:
+    project_names = set(project_names)
+    requirements = []
+    # The positional arguments also contain the values of options we do not know,
+    # e.g. URLs or paths. They are either no valid requirement or do not name a
+    # PyTorch distribution.
+    for arg in args:
+        try:
+            requirement = Requirement(arg)
+        except InvalidRequirement:
+            continue
+
+        if (
+            canonicalize_name(requirement.name) not in project_names
+            or requirement.url
+            or (requirement.marker is not None and not requirement.marker.evaluate())
+        ):
+            continue
+
+        requirements.append(requirement)
+    return requirements
+
+
+def has_match(links: Iterable[Link], specifier: SpecifierSet) -> bool:
+    for link in links:
+        version = index.get_version(link)
+        if version is not None and specifier.contains(version, prereleases=True):
+            return True
+    return False
+
+
+def sort_versions(versions: Iterable[str]) -> List[str]:
+    def key(version: str) -> Tuple[int, Optional[Version], str]:
+        try:
+            return 1, Version(version), version
+        except InvalidVersion:
+            return 0, None, version
+
+    return sorted(set(versions), key=key)
+
+
+def is_supported(link: Link, tags: Sequence[Tag]) -> bool:
+    if not link.is_wheel:
+        return False
+    try:
+        return Wheel(link.filename).supported(tags)
+    except InvalidWheelFilename:
+        return False
+
+
+def get_available_versions(
+    links: Iterable[Link], project_name: str, tags: Sequence[Tag]
+) -> Dict[str, List[str]]:
+    available: Dict[str, List[str]] = {}
+    for link in links:
+        if index.get_project_name(link) != project_name or not is_supported(link, tags):
+            continue
+
+        version = index.get_version(link)
+        if version is None:
+            continue
+
+        computation_backend = index.get_computation_backend(link) or "any"
+        available.setdefault(computation_backend, []).append(version.split("+", 1)[0])
+    return {
+        computation_backend: sort_versions(versions)
+        for computation_backend, versions in sorted(available.items())
+    }
+
+
+def make_message(
+    requirement: Requirement,
+    computation_backend: ComputationBackend,
+    tags: Sequence[Tag],
+    url: str,
+    available: Dict[str, List[str]],
+) -> str:
+    lines = [
+        f"No wheel for '{requirement}' with the computation backend "
+        f"'{computation_backend}' and the interpreter tag '{tags[0]}' is available "
+        f"on {url}."
+    ]
+    if available:
+        lines.append("Available for this interpreter:")
+        for available_backend, versions in available.items():
+            shown = ", ".join(versions[-MAX_VERSIONS:])
+            if len(versions) > MAX_VERSIONS:
+                shown = f"..., {shown}"
+            lines.append(f"  {available_backend}: {shown}")
+    else:
+        lines.append(
+            f"No wheel for '{requirement.name}' is available for this interpreter."
+        )
+    lines.append(
+        "Choose another version or computation backend, or skip this check with "
+        "'--no-pytorch-preflight'."
+    )
+    return "\n".join(lines)
+
+
+def check_requirement(
+    requirement: Requirement,
+    links: Sequence[Link],
+    computation_backend: ComputationBackend,
+    tags: Sequence[Tag],
+    url: str,
+) -> List[Link]:
+    project_name = canonicalize_name(requirement.name)
+    candidates = index.filter_links(links, project_name, computation_backend, tags=tags)
+    if has_match(candidates, requirement.specifier):
+        return candidates
+
+    raise PreflightError(
+        make_message(
+            requirement,
+            computation_backend,
+            tags,
+            url,
+            get_available_versions(links, project_name, tags),
+        )
+    )
+
+
+def make_session(
+    proxy: Optional[str] = None,
+    cert: Optional[str] = None,
+    client_cert: Optional[str] = None,
+    trusted_hosts: Sequence[str] = (),
+    timeout: Optional[float] = None,
+    retries: Optional[int] = None,
+) -> PipSession:
+    # Mirrors how pip builds its own session from the network options
+    session = PipSession(
+        retries=retries if retries is not None else 0,
+        trusted_hosts=list(trusted_hosts),
+    )
+    if cert:
+        session.verify = cert
+    if client_cert:
+        session.cert = client_cert
+    if proxy:
+        session.proxies = {"http": proxy, "https": proxy}
+    if timeout is None:
+        timeout = TIMEOUT
+    # pip annotates the timeout as int, but assigns the float of --timeout itself.
+    session.timeout = timeout  # type: ignore[assignment]
+    return session
+
+
+def check_requirements(
+    requirements: Sequence[Requirement],
+    computation_backend: ComputationBackend,
+    nightly: bool,
+    tags: Sequence[Tag],
+    index_mirrors: Optional[mirrors.Mirrors] = None,
+    session: Optional[PipSession] = None,
+    run: Optional[metrics.Run] = None,
+    pages: Optional[index.PageCache] = None,
+) -> Links:
+    if index_mirrors is None:
+        index_mirrors = mirrors.Mirrors((index.BASE,))
+    if run is None:
+        run = metrics.Run()
+    if not requirements:
+        return {}
+    if session is None:
+        session = make_session()
+    # Sharing the pages with the link collection avoids fetching the index twice.
+    if pages is None:
+        pages = index.PageCache()
+
+    def check_all(base: str) -> Links:
+        url = index.make_url(computation_backend, nightly, base=base)
+        collected: Links = {}
+        for requirement in requirements:
+            project_name = canonicalize_name(requirement.name)
+            # The daemon only answers for the requested computation backend. Thus,
+            # we only need the complete index if we have to report the alternatives.
+            candidates = daemon.collect_links(
+                url, project_name, computation_backend, tags=tags
+            )
+            if candidates is None or not has_match(candidates, requirement.specifier):
+                links = list(
+                    pages.get(url, session=session, run=run).iter_links(project_name)
+                )
+                candidates = check_requirement(
+                    requirement, links, computation_backend, tags, url
+                )
+            collected[(url, project_name)] = candidates
+        return collected
+
+    with run.timer("preflight_seconds"):
+        return index_mirrors.call(session, check_all)
@@ -0,0 +1,293 @@
+import collections
+import contextlib
+import email.parser
+import inspect
+import tempfile
+import zipfile
+from email.message import Message
+from typing import (
+    Any,
+    Collection,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from pip._internal.index.collector import LinkCollector
+from pip._internal.index.package_finder import PackageFinder
+from pip._internal.models.candidate import InstallationCandidate
+from pip._internal.models.link import Link
+from pip._internal.models.search_scope import SearchScope
+from pip._internal.models.selection_prefs import SelectionPreferences
+from pip._internal.network.lazy_wheel import (
+    HTTPRangeRequestUnsupported,
+    LazyZipOverHTTP,
+)
+from pip._internal.network.session import PipSession
+from pip._vendor.packaging.requirements import Requirement
+from pip._vendor.packaging.specifiers import SpecifierSet
+from pip._vendor.packaging.utils import canonicalize_name
+
+from . import lock
+from .computation_backend import ComputationBackend
+from .installation import is_pinned
+from .patch import (
+    patch_candidate_pruning,
+    patch_candidate_selection,
+    patch_link_collection,
+    patch_link_evaluation,
+)
+
+__all__ = [
+    "ResolutionError",
+    "MetadataError",
+    "make_finder",
+    "patch_resolution",
+    "read_metadata",
+    "get_dependencies",
+    "resolve",
+]
+
+PYPI = "https://pypi.org/simple"
+
+
+class ResolutionError(RuntimeError):
+    def __init__(self, requirement: str, computation_backend: ComputationBackend):
+        super().__init__(
+            f"Unable to find a distribution for {requirement} that is compatible with "
+            f"the computation backend {computation_backend}"
+        )
+
+
+class MetadataError(RuntimeError):
+    pass
+
+
+def make_search_scope(
+    find_links: Sequence[str], index_urls: Sequence[str]
+) -> SearchScope:
+    kwargs = {}
+    # Starting with pip==22.3 the no_index flag is required.
+    if "no_index" in inspect.signature(SearchScope.create).parameters:
+        kwargs["no_index"] = False
+    return SearchScope.create(list(find_links), list(index_urls), **kwargs)
+
+
+def clear_caches() -> None:
+    # Starting with pip==20.3 the candidates are cached per finder. Since they
+    # depend on the patches, they must not leak into the next resolution, e.g. for
+    # another computation backend.
+    for fn in (PackageFinder.find_all_candidates, PackageFinder.find_best_candidate):
+        cache_clear = getattr(fn, "cache_clear", None)
+        if cache_clear is not None:
+            cache_clear()
+
+
+def make_finder(
+    session: Optional[PipSession] = None,
+    index_urls: Sequence[str] = (PYPI,),
+    find_links: Sequence[str] = (),
+    nightly: bool = False,
+) -> PackageFinder:
+    if session is None:
+        session = PipSession()
+
+    link_collector = LinkCollector(
+        session=session,
+        search_scope=make_search_scope(find_links, index_urls),
+    )
+    selection_prefs = SelectionPreferences(
+        allow_yanked=False, allow_all_prereleases=nightly
+    )
+    return PackageFinder.create(
+        link_collector=link_collector, selection_prefs=selection_prefs
+    )
+
+
+@contextlib.contextmanager
+def patch_resolution(
+    computation_backend: ComputationBackend, nightly: bool = False
+) -> Iterator[None]:
+    with patch_link_collection(
+        computation_backend, nightly
+    ), patch_link_evaluation(), patch_candidate_selection(
+        computation_backend
+    ), patch_candidate_pruning():
+        yield
+
+
+def read_metadata(link: Link, session: PipSession) -> Message:
+    if not link.is_wheel:
+        raise MetadataError(
+            f"Unable to read the metadata of {link.filename} without building it, "
+            f"since it is no wheel."
+        )
+
+    with contextlib.ExitStack() as stack:
+        file: Any
+        if link.scheme == "file":
+            file = link.file_path
+        else:
+            # Only the central directory and the METADATA file are fetched if the
+            # server supports range requests. Otherwise, the whole wheel is downloaded.
+            try:
+                file = stack.enter_context(
+                    LazyZipOverHTTP(link.url_without_fragment, session)
+                )
+            except HTTPRangeRequestUnsupported:
+                file = stack.enter_context(tempfile.TemporaryFile())
+                lock.download(link, file, session=session)
+                file.seek(0)
+
+        with zipfile.ZipFile(file) as wheel:
+            names = [
+                name
+                for name in wheel.namelist()
+                if name.count("/") == 1
+                and name.split("/")[0].endswith(".dist-info")
+                and name.endswith("/METADATA")
+            ]
+            if len(names) != 1:
+                raise MetadataError(f"Unable to find the METADATA of {link.filename}.")
+            content = wheel.read(names[0]).decode("utf-8")
+
+    return email.parser.Parser().parsestr(content)
+
+
+def get_dependencies(
+    candidate: InstallationCandidate,
+    session: PipSession,
+    extras: Collection[str] = (),
+) -> List[Requirement]:
+    metadata = read_metadata(candidate.link, session)
+    dependencies = []
+    for value in metadata.get_all("Requires-Dist") or []:
+        requirement = Requirement(value)
+        if requirement.marker is None or any(
+            requirement.marker.evaluate({"extra": extra}) for extra in ("", *extras)
+        ):
+            dependencies.append(requirement)
+    return dependencies
+
+
+def find_best_candidate(
+    finder: PackageFinder,
+    project_name: str,
+    specifier: SpecifierSet,
+    computation_backend: ComputationBackend,
+) -> InstallationCandidate:
+    result = finder.find_best_candidate(project_name, specifier)
+    if result.best_candidate is None:
+        raise ResolutionError(f"{project_name}{specifier}", computation_backend)
+
+    return result.best_candidate
+
+
+def resolve_dependencies(
+    finder: PackageFinder,
+    requirements: Sequence[Requirement],
+    computation_backend: ComputationBackend,
+) -> List[InstallationCandidate]:
+    session = finder._link_collector.session
+    # Every requirement is paired with the project that requires it. Top-level
+    # requirements are required by no project.
+    # The pinned requirements are resolved first. Thus, the candidate pruning already
+    # restricts the other PyTorch distributions to the compatible releases.
+    queue: Deque[Tuple[Optional[str], Requirement]] = collections.deque(
+        (None, requirement)
+        for requirement in sorted(
+            requirements, key=lambda requirement: not is_pinned(requirement.specifier)
+        )
+        if requirement.marker is None or requirement.marker.evaluate({"extra": ""})
+    )
+    candidates: Dict[str, InstallationCandidate] = {}
+    required: Dict[str, List[Tuple[Optional[str], Requirement]]] = {}
+
+    def drop_dependencies(parent: str) -> None:
+        # The dependencies of a replaced candidate no longer constrain the resolution.
+        remaining = [item for item in queue if item[0] != parent]
+        queue.clear()
+        queue.extend(remaining)
+        for project_name in list(required):
+            if project_name not in required:
+                continue
+
+            required[project_name] = [
+                item for item in required[project_name] if item[0] != parent
+            ]
+            if required[project_name]:
+                continue
+
+            # Projects that were only required by the replaced candidate are dropped
+            # together with their own dependencies.
+            del required[project_name]
+            if candidates.pop(project_name, None) is not None:
+                drop_dependencies(project_name)
+
+    # As pip's legacy resolver, a candidate is kept as long as it satisfies all
+    # requirements of its project. Otherwise, it is replaced without backtracking.
+    while queue:
+        parent, requirement = queue.popleft()
+        project_name = canonicalize_name(requirement.name)
+        project_requirements = required.setdefault(project_name, [])
+        requested_extras = {
+            extra for _, req in project_requirements for extra in req.extras
+        }
+        new_extras = set(requirement.extras) - requested_extras
+        requested_extras.update(new_extras)
+        project_requirements.append((parent, requirement))
+        specifier = SpecifierSet()
+        for _, req in project_requirements:
+            specifier &= req.specifier
+
+        candidate = candidates.get(project_name)
+        if candidate is None or not specifier.contains(
+            candidate.version, prereleases=True
+        ):
+            if candidate is not None:
+                drop_dependencies(project_name)
+                # In case of circular dependencies, the project might no longer be
+                # required at all.
+                if project_name not in required:
+                    continue
+
+            candidate = candidates[project_name] = find_best_candidate(
+                finder, project_name, specifier, computation_backend
+            )
+            queue.extend(
+                (project_name, dependency)
+                for dependency in get_dependencies(candidate, session, requested_extras)
+            )
+        elif new_extras:
+            queue.extend(
+                (project_name, dependency)
+                for dependency in get_dependencies(candidate, session, new_extras)
+            )
+
+    return list(candidates.values())
+
+
+def resolve(
+    requirements: Sequence[str],
+    computation_backend: ComputationBackend,
+    nightly: bool = False,
+    finder: Optional[PackageFinder] = None,
+    dependencies: bool = False,
+) -> List[InstallationCandidate]:
+    if finder is None:
+        finder = make_finder(nightly=nightly)
+
+    reqs = [Requirement(requirement) for requirement in requirements]
+    clear_caches()
+    with patch_resolution(computation_backend, nightly):
+        if dependencies:
+            return resolve_dependencies(finder, reqs, computation_backend)
+
+        return [
+            find_best_candidate(finder, req.name, req.specifier, computation_backend)
+            for req in reqs
+        ]
@@ -1,9 +1,19 @@
+import contextlib
+import hashlib
+import importlib.util
+import os
+import py_compile
+import shutil
+import sys
+import tempfile
 from os import path
-from typing import Optional
+from typing import Iterator, List, Optional
 
 import pip
 
-__all__ = ["insert", "remove"]
+from . import cache
+
+__all__ = ["insert", "remove", "insert_hook", "remove_hook", "is_hook_inserted"]
 
 
 IDENTIFIER = "# -*- pytorch-pip-shim -*-"
@@ -30,47 +40,172 @@ FILE = path.abspath(
     path.join(path.dirname(pip.__file__), "_internal", "cli", "main.py")
 )
 
+HOOK = path.abspath(path.join(path.dirname(__file__), "hook.py"))
+# The .pth file is placed next to pip, since it is only processed for the site
+# directory it lives in.
+PTH_FILE = path.abspath(
+    path.join(path.dirname(path.dirname(pip.__file__)), "pytorch-pip-shim.pth")
+)
+# Lines in a .pth file starting with 'import' are executed during the interpreter
+# startup. The hook is loaded from its file to avoid importing pytorch_pip_shim and thus
+# pip. If pytorch-pip-shim was removed without removing the hook, the line is a no-op.
+PTH_TEMPLATE = (
+    "import importlib.machinery, os; "
+    "loader = os.path.exists({hook!r}) "
+    "and importlib.machinery.SourceFileLoader('_pytorch_pip_shim_hook', {hook!r}); "
+    "module = loader and type(os)('_pytorch_pip_shim_hook'); "
+    "loader and (loader.exec_module(module) or module.install())\n"
+)
+
 
 def is_inserted(file: Optional[str] = None) -> bool:
     if file is None:
         file = FILE
 
+    # The shim is always inserted directly in front of the main function. Thus, we can
+    # stop reading as soon as we reach it.
     with open(file, "r") as fh:
-        return IDENTIFIER in fh.read()
+        for line in fh:
+            if IDENTIFIER in line:
+                return True
+            elif line.startswith("def main("):
+                return False
+    return False
+
+
+@contextlib.contextmanager
+def lock(file: str) -> Iterator[None]:
+    # The lock file is placed in the cache directory to not leave any files behind in
+    # the pip installation.
+    key = hashlib.sha256(path.abspath(file).encode("utf-8")).hexdigest()
+    lock_file = cache.get_dir("locks", f"{key}.lock")
+    os.makedirs(path.dirname(lock_file), exist_ok=True)
+    fd = os.open(lock_file, os.O_RDWR | os.O_CREAT, 0o666)
+    try:
+        if sys.platform.startswith("win"):
+            import msvcrt
+
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)  # type: ignore[attr-defined]
+            try:
+                yield
+            finally:
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)  # type: ignore[attr-defined]
+        else:
+            import fcntl
+
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
+
+def compile_bytecode(file: str) -> None:
+    # After the source changed, the cached bytecode is stale. We recompile it right away
+    # for the optimization levels that are used, so the next pip run does not have to.
+    levels = {0, sys.flags.optimize}
+    levels.update(
+        level
+        for level in (1, 2)
+        if path.exists(importlib.util.cache_from_source(file, optimization=level))
+    )
+    for level in sorted(levels):
+        try:
+            py_compile.compile(
+                file,
+                cfile=importlib.util.cache_from_source(
+                    file, optimization=level if level else ""
+                ),
+                doraise=True,
+                optimize=level,
+            )
+        except (py_compile.PyCompileError, OSError):
+            pass
+
+
+def write(file: str, content: List[str]) -> None:
+    # Concurrent pip runs must never see a partially written file. Thus, the new content
+    # is written to a temporary file next to the original and moved over it atomically.
+    fd, tmp = tempfile.mkstemp(
+        prefix=f".{path.basename(file)}.", dir=path.dirname(path.abspath(file))
+    )
+    try:
+        with os.fdopen(fd, "w") as fh:
+            fh.writelines(content)
+        shutil.copymode(file, tmp)
+        os.replace(tmp, file)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp)
+        raise
+
+    compile_bytecode(file)
 
 
 def insert(file: Optional[str] = None) -> None:
     if file is None:
         file = FILE
 
-    if is_inserted(file):
-        return
+    with lock(file):
+        if is_inserted(file):
+            return
 
-    with open(file, "r") as fh:
-        content = fh.readlines()
+        with open(file, "r") as fh:
+            content = fh.readlines()
 
-    idx = content.index(next(line for line in content if line.startswith("def main(")))
-    content = (
-        content[:idx] + [IDENTIFIER] + SHIM.splitlines(keepends=True) + content[idx:]
-    )
-    with open(file, "w") as fh:
-        fh.writelines(content)
+        idx = content.index(
+            next(line for line in content if line.startswith("def main("))
+        )
+        content = (
+            content[:idx]
+            + [IDENTIFIER]
+            + SHIM.splitlines(keepends=True)
+            + content[idx:]
+        )
+        write(file, content)
 
 
 def remove(file: Optional[str] = None) -> None:
     if file is None:
         file = FILE
 
-    if not is_inserted(file):
-        return
+    with lock(file):
+        if not is_inserted(file):
+            return
 
-    with open(file, "r") as fh:
-        content = fh.readlines()
+        with open(file, "r") as fh:
+            content = fh.readlines()
+
+        lines = (line for line in content if line.startswith((IDENTIFIER, "def main(")))
+        start_idx = content.index(next(lines))
+        end_idx = content.index(next(lines))
+        del content[start_idx:end_idx]
 
-    lines = (line for line in content if line.startswith((IDENTIFIER, "def main(")))
-    start_idx = content.index(next(lines))
-    end_idx = content.index(next(lines))
-    del content[start_idx:end_idx]
+        write(file, content)
+
+
+def is_hook_inserted(file: Optional[str] = None) -> bool:
+    if file is None:
+        file = PTH_FILE
+
+    return path.exists(file)
+
+
+def insert_hook(file: Optional[str] = None, hook: Optional[str] = None) -> None:
+    if file is None:
+        file = PTH_FILE
+    if hook is None:
+        hook = HOOK
 
     with open(file, "w") as fh:
-        fh.writelines(content)
+        fh.write(PTH_TEMPLATE.format(hook=hook))
+
+
+def remove_hook(file: Optional[str] = None) -> None:
+    if file is None:
+        file = PTH_FILE
+
+    if is_hook_inserted(file):
+        os.remove(file)
@@ -0,0 +1,275 @@
+import contextlib
+import csv
+import io
+import os
+import posixpath
+import shutil
+import tempfile
+import zipfile
+from os import path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from pip._internal.models.link import Link
+from pip._internal.network.session import PipSession
+from pip._vendor.packaging.version import parse as parse_version
+
+from . import lock
+from .computation_backend import ComputationBackend
+from .installation import get_distribution
+from .patch import PYTORCH_DISTRIBUTIONS
+from .resolution import make_finder, resolve
+
+__all__ = ["SwitchError", "Plan", "read_record", "make_plan", "switch"]
+
+
+class SwitchError(RuntimeError):
+    pass
+
+
+Record = Dict[str, Tuple[str, str]]
+
+
+class Plan(NamedTuple):
+    write: List[str]
+    remove: List[str]
+    keep: List[str]
+
+
+def read_record(content: str) -> Record:
+    record = {}
+    for row in csv.reader(io.StringIO(content)):
+        if not row:
+            continue
+        file, hash, size, *_ = row + ["", ""]
+        record[file] = (hash, size)
+    return record
+
+
+def format_record(record: Record) -> str:
+    with io.StringIO() as fh:
+        writer = csv.writer(fh, lineterminator="\n")
+        for file, (hash, size) in sorted(record.items()):
+            writer.writerow((file, hash, size))
+        return fh.getvalue()
+
+
+def find_dist_info(files: Sequence[str]) -> str:
+    dist_infos = {
+        file.split("/", 1)[0]
+        for file in files
+        if file.split("/", 1)[0].endswith(".dist-info")
+    }
+    if len(dist_infos) != 1:
+        raise SwitchError("Unable to determine the .dist-info directory.")
+    return dist_infos.pop()
+
+
+def source_of(file: str) -> Optional[str]:
+    dir, name = posixpath.split(file)
+    if posixpath.basename(dir) != "__pycache__" or not name.endswith(".pyc"):
+        return None
+
+    return posixpath.join(posixpath.dirname(dir), f"{name.split('.', 1)[0]}.py")
+
+
+def make_plan(installed: Record, wheel: Record) -> Plan:
+    old_dist_info = find_dist_info(list(installed))
+    new_dist_info = find_dist_info(list(wheel))
+
+    write = []
+    keep = []
+    for file, (hash, _) in wheel.items():
+        if file.startswith(f"{new_dist_info}/"):
+            write.append(file)
+        elif installed.get(file, ("", ""))[0] == hash and hash:
+            keep.append(file)
+        else:
+            write.append(file)
+
+    kept_sources = set(keep)
+    remove = []
+    for file in installed:
+        if file in wheel or file.startswith("../"):
+            continue
+
+        if file.startswith(f"{old_dist_info}/"):
+            remove.append(file)
+            continue
+
+        # Bytecode is not listed in the RECORD of the wheel. It is kept as long as
+        # its source is unchanged, since otherwise it would be invalidated anyway.
+        source = source_of(file)
+        if source is not None and source in kept_sources:
+            keep.append(file)
+        else:
+            remove.append(file)
+
+    return Plan(write=sorted(write), remove=sorted(remove), keep=sorted(keep))
+
+
+@contextlib.contextmanager
+def transaction(root: str) -> Iterator[Tuple[str, List[Tuple[str, Optional[str]]]]]:
+    # Every applied change is recorded as (target, backup). If anything goes wrong,
+    # the changes are reverted in reverse order.
+    backup_dir = tempfile.mkdtemp(prefix=".pytorch-pip-shim-", dir=root)
+    journal: List[Tuple[str, Optional[str]]] = []
+    try:
+        yield backup_dir, journal
+    except BaseException:
+        for target, backup in reversed(journal):
+            with contextlib.suppress(OSError):
+                if path.exists(target):
+                    os.remove(target)
+                if backup is not None:
+                    os.replace(backup, target)
+        for target, backup in journal:
+            if backup is None:
+                with contextlib.suppress(OSError):
+                    os.removedirs(path.dirname(target))
+        raise
+    finally:
+        shutil.rmtree(backup_dir, ignore_errors=True)
+
+
+def apply_plan(
+    root: str, wheel: zipfile.ZipFile, plan: Plan, extra_files: Dict[str, str]
+) -> None:
+    def to_path(dir: str, file: str) -> str:
+        return path.join(dir, *file.split("/"))
+
+    staging_dir = tempfile.mkdtemp(prefix=".pytorch-pip-shim-", dir=root)
+    try:
+        # Stage everything first to fail before touching the installation.
+        for file in plan.write:
+            staged = to_path(staging_dir, file)
+            os.makedirs(path.dirname(staged), exist_ok=True)
+            if file in extra_files:
+                with open(staged, "w") as fh:
+                    fh.write(extra_files[file])
+                continue
+
+            with wheel.open(file) as src, open(staged, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+
+        with transaction(root) as (backup_dir, journal):
+            for idx, file in enumerate(plan.remove + plan.write):
+                target = to_path(root, file)
+                backup = None
+                if path.exists(target):
+                    backup = path.join(backup_dir, str(idx))
+                    os.replace(target, backup)
+                journal.append((target, backup))
+
+            for file in plan.write:
+                target = to_path(root, file)
+                os.makedirs(path.dirname(target), exist_ok=True)
+                os.replace(to_path(staging_dir, file), target)
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+    for dir in sorted(
+        {path.dirname(to_path(root, file)) for file in plan.remove}, reverse=True
+    ):
+        with contextlib.suppress(OSError):
+            os.removedirs(dir)
+
+
+def switch_distribution(dist: Any, wheel_file: str) -> Plan:
+    root = dist.location
+    old_dist_info = path.basename(dist.egg_info)
+    with open(path.join(dist.egg_info, "RECORD"), "r") as fh:
+        installed = read_record(fh.read())
+
+    requested = path.exists(path.join(root, old_dist_info, "REQUESTED"))
+
+    with zipfile.ZipFile(wheel_file) as wheel:
+        names = wheel.namelist()
+        new_dist_info = find_dist_info(names)
+        if any(name.split("/", 1)[0].endswith(".data") for name in names):
+            raise SwitchError(
+                f"{path.basename(wheel_file)} contains a .data directory. "
+                f"Please use 'pip install --force-reinstall' instead."
+            )
+        wheel_record = read_record(
+            wheel.read(f"{new_dist_info}/RECORD").decode("utf-8")
+        )
+
+        plan = make_plan(installed, wheel_record)
+
+        # Carry over everything pip added during the installation that is
+        # independent of the computation backend and rewrite the RECORD.
+        extra_files = {f"{new_dist_info}/INSTALLER": "pip\n"}
+        if requested:
+            extra_files[f"{new_dist_info}/REQUESTED"] = ""
+        record = {file: wheel_record[file] for file in plan.write}
+        record.update({file: installed[file] for file in plan.keep})
+        record.update(
+            {file: installed[file] for file in installed if file.startswith("../")}
+        )
+        record.update({file: ("", "") for file in extra_files})
+        record_file = f"{new_dist_info}/RECORD"
+        record[record_file] = ("", "")
+        extra_files[record_file] = format_record(record)
+
+        plan = plan._replace(write=sorted(set(plan.write) | set(extra_files)))
+        apply_plan(root, wheel, plan, extra_files)
+
+    return plan
+
+
+def download(link: Link, dir: str, session: PipSession) -> str:
+    file = path.join(dir, link.filename)
+    try:
+        with open(file, "wb") as fh:
+            lock.download(link, fh, session=session)
+    except lock.HashMismatchError as error:
+        # The wheel must never reach the installation if it does not match the hash
+        # the index advertised.
+        os.remove(file)
+        raise SwitchError(str(error)) from error
+    return file
+
+
+def switch(
+    computation_backend: ComputationBackend,
+    project_names: Sequence[str] = PYTORCH_DISTRIBUTIONS,
+    session: Optional[PipSession] = None,
+) -> Dict[str, Tuple[str, str, Plan]]:
+    if session is None:
+        session = PipSession()
+
+    dists = {}
+    for project_name in project_names:
+        if project_name not in PYTORCH_DISTRIBUTIONS:
+            raise SwitchError(f"{project_name} is not a PyTorch distribution.")
+
+        dist = get_distribution(project_name)
+        if dist is None:
+            continue
+
+        version = parse_version(dist.version)
+        if version.local is None or version.local == computation_backend:
+            continue
+
+        dists[project_name] = (dist, version)
+
+    if not dists:
+        return {}
+
+    nightly = any(version.is_prerelease for _, version in dists.values())
+    candidates = resolve(
+        [f"{name}=={version.public}" for name, (_, version) in dists.items()],
+        computation_backend,
+        nightly=nightly,
+        finder=make_finder(session=session, nightly=nightly),
+    )
+
+    results = {}
+    with tempfile.TemporaryDirectory() as dir:
+        for (project_name, (dist, version)), candidate in zip(
+            dists.items(), candidates
+        ):
+            wheel_file = download(candidate.link, dir, session)
+            plan = switch_distribution(dist, wheel_file)
+            results[project_name] = (str(version), str(candidate.version), plan)
+    return results
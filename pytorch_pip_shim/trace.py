@@ -0,0 +1,95 @@
+import atexit
+import contextlib
+import json
+import os
+import threading
+import time
+from os import path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+__all__ = ["ENV_VAR", "is_enabled", "summarize", "span", "get_events", "write"]
+
+ENV_VAR = "PYTORCH_PIP_SHIM_TRACE"
+
+_events: List[Dict[str, Any]] = []
+_registered = False
+
+
+def get_file() -> Optional[str]:
+    return os.environ.get(ENV_VAR) or None
+
+
+def is_enabled() -> bool:
+    return get_file() is not None
+
+
+def summarize(obj: Any) -> Any:
+    if obj is None or isinstance(obj, (bool, int, float)):
+        return obj
+    elif isinstance(obj, str):
+        return obj if len(obj) <= 100 else f"{obj[:97]}..."
+
+    summary = type(obj).__name__
+    with contextlib.suppress(Exception):
+        summary = f"{summary}(len={len(obj)})"
+    # pip's CollectedLinks and our own collected links do not have a length, but we
+    # want to see how many links are passed around.
+    for attr in ("files", "find_links"):
+        value = getattr(obj, attr, None)
+        if isinstance(value, Sequence) and not isinstance(value, str):
+            summary = f"{summary} {attr}={len(value)}"
+    return summary
+
+
+def summarize_call(args: Sequence[Any], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    summary = {f"arg{idx}": summarize(arg) for idx, arg in enumerate(args)}
+    summary.update({name: summarize(value) for name, value in kwargs.items()})
+    return summary
+
+
+def now() -> float:
+    return time.perf_counter() * 1e6
+
+
+@contextlib.contextmanager
+def span(name: str, **args: Any) -> Iterator[Dict[str, Any]]:
+    global _registered
+    if not _registered:
+        atexit.register(write)
+        _registered = True
+
+    start = now()
+    try:
+        yield args
+    finally:
+        _events.append(
+            dict(
+                name=name,
+                cat="pytorch-pip-shim",
+                ph="X",
+                ts=start,
+                dur=now() - start,
+                pid=os.getpid(),
+                tid=threading.get_ident(),
+                args=args,
+            )
+        )
+
+
+def get_events() -> List[Dict[str, Any]]:
+    return list(_events)
+
+
+def write(file: Optional[str] = None) -> None:
+    if file is None:
+        file = get_file()
+    if file is None or not _events:
+        return
+
+    # If a directory is given, every process writes its own trace.
+    if path.isdir(file):
+        file = path.join(file, f"pytorch-pip-shim-{os.getpid()}.json")
+
+    with contextlib.suppress(OSError):
+        with open(file, "w") as fh:
+            json.dump(dict(traceEvents=_events, displayTimeUnit="ms"), fh, default=str)
@@ -0,0 +1,80 @@
+import os
+import shutil
+import subprocess
+import sys
+from os import path
+from typing import Any, Iterable, List, Set
+
+from pip._internal.req import req_uninstall
+
+__all__ = ["get_owned_dirs", "compress_for_rename", "remove_in_background"]
+
+# The original is kept, since it is patched during the uninstallation.
+pip_compress_for_rename = req_uninstall.compress_for_rename
+
+REMOVE_SCRIPT = (
+    "import shutil, sys; "
+    "[shutil.rmtree(dir, ignore_errors=True) for dir in sys.argv[1:]]"
+)
+
+
+def get_owned_dirs(dist: Any) -> Set[str]:
+    names: Set[str] = set()
+    if dist.has_metadata("top_level.txt"):
+        names.update(name.strip() for name in dist.get_metadata_lines("top_level.txt"))
+    names.add(path.basename(dist.egg_info))
+    return {
+        path.join(dist.location, name)
+        for name in names
+        if name and path.isdir(path.join(dist.location, name))
+    }
+
+
+def is_exclusively_owned(dir: str, paths: Set[str]) -> bool:
+    for root, _, files in os.walk(dir):
+        for file in files:
+            if path.normcase(path.join(root, file)) not in paths:
+                return False
+    return True
+
+
+def compress_for_rename(paths: Iterable[str], owned_dirs: Set[str]) -> Set[str]:
+    # pip walks every directory of every file to check if it can be renamed as a
+    # whole. Instead, the top-level directories of PyTorch distributions are only
+    # walked once. Only if they contain nothing but files of the distribution, they
+    # are renamed as a whole. Otherwise, the files are left to pip.
+    paths = list(paths)
+    normcased = {path.normcase(file) for file in paths}
+    owned_dirs = {dir for dir in owned_dirs if is_exclusively_owned(dir, normcased)}
+    owned = {path.normcase(dir) for dir in owned_dirs}
+    compressed = {dir + os.sep for dir in owned_dirs}
+    remaining = []
+    for file in paths:
+        parent = path.normcase(file)
+        while True:
+            parent, tail = path.split(parent)
+            if parent in owned:
+                break
+            if not tail:
+                remaining.append(file)
+                break
+    return compressed | pip_compress_for_rename(remaining)
+
+
+def remove_in_background(dirs: List[str]) -> None:
+    if not dirs:
+        return
+
+    kwargs: Any = dict(
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    if sys.platform.startswith("win"):
+        kwargs["creationflags"] = getattr(subprocess, "DETACHED_PROCESS", 0)
+    else:
+        kwargs["start_new_session"] = True
+
+    try:
+        subprocess.Popen([sys.executable, "-c", REMOVE_SCRIPT, *dirs], **kwargs)
+    except OSError:
+        for dir in dirs:
+            shutil.rmtree(dir, ignore_errors=True)
@@ -1,3 +1,4 @@
+import argparse
 import contextlib
 import importlib
 import optparse
@@ -6,13 +7,18 @@ from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union,
 from unittest import mock
 
 from . import computation_backend as cb
+from . import trace
 
 __all__ = [
     "InternalError",
     "canocialize_name",
+    "is_link_candidate",
     "apply_patch",
     "parse_pip_args",
     "computation_backend_options",
+    "nightly_window_options",
+    "mirror_options",
+    "preflight_options",
 ]
 
 
@@ -26,19 +32,60 @@ class InternalError(RuntimeError):
         super().__init__(msg)
 
 
+try:
+    from pip._internal.index.package_finder import LinkType
+
+    # Starting with pip==22.2 the first element of the evaluation result is a LinkType
+    # rather than a bool. Since every enum member is truthy, it has to be compared
+    # explicitly.
+    LINK_CANDIDATE: Any = LinkType.candidate
+except ImportError:  # pragma: no cover
+    LINK_CANDIDATE = True
+
+
+def is_link_candidate(is_candidate: Any) -> bool:
+    return is_candidate is True or is_candidate is LINK_CANDIDATE
+
+
 def canocialize_name(name: str) -> str:
     return name.lower().replace("_", "-")
 
 
-def parse_pip_args(args: List[str]) -> SimpleNamespace:
+def parse_pip_args(
+    args: List[str], detect: Optional[Callable[[], cb.ComputationBackend]] = None
+) -> SimpleNamespace:
     if args[0] != "install":
         args = []
 
     parser = make_pip_args_parser()
-    opts, _ = parser.parse_args(args)
+    opts, largs = parser.parse_args(args)
 
     return SimpleNamespace(
-        computation_backend=process_computation_backend(opts), nightly=opts.nightly
+        computation_backend=process_computation_backend(opts, detect=detect),
+        nightly=opts.nightly,
+        upgrade=opts.upgrade,
+        force_reinstall=opts.force_reinstall,
+        nightly_window_days=opts.nightly_window_days,
+        nightly_window_builds=opts.nightly_window_builds,
+        pytorch_mirrors=opts.pytorch_mirrors,
+        pytorch_preflight=opts.pytorch_preflight,
+        no_index=opts.no_index,
+        proxy=opts.proxy,
+        cert=opts.cert,
+        client_cert=opts.client_cert,
+        trusted_hosts=opts.trusted_hosts or [],
+        timeout=opts.timeout,
+        retries=opts.retries,
+        requirements=[arg for arg in largs[1:] if not arg.startswith("-")],
+        custom_target=any(
+            values is not None
+            for values in (
+                opts.platforms,
+                opts.python_version,
+                opts.implementation,
+                opts.abis,
+            )
+        ),
     )
 
 
@@ -62,7 +109,32 @@ def make_pip_args_parser() -> PassThroughOptionParser:
     parser.add_option(
         "--pre", dest="nightly", action="store_true", default=False, help="nightly"
     )
-    for option in computation_backend_options():
+    parser.add_option(
+        "-U", "--upgrade", action="store_true", default=False, help="upgrade"
+    )
+    parser.add_option(
+        "--force-reinstall",
+        action="store_true",
+        default=False,
+        help="force reinstall",
+    )
+    parser.add_option("--platform", dest="platforms", action="append")
+    parser.add_option("--python-version")
+    parser.add_option("--implementation")
+    parser.add_option("--abi", dest="abis", action="append")
+    parser.add_option("--no-index", action="store_true", default=False)
+    parser.add_option("--proxy")
+    parser.add_option("--cert")
+    parser.add_option("--client-cert")
+    parser.add_option("--trusted-host", dest="trusted_hosts", action="append")
+    parser.add_option("--timeout", type="float")
+    parser.add_option("--retries", type="int")
+    for option in (
+        *computation_backend_options(),
+        *nightly_window_options(),
+        *mirror_options(),
+        *preflight_options(),
+    ):
         parser.add_option(option)
     return parser
 
@@ -91,66 +163,156 @@ def computation_backend_options() -> Tuple[optparse.Option, ...]:
     )
 
 
-def process_computation_backend(opts: optparse.Values) -> cb.ComputationBackend:
+def nightly_window_options() -> Tuple[optparse.Option, ...]:
+    return (
+        optparse.Option(
+            "--nightly-window-days",
+            type="int",
+            metavar="N",
+            help=(
+                "Only consider PyTorch nightly builds of the last N days. "
+                "Only has an effect together with '--pre'."
+            ),
+        ),
+        optparse.Option(
+            "--nightly-window-builds",
+            type="int",
+            metavar="N",
+            help=(
+                "Only consider the N most recent PyTorch nightly builds. "
+                "Only has an effect together with '--pre'."
+            ),
+        ),
+    )
+
+
+def mirror_options() -> Tuple[optparse.Option, ...]:
+    return (
+        optparse.Option(
+            "--pytorch-mirror",
+            dest="pytorch_mirrors",
+            action="append",
+            metavar="URL",
+            help=(
+                "Base URL of a mirror of the PyTorch index, e.g. "
+                "'https://download.pytorch.org/whl/'. Can be given multiple times. "
+                "The mirror with the lowest latency is used and the others serve as "
+                "fallback."
+            ),
+        ),
+    )
+
+
+def preflight_options() -> Tuple[optparse.Option, ...]:
+    return (
+        optparse.Option(
+            "--no-pytorch-preflight",
+            dest="pytorch_preflight",
+            action="store_false",
+            default=True,
+            help=(
+                "Do not check the PyTorch index for a matching wheel of the "
+                "requested PyTorch distributions before the resolution starts."
+            ),
+        ),
+    )
+
+
+def process_computation_backend(
+    opts: Union[optparse.Values, argparse.Namespace],
+    detect: Optional[Callable[[], cb.ComputationBackend]] = None,
+) -> cb.ComputationBackend:
     if opts.computation_backend is not None:
         return cb.ComputationBackend.from_str(opts.computation_backend)
 
     if opts.cpu:
         return cb.CPUBackend()
 
-    return cb.detect()
+    return detect() if detect is not None else cb.detect()
 
 
 Args = Union[Tuple[()], Tuple[Any], Tuple[Any, ...]]
 Kwargs = Dict[str, Any]
 
 
+Preprocessing = Callable[[Args, Kwargs], Tuple[Args, Kwargs]]
+Context = Callable[[Args, Kwargs], contextlib._GeneratorContextManager]
+Postprocessing = Callable[[Args, Kwargs, Any], Any]
+
+
 @contextlib.contextmanager
 def apply_patch(
     target: str,
-    preprocessing: Optional[Callable[[Args, Kwargs], Tuple[Args, Kwargs]]] = None,
-    context: Optional[
-        Callable[[Args, Kwargs], contextlib._GeneratorContextManager]
-    ] = None,
-    postprocessing: Optional[Callable[[Args, Kwargs, Any], Any]] = None,
+    preprocessing: Optional[Preprocessing] = None,
+    context: Optional[Context] = None,
+    postprocessing: Optional[Postprocessing] = None,
 ) -> Iterator[None]:
-    preprocessing = preprocessing or preprocessing_noop
-    context = context or context_noop
-    postprocessing = postprocessing or postprocessing_noop
-
     fn = import_fn(target)
+    new = make_wrapper(
+        fn,
+        preprocessing=preprocessing,
+        context=context,
+        postprocessing=postprocessing,
+    )
 
-    def new(*args: Any, **kwargs: Any) -> Any:
-        preprocessing_ = cast(
-            Callable[[Args, Kwargs], Tuple[Args, Kwargs]],
-            preprocessing,
-        )
-        context_ = cast(
-            Callable[[Args, Kwargs], contextlib._GeneratorContextManager],
-            context,
-        )
-        postprocessing_ = cast(Callable[[Args, Kwargs, Any], Any], postprocessing)
+    # Whether to trace is decided once here rather than on every call to keep the
+    # overhead at zero if tracing is disabled.
+    if trace.is_enabled():
+        untraced = new
 
-        args, kwargs = preprocessing_(args, kwargs)
-        with context_(args, kwargs):
-            output = fn(*args, **kwargs)
-        return postprocessing_(args, kwargs, output)
+        def new(*args: Any, **kwargs: Any) -> Any:
+            with trace.span(target, **trace.summarize_call(args, kwargs)) as span:
+                output = untraced(*args, **kwargs)
+                span["output"] = trace.summarize(output)
+                return output
 
     with mock.patch(target, new=new):
         yield
 
 
-def preprocessing_noop(args: Args, kwargs: Kwargs) -> Tuple[Args, Kwargs]:
-    return args, kwargs
+def make_wrapper(
+    fn: Callable,
+    preprocessing: Optional[Preprocessing] = None,
+    context: Optional[Context] = None,
+    postprocessing: Optional[Postprocessing] = None,
+) -> Callable:
+    # Some patched functions, e.g. the link evaluation, are called for every link of
+    # the index. Thus, the wrapper is specialized to the supplied hooks such that
+    # absent ones cost neither a call nor an allocation.
+    if context is None:
+        call = fn
+    else:
+        context_ = context
 
+        def call(*args: Any, **kwargs: Any) -> Any:
+            with context_(args, kwargs):
+                return fn(*args, **kwargs)
 
-def postprocessing_noop(args: Args, kwargs: Kwargs, output: Any) -> Any:
-    return output
+    if preprocessing is None and postprocessing is None:
+        return call
 
+    if preprocessing is None:
+        postprocessing_ = cast(Postprocessing, postprocessing)
 
-@contextlib.contextmanager
-def context_noop(args: Args, kwargs: Kwargs) -> Iterator[None]:
-    yield
+        def new(*args: Any, **kwargs: Any) -> Any:
+            return postprocessing_(args, kwargs, call(*args, **kwargs))
+
+    elif postprocessing is None:
+        preprocessing_ = preprocessing
+
+        def new(*args: Any, **kwargs: Any) -> Any:
+            args, kwargs = preprocessing_(args, kwargs)
+            return call(*args, **kwargs)
+
+    else:
+        preprocessing_ = preprocessing
+        postprocessing_ = postprocessing
+
+        def new(*args: Any, **kwargs: Any) -> Any:
+            args, kwargs = preprocessing_(args, kwargs)
+            return postprocessing_(args, kwargs, call(*args, **kwargs))
+
+    return new
 
 
 def import_fn(target: str) -> Callable:
@@ -0,0 +1,163 @@
+import concurrent.futures
+import hashlib
+import html
+import os
+import shutil
+from os import path
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+from pip._internal.index.package_finder import PackageFinder
+from pip._internal.models.candidate import InstallationCandidate
+from pip._internal.models.link import Link
+from pip._internal.network.session import PipSession
+
+from . import lock
+from .computation_backend import ComputationBackend
+from .lock import CHUNK_SIZE, HASH_NAME
+from .resolution import make_finder, resolve
+
+__all__ = [
+    "WheelhouseError",
+    "resolve_wheelhouse",
+    "download",
+    "link_or_copy",
+    "write_index",
+    "export",
+]
+
+INDEX_FILE = "index.html"
+
+Entry = Dict[str, str]
+
+
+class WheelhouseError(RuntimeError):
+    pass
+
+
+def resolve_wheelhouse(
+    requirements: Sequence[str],
+    computation_backends: Sequence[ComputationBackend],
+    nightly: bool = False,
+    finder: Optional[PackageFinder] = None,
+    dependencies: bool = True,
+) -> Dict[str, List[InstallationCandidate]]:
+    if finder is None:
+        finder = make_finder(nightly=nightly)
+
+    # The patches are applied globally. Thus, the computation backends cannot be
+    # resolved concurrently.
+    return {
+        str(computation_backend): resolve(
+            requirements,
+            computation_backend,
+            nightly=nightly,
+            finder=finder,
+            dependencies=dependencies,
+        )
+        for computation_backend in computation_backends
+    }
+
+
+def download(link: Link, file: str, session: Optional[PipSession] = None) -> str:
+    # The wheel is only moved into place once it is complete. Thus, an interrupted
+    # export never leaves a truncated wheel behind.
+    tmp = f"{file}.part"
+    try:
+        with open(tmp, "wb") as fh:
+            digest = lock.download(link, fh, session=session)
+    except lock.HashMismatchError as error:
+        os.remove(tmp)
+        raise WheelhouseError(str(error)) from error
+
+    os.replace(tmp, file)
+    return digest
+
+
+def compute_hash(file: str) -> str:
+    hash = hashlib.new(HASH_NAME)
+    with open(file, "rb") as fh:
+        for chunk in iter(lambda: fh.read(CHUNK_SIZE), b""):
+            hash.update(chunk)
+    return hash.hexdigest()
+
+
+def link_or_copy(src: str, dst: str) -> bool:
+    if path.exists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+        return True
+    except OSError:
+        # Some file systems do not support hard links.
+        shutil.copy2(src, dst)
+        return False
+
+
+def write_index(dir: str, entries: Sequence[Entry]) -> str:
+    file = path.join(dir, INDEX_FILE)
+    with open(file, "w") as fh:
+        fh.write("<!DOCTYPE html>\n<html>\n<body>\n")
+        for entry in entries:
+            filename = html.escape(entry["filename"])
+            fh.write(
+                f'<a href="{filename}#{HASH_NAME}={entry[HASH_NAME]}">'
+                f"{filename}</a><br/>\n"
+            )
+        fh.write("</body>\n</html>\n")
+    return file
+
+
+def export(
+    candidates: Mapping[str, Sequence[InstallationCandidate]],
+    dir: str,
+    session: Optional[PipSession] = None,
+    max_workers: Optional[int] = None,
+) -> Dict[str, List[Entry]]:
+    if session is None:
+        session = PipSession()
+
+    # Wheels that are shared between computation backends, e.g. pure Python ones,
+    # are only downloaded once into the directory of the first computation backend.
+    downloads: Dict[str, Tuple[Link, str]] = {}
+    for computation_backend, backend_candidates in candidates.items():
+        os.makedirs(path.join(dir, computation_backend), exist_ok=True)
+        for candidate in backend_candidates:
+            url = candidate.link.url_without_fragment
+            if url not in downloads:
+                downloads[url] = (
+                    candidate.link,
+                    path.join(dir, computation_backend, candidate.link.filename),
+                )
+
+    def fetch(item: Tuple[Link, str]) -> Tuple[str, str]:
+        link, file = item
+        if path.exists(file):
+            return "reused", compute_hash(file)
+        return "downloaded", download(link, file, session=session)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = dict(zip(downloads.keys(), executor.map(fetch, downloads.values())))
+
+    manifest: Dict[str, List[Entry]] = {}
+    for computation_backend, backend_candidates in candidates.items():
+        entries = []
+        for candidate in backend_candidates:
+            url = candidate.link.url_without_fragment
+            _, src = downloads[url]
+            status, hash = results[url]
+            dst = path.join(dir, computation_backend, candidate.link.filename)
+            if dst != src:
+                status = "linked" if link_or_copy(src, dst) else "copied"
+            entries.append(
+                {
+                    "name": candidate.name,
+                    "version": str(candidate.version),
+                    "filename": candidate.link.filename,
+                    "url": url,
+                    HASH_NAME: hash,
+                    "status": status,
+                }
+            )
+        write_index(path.join(dir, computation_backend), entries)
+        manifest[computation_backend] = entries
+    return manifest
@@ -12,3 +12,10 @@ class GenericComputationBackend(cb.ComputationBackend):
 @pytest.fixture
 def generic_computation_backend():
     return GenericComputationBackend()
+
+
+@pytest.fixture
+def cache_dir(tmpdir, monkeypatch):
+    monkeypatch.setenv("PYTORCH_PIP_SHIM_CACHE_DIR", str(tmpdir))
+    monkeypatch.delenv("PYTORCH_PIP_SHIM_NO_CACHE", raising=False)
+    return str(tmpdir)
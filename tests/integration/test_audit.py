@@ -0,0 +1,188 @@
+import io
+import json
+from os import path
+from types import SimpleNamespace
+
+import pytest
+
+from pip._internal.index import package_finder
+from pip._internal.index.package_finder import CandidateEvaluator, LinkEvaluator
+from pip._internal.models.candidate import InstallationCandidate
+from pip._internal.models.link import Link
+
+from pytorch_pip_shim import audit
+from pytorch_pip_shim.computation_backend import CPUBackend
+from pytorch_pip_shim.metrics import Run
+from pytorch_pip_shim.patch import patch_candidate_selection, patch_link_evaluation
+
+
+@pytest.fixture
+def audit_log(tmpdir):
+    return audit.Audit(path.join(str(tmpdir), "audit.jsonl"), sample_rate=1.0)
+
+
+def read(file):
+    with open(file) as fh:
+        return [json.loads(line) for line in fh]
+
+
+def test_from_env(monkeypatch):
+    monkeypatch.delenv(audit.ENV_VAR, raising=False)
+    assert audit.Audit.from_env() is None
+
+    monkeypatch.setenv(audit.ENV_VAR, "audit.jsonl")
+    monkeypatch.setenv(audit.SAMPLE_ENV_VAR, "2")
+    audit_log = audit.Audit.from_env()
+    assert audit_log.file == "audit.jsonl"
+    assert audit_log.sample_rate == 1.0
+
+
+@pytest.mark.parametrize(("sample_rate", "expected"), [(0.0, 0), (1.0, 100)])
+def test_sampling(audit_log, sample_rate, expected):
+    audit_log.sample_rate = sample_rate
+    for idx in range(100):
+        audit_log.record("link", "torch", "cpu", "kept", "", f"{idx}.whl")
+
+    assert len(audit_log.records) == expected
+    assert audit_log.counts == {("link", "torch", "cpu", "kept", ""): 100}
+
+
+def test_sampling_deterministic(audit_log):
+    audit_log.sample_rate = 0.5
+    urls = [f"{idx}.whl" for idx in range(100)]
+
+    assert 0 < sum(map(audit_log.is_sampled, urls)) < len(urls)
+    assert [audit_log.is_sampled(url) for url in urls] == [
+        audit_log.is_sampled(url) for url in urls
+    ]
+
+
+def test_write(audit_log):
+    audit_log.record("link", "torch", "cu102", "rejected", "none of: cp38", "0.whl")
+    audit_log.record("link", "torch", "cu102", "rejected", "none of: cp39", "1.whl")
+    audit_log.record("link", "torch", "cpu", "kept", "", "2.whl")
+    fh = io.StringIO()
+
+    audit_log.write(fh)
+
+    *records, summary = read(audit_log.file)
+    assert [record["reason"] for record in records] == [
+        "none of: cp38",
+        "none of: cp39",
+        "",
+    ]
+    assert summary["type"] == "summary"
+    assert summary["counts"][0] == dict(
+        type="link",
+        project_name="torch",
+        computation_backend="cu102",
+        decision="rejected",
+        reason="none of",
+        count=2,
+    )
+    assert "2 link rejected: none of (torch, cu102)" in fh.getvalue()
+
+
+def test_link_evaluation(mocker, audit_log):
+    results = {
+        "cpu/torch-1.7.0%2Bcpu-cp38-cp38-linux_x86_64.whl": (True, "1.7.0+cpu"),
+        "cu102/torch-1.7.0-cp38-cp38-linux_x86_64.whl": (True, "1.7.0"),
+        "torch-1.7.0-cp38-none-macosx_10_9_x86_64.whl": (True, "1.7.0"),
+        "torch-1.7.0-cp39-cp39-linux_x86_64.whl": (False, "none of the tags match"),
+    }
+    mocker.patch.object(
+        LinkEvaluator,
+        "evaluate_link",
+        create=True,
+        new=lambda self, link: results[link.url.split("/whl/")[1]],
+    )
+    evaluator = SimpleNamespace(project_name="torch")
+
+    with patch_link_evaluation(audit_log=audit_log):
+        for name in results:
+            LinkEvaluator.evaluate_link(
+                evaluator, Link(f"https://download.pytorch.org/whl/{name}")
+            )
+
+    assert [
+        (record["decision"], record["reason"], record["version"])
+        for record in audit_log.records
+    ] == [
+        ("kept", "computation backend from the version", "1.7.0+cpu"),
+        ("annotated", "computation backend from the path", "1.7.0+cu102"),
+        ("kept", "no computation backend", "1.7.0"),
+        ("rejected", "none of the tags match", None),
+    ]
+
+
+def test_link_evaluation_link_type(mocker, audit_log):
+    link_type = getattr(package_finder, "LinkType", None)
+    if link_type is None:
+        pytest.skip("pip<22.2 does not return a LinkType")
+
+    results = {
+        "cpu/torch-1.7.0%2Bcpu-cp38-cp38-linux_x86_64.whl": (
+            link_type.candidate,
+            "1.7.0+cpu",
+        ),
+        "torch-1.7.0-cp39-cp39-linux_x86_64.whl": (
+            link_type.platform_mismatch,
+            "none of the wheel's tags match",
+        ),
+    }
+    mocker.patch.object(
+        LinkEvaluator,
+        "evaluate_link",
+        create=True,
+        new=lambda self, link: results[link.url.split("/whl/")[1]],
+    )
+    evaluator = SimpleNamespace(project_name="torch")
+    run = Run()
+
+    with patch_link_evaluation(run=run, audit_log=audit_log):
+        outputs = [
+            LinkEvaluator.evaluate_link(
+                evaluator, Link(f"https://download.pytorch.org/whl/{name}")
+            )
+            for name in results
+        ]
+
+    assert run.values == dict(links_evaluated=2, links_rejected=1)
+    assert outputs == list(results.values())
+    assert [record["decision"] for record in audit_log.records] == [
+        "kept",
+        "rejected",
+    ]
+
+
+def test_candidate_selection(mocker, audit_log):
+    mocker.patch.object(
+        CandidateEvaluator,
+        "get_applicable_candidates",
+        create=True,
+        new=lambda self, candidates: candidates,
+    )
+    candidates = [
+        InstallationCandidate(name, version, Link(f"https://example.com/{idx}.whl"))
+        for idx, (name, version) in enumerate(
+            [
+                ("torch", "1.7.0+cpu"),
+                ("torch", "1.7.0+cu102"),
+                ("torch", "1.7.0"),
+                ("numpy", "1.19.0"),
+            ]
+        )
+    ]
+
+    with patch_candidate_selection(CPUBackend(), audit_log=audit_log):
+        CandidateEvaluator.get_applicable_candidates(None, candidates)
+
+    assert [
+        (record["project_name"], record["computation_backend"], record["decision"])
+        for record in audit_log.records
+    ] == [
+        ("torch", "cpu", "kept"),
+        ("torch", "cu102", "rejected"),
+        ("torch", None, "kept"),
+        ("numpy", None, "kept"),
+    ]
@@ -0,0 +1,79 @@
+from pip._internal.models.link import Link
+from pip._internal.network.session import PipSession
+
+from pytorch_pip_shim import bench
+from pytorch_pip_shim import computation_backend as cb
+from pytorch_pip_shim import index
+
+from tests import mocks, utils
+
+NAMES = (
+    "cpu/torch-1.7.0%2Bcpu-cp38-cp38-linux_x86_64.whl",
+    "cpu/torchvision-0.8.1%2Bcpu-cp38-cp38-linux_x86_64.whl",
+)
+PAGE = ("".join(f'<a href="{name}">{name}</a>' for name in NAMES), "text/html")
+
+
+def test_bench_detection(mocker):
+    mocker.patch(mocks.make_target("bench", "daemon", "detect"), return_value=None)
+    mocker.patch(
+        mocks.make_target("bench", "detect_from_nvcc"), return_value=cb.CPUBackend()
+    )
+
+    results, computation_backend = bench.bench_detection()
+
+    assert computation_backend == cb.CPUBackend()
+    assert [result["detail"] for result in results] == ["not running", "cpu"]
+
+
+def test_bench_index():
+    with utils.fake_server({"/torch_stable.html": PAGE}) as base:
+        url = index.make_url(cb.CPUBackend(), False, base=base)
+        results, links = bench.bench_index(PipSession(), base, url)
+
+    latency, throughput = results
+    assert latency["value"] is not None
+    assert throughput["value"] > 0
+    assert [link.filename for link in links] == [
+        "torch-1.7.0+cpu-cp38-cp38-linux_x86_64.whl",
+        "torchvision-0.8.1+cpu-cp38-cp38-linux_x86_64.whl",
+    ]
+
+
+def test_bench_index_unreachable():
+    with utils.fake_server(status=503) as base:
+        results, links = bench.bench_index(PipSession(), base, f"{base}index.html")
+
+    (latency,) = results
+    assert latency["value"] is None
+    assert links is None
+
+
+def test_bench_link_evaluation():
+    links = [Link(f"https://download.pytorch.org/whl/{name}") for name in NAMES]
+
+    (result,) = bench.bench_link_evaluation(links, cb.CPUBackend())
+
+    assert result["value"] > 0
+
+
+def test_bench_unpack(tmpdir):
+    (result,) = bench.bench_unpack(4 * bench.UNPACK_FILE_SIZE, dir=str(tmpdir))
+
+    assert result["value"] > 0
+    assert "4 files" in result["detail"]
+    assert not tmpdir.listdir()
+
+
+def test_format_table():
+    table = bench.format_table(
+        [
+            bench.make_result("detection: nvcc", 12.345, "ms", "cpu"),
+            bench.make_result("link evaluation", None, "links/s"),
+        ]
+    )
+
+    assert table.splitlines() == [
+        "detection: nvcc  12.3 ms       cpu",
+        "link evaluation     - links/s",
+    ]
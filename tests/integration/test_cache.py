@@ -0,0 +1,35 @@
+from os import path
+
+from pytorch_pip_shim import cache
+
+
+def test_get_dir(cache_dir):
+    assert cache.get_dir("foo", "bar") == path.join(cache_dir, "foo", "bar")
+
+
+def test_is_enabled(monkeypatch, cache_dir):
+    assert cache.is_enabled()
+
+    monkeypatch.setenv("PYTORCH_PIP_SHIM_NO_CACHE", "1")
+    assert not cache.is_enabled()
+
+
+def test_store_load_roundtrip(cache_dir):
+    file = cache.get_dir("foo", "bar.json")
+    obj = {"foo": ["bar", 1, None]}
+
+    cache.store(file, obj)
+
+    assert cache.load(file) == obj
+
+
+def test_load_missing(cache_dir):
+    assert cache.load(cache.get_dir("missing.json")) is None
+
+
+def test_load_corrupt(cache_dir):
+    file = cache.get_dir("corrupt.json")
+    with open(file, "w") as fh:
+        fh.write("{")
+
+    assert cache.load(file) is None
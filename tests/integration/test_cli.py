@@ -1,8 +1,11 @@
 import contextlib
 import functools
 import itertools
+import json
 import subprocess
 import sys
+from os import path
+from types import SimpleNamespace
 
 import pytest
 
@@ -10,6 +13,7 @@ from pip._internal.cli import main as pip_cli
 
 import pytorch_pip_shim
 from pytorch_pip_shim import cli as pps_cli
+from pytorch_pip_shim import metrics, resolution
 from pytorch_pip_shim.utils import canocialize_name
 
 from tests import mocks
@@ -95,6 +99,15 @@ def test_insert_with_file(mocker, pps_main):
     mock.assert_called_once_with(file)
 
 
+@pytest.mark.parametrize("subcommand", ["insert", "remove"])
+def test_hook(mocker, pps_main, subcommand):
+    mock = mocker.patch(mocks.make_target("shim", f"{subcommand}_hook"))
+
+    pps_main(subcommand, "--hook")
+
+    mock.assert_called_once_with(None)
+
+
 def test_remove(mocker, pps_main):
     mock = mocker.patch(mocks.make_target("shim", "remove"))
 
@@ -183,3 +196,235 @@ def test_pip_help_install_computation_backend(pip_main, args, option):
     out = pip_main(*args, must_exit=False)
 
     assert option in out
+
+
+def test_lock(mocker, pps_main, tmpdir):
+    candidates = [object()]
+    resolve = mocker.patch(
+        mocks.make_target("cli", "commands", "resolve"), return_value=candidates
+    )
+    mocker.patch(mocks.make_target("cli", "commands", "make_finder"))
+    write = mocker.patch(mocks.make_target("cli", "commands", "lock", "write"))
+    output = str(tmpdir.join("requirements.lock"))
+
+    pps_main("lock", "torch", "--cpu", "--no-hashes", "-o", output)
+
+    args, kwargs = resolve.call_args
+    assert args[0] == ["torch"]
+    assert args[1] == "cpu"
+    assert write.call_args[0][1] is candidates
+    assert not write.call_args[1]["hashes"]
+    assert kwargs["dependencies"]
+
+
+def test_lock_no_deps(mocker, pps_main):
+    resolve = mocker.patch(
+        mocks.make_target("cli", "commands", "resolve"), return_value=[]
+    )
+    mocker.patch(mocks.make_target("cli", "commands", "make_finder"))
+    mocker.patch(mocks.make_target("cli", "commands", "lock", "write"))
+
+    pps_main("lock", "torch", "--cpu", "--no-deps")
+
+    assert not resolve.call_args[1]["dependencies"]
+
+
+def test_lock_index_options(mocker, pps_main):
+    mocker.patch(mocks.make_target("cli", "commands", "resolve"), return_value=[])
+    make_finder = mocker.patch(mocks.make_target("cli", "commands", "make_finder"))
+    mocker.patch(mocks.make_target("cli", "commands", "lock", "write"))
+
+    pps_main(
+        "lock",
+        "torch",
+        "--cpu",
+        "-i",
+        "https://example.com/simple",
+        "--extra-index-url",
+        "https://extra.example.com/simple",
+        "-f",
+        "wheels",
+        "--timeout",
+        "30",
+    )
+
+    kwargs = make_finder.call_args[1]
+    assert kwargs["index_urls"] == (
+        "https://example.com/simple",
+        "https://extra.example.com/simple",
+    )
+    assert kwargs["find_links"] == ["wheels"]
+    assert kwargs["session"].timeout == 30.0
+
+
+def test_lock_no_index(mocker, pps_main):
+    mocker.patch(mocks.make_target("cli", "commands", "resolve"), return_value=[])
+    make_finder = mocker.patch(mocks.make_target("cli", "commands", "make_finder"))
+    mocker.patch(mocks.make_target("cli", "commands", "lock", "write"))
+
+    pps_main("lock", "torch", "--cpu", "--no-index", "-f", "wheels")
+
+    kwargs = make_finder.call_args[1]
+    assert not kwargs["index_urls"]
+    assert kwargs["find_links"] == ["wheels"]
+
+
+def test_matrix(mocker, pps_main):
+    results = {"cpu": [], "cu102": []}
+    resolve_matrix = mocker.patch(
+        mocks.make_target("cli", "commands", "resolve_matrix"), return_value=results
+    )
+
+    out = pps_main("matrix", "torch", "-b", "cpu", "cu102", "--no-sizes")
+
+    args, kwargs = resolve_matrix.call_args
+    assert args == (["torch"], ["cpu", "cu102"])
+    assert not kwargs["sizes"]
+    assert json.loads(out) == results
+
+
+def test_switch(mocker, pps_main):
+    plan = SimpleNamespace(write=[1], remove=[1, 2], keep=[1, 2, 3])
+    switch = mocker.patch(
+        mocks.make_target("cli", "commands", "switch"),
+        return_value={"torch": ("1.7.0+cpu", "1.7.0+cu110", plan)},
+    )
+
+    out = pps_main("switch", "torch", "--computation-backend", "cu110")
+
+    args, kwargs = switch.call_args
+    assert args == ("cu110",)
+    assert kwargs["project_names"] == ["torch"]
+    assert "1.7.0+cpu -> 1.7.0+cu110" in out
+
+
+def test_switch_nothing(mocker, pps_main):
+    mocker.patch(mocks.make_target("cli", "commands", "switch"), return_value={})
+
+    out = pps_main("switch", "--cpu")
+
+    assert out
+
+
+def test_daemon(mocker, pps_main):
+    mocker.patch(
+        mocks.make_target("daemon", "detect_computation_backend"),
+        return_value=pytorch_pip_shim.computation_backend.CPUBackend(),
+    )
+    serve = mocker.patch(mocks.make_target("cli", "commands", "daemon", "serve"))
+
+    out = pps_main("daemon", "--socket", "daemon.sock", "--pre")
+
+    _, kwargs = serve.call_args
+    assert kwargs["socket_path"] == "daemon.sock"
+    assert len(kwargs["preload"]) == 2
+    assert "daemon.sock" in out
+
+
+@pytest.mark.parametrize(
+    ("action", "inserted", "error"),
+    [("insert", 1, False), ("status", 0, True), ("status", 1, False)],
+)
+def test_fleet(mocker, capsys, action, inserted, error):
+    mocker.patch(
+        mocks.make_target("cli", "commands", "fleet", "discover"),
+        return_value=["main.py"],
+    )
+    run = mocker.patch(
+        mocks.make_target("cli", "commands", "fleet", "run"),
+        return_value=dict(action=action, total=1, inserted=inserted, errors=0),
+    )
+
+    with exits_correctly(error=error):
+        pps_cli.main(["fleet", action, "-p", "python", "-j", "2"])
+
+    run.assert_called_once_with(action, ["main.py"], max_workers=2)
+    assert json.loads(capsys.readouterr().out)["action"] == action
+
+
+def test_stats(capsys, cache_dir, tmpdir):
+    run = metrics.Run()
+    run.increment("memoization_hits")
+    run.increment("memoization_misses", 3)
+    metrics.record(run)
+    textfile = path.join(str(tmpdir), "pytorch_pip_shim.prom")
+
+    with exits_correctly(error=False):
+        pps_cli.main(["stats", "--textfile", textfile])
+
+    out = capsys.readouterr().out
+    assert "wall_seconds" in out
+    assert "memoization hit ratio: 25.0%" in out
+    with open(textfile) as fh:
+        assert "pytorch_pip_shim_runs 1" in fh.read()
+
+
+def test_stats_empty(capsys, cache_dir):
+    with exits_correctly(error=True):
+        pps_cli.main(["stats"])
+
+
+def test_bench(mocker, capsys):
+    run = mocker.patch(
+        mocks.make_target("cli", "commands", "bench", "run"),
+        return_value=[dict(name="unpack", value=1.0, unit="MB/s", detail="")],
+    )
+
+    with exits_correctly(error=False):
+        pps_cli.main(["bench", "--cpu", "--unpack-size", "0", "--json"])
+
+    _, kwargs = run.call_args
+    assert kwargs["computation_backend"] == "cpu"
+    assert kwargs["unpack_size"] == 0
+    assert json.loads(capsys.readouterr().out)[0]["name"] == "unpack"
+
+
+@pytest.mark.parametrize("requirement", ["numpy", "torch["])
+def test_matrix_unsupported_requirement(mocker, capsys, requirement):
+    resolve_matrix = mocker.patch(
+        mocks.make_target("cli", "commands", "resolve_matrix")
+    )
+
+    with exits_correctly(code=2):
+        pps_cli.main(["matrix", requirement, "-b", "cpu"])
+
+    resolve_matrix.assert_not_called()
+    _, err = capsys.readouterr()
+    assert "error:" in err
+
+
+def test_wheelhouse(mocker, pps_main, tmpdir):
+    candidates = {"cpu": [], "cu110": []}
+    resolve_wheelhouse = mocker.patch(
+        mocks.make_target("cli", "commands", "wheelhouse", "resolve_wheelhouse"),
+        return_value=candidates,
+    )
+    make_finder = mocker.patch(mocks.make_target("cli", "commands", "make_finder"))
+    entry = dict(status="downloaded")
+    export = mocker.patch(
+        mocks.make_target("cli", "commands", "wheelhouse", "export"),
+        return_value={"cpu": [entry, entry], "cu110": [dict(status="linked")]},
+    )
+    dir = str(tmpdir)
+
+    out = pps_main("wheelhouse", "torch", "-b", "cpu", "cu110", "-d", dir, "-j", "2")
+
+    args, kwargs = resolve_wheelhouse.call_args
+    assert args == (["torch"], ["cpu", "cu110"])
+    assert kwargs["dependencies"]
+    assert make_finder.call_args[1]["index_urls"] == (resolution.PYPI,)
+    assert export.call_args[0] == (candidates, dir)
+    assert export.call_args[1]["max_workers"] == 2
+    assert "cpu: 2 wheels" in out
+    assert "(1 linked)" in out
+
+
+def test_find_links(mocker, pps_main, tmpdir):
+    tmpdir.join("torch-1.7.0+cpu-cp38-cp38-linux_x86_64.whl").write("")
+    dir = str(tmpdir)
+
+    out = pps_main("find-links", dir)
+    assert f"{dir}: 1 files of 1 projects (updated)" in out
+
+    out = pps_main("find-links", dir)
+    assert "(unchanged)" in out
@@ -0,0 +1,80 @@
+import json
+from os import path
+
+import pytest
+
+from pytorch_pip_shim import compatibility
+
+RELEASES = [
+    dict(torch=["1.7.0"], torchvision=["0.8.0", "0.8.1"], torchaudio=["0.7.0"]),
+    dict(torch=["1.7.1"], torchvision=["0.8.2"], torchaudio=["0.7.2"]),
+]
+
+
+@pytest.fixture
+def matrix():
+    return compatibility.Matrix(RELEASES)
+
+
+def test_get_compatible_versions(matrix):
+    assert matrix.get_compatible_versions("torch", "1.7.0", "torchvision") == {
+        "0.8.0",
+        "0.8.1",
+    }
+    assert matrix.get_compatible_versions("torchvision", "0.8.2", "torchaudio") == {
+        "0.7.2"
+    }
+    assert matrix.get_compatible_versions("torch", "1.8.0", "torchvision") is None
+
+
+def test_get_compatible_versions_local(matrix):
+    assert matrix.get_compatible_versions("torch", "1.7.1+cu110", "torchaudio") == {
+        "0.7.2"
+    }
+
+
+@pytest.mark.parametrize(
+    ("pins", "project_name", "version", "compatible"),
+    [
+        (dict(torch="1.7.1+cpu"), "torchvision", "0.8.2+cpu", True),
+        (dict(torch="1.7.1+cpu"), "torchvision", "0.8.1+cpu", False),
+        (dict(torch="1.7.1+cpu"), "torch", "1.7.0+cpu", True),
+        (dict(torchvision="0.8.1"), "torch", "1.7.0", True),
+        (dict(torchvision="0.8.1"), "torchaudio", "0.7.2", False),
+        (dict(torch="1.8.0"), "torchvision", "0.8.1", True),
+        (dict(torch="1.7.1"), "torchtext", "0.8.0", True),
+        (dict(torch="1.7.1", torchvision="0.8.2"), "torchaudio", "0.7.2", True),
+    ],
+)
+def test_is_compatible(matrix, pins, project_name, version, compatible):
+    assert matrix.is_compatible(pins, project_name, version) is compatible
+
+
+def test_load_bundled():
+    matrix = compatibility.load()
+
+    assert matrix.get_compatible_versions("torch", "1.7.1", "torchvision") == {"0.8.2"}
+
+
+def test_load_extended(tmpdir, monkeypatch):
+    file = path.join(str(tmpdir), "compatibility.json")
+    with open(file, "w") as fh:
+        json.dump([dict(torch=["99.0.0"], torchvision=["99.1.0"])], fh)
+    monkeypatch.setenv(compatibility.ENV_VAR, file)
+
+    matrix = compatibility.load()
+
+    assert matrix.get_compatible_versions("torch", "99.0.0", "torchvision") == {
+        "99.1.0"
+    }
+    assert matrix.get_compatible_versions("torch", "1.7.1", "torchvision") == {"0.8.2"}
+
+
+@pytest.mark.parametrize("content", ["{", "{}", '[{"torch": "1.7.1"}]'])
+def test_load_invalid(tmpdir, content):
+    file = path.join(str(tmpdir), "compatibility.json")
+    with open(file, "w") as fh:
+        fh.write(content)
+
+    with pytest.raises(compatibility.CompatibilityError):
+        compatibility.load(file)
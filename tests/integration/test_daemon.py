@@ -0,0 +1,118 @@
+import socket
+import threading
+import time
+from os import path
+
+import pytest
+
+from pip._internal.models.link import Link
+from pip._vendor.packaging.tags import Tag
+
+from pytorch_pip_shim import computation_backend as cb
+from pytorch_pip_shim import daemon
+
+from tests import mocks
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(socket, "AF_UNIX"), reason="Requires support for Unix sockets."
+)
+
+URL = "https://download.pytorch.org/whl/torch_stable.html"
+LINKS = [
+    Link(f"https://download.pytorch.org/whl/{name}", requires_python=">=3.6")
+    for name in (
+        "cpu/torch-1.7.0%2Bcpu-cp38-cp38-linux_x86_64.whl",
+        "cpu/torch-1.7.0%2Bcpu-cp38-cp38-win_amd64.whl",
+        "cu102/torch-1.7.0-cp38-cp38-linux_x86_64.whl",
+        "cpu/torchvision-0.8.1%2Bcpu-cp38-cp38-linux_x86_64.whl",
+    )
+]
+
+
+@pytest.fixture
+def fetch_links(mocker):
+    return mocker.patch(
+        mocks.make_target("daemon", "index", "fetch_links"), return_value=LINKS
+    )
+
+
+@pytest.fixture
+def server(mocker, tmpdir, fetch_links):
+    mocker.patch(
+        mocks.make_target("daemon", "detect_computation_backend"),
+        return_value=cb.CUDABackend(10, 2),
+    )
+    socket_path = path.join(str(tmpdir), "daemon.sock")
+    server = daemon.Daemon(session=object())
+    ready = threading.Event()
+    thread = threading.Thread(
+        target=daemon.serve,
+        args=(server, socket_path),
+        kwargs=dict(ready=ready),
+        daemon=True,
+    )
+    thread.start()
+    ready.wait(5)
+    try:
+        yield socket_path, server
+    finally:
+        server.stop()
+        thread.join(5)
+
+
+def wait_for_page(server, url, timeout=5):
+    deadline = time.monotonic() + timeout
+    while url not in server.pages and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_query_no_daemon(tmpdir):
+    assert daemon.query(dict(command="ping"), socket_path=str(tmpdir / "none")) is None
+
+
+def test_query_ping(server):
+    socket_path, _ = server
+    assert daemon.query(dict(command="ping"), socket_path=socket_path) == dict(ok=True)
+
+
+def test_query_unknown_command(server):
+    socket_path, _ = server
+    assert daemon.query(dict(command="unknown"), socket_path=socket_path) is None
+
+
+def test_detect(server):
+    socket_path, _ = server
+    assert daemon.detect(socket_path=socket_path) == cb.CUDABackend(10, 2)
+
+
+def test_collect_links(server, fetch_links):
+    socket_path, server = server
+
+    def collect_links():
+        return daemon.collect_links(
+            URL,
+            "torch",
+            cb.CPUBackend(),
+            tags=[Tag("cp38", "cp38", "linux_x86_64")],
+            socket_path=socket_path,
+        )
+
+    assert collect_links() is None
+    wait_for_page(server, URL)
+
+    (link,) = collect_links()
+    assert link == LINKS[0]
+    assert link.requires_python == ">=3.6"
+    fetch_links.assert_called_once()
+
+
+def test_serve_removes_socket(server):
+    socket_path, server = server
+    assert path.exists(socket_path)
+
+    server.stop()
+    deadline = time.monotonic() + 5
+    while path.exists(socket_path) and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert not path.exists(socket_path)
@@ -0,0 +1,84 @@
+import json
+from os import path
+
+import pytest
+
+from pytorch_pip_shim import findlinks
+from pytorch_pip_shim.computation_backend import ComputationBackend
+
+FILENAMES = (
+    "torch-1.7.0+cpu-cp38-cp38-linux_x86_64.whl",
+    "torch-1.7.0+cu110-cp38-cp38-linux_x86_64.whl",
+    "torchtext-0.8.0-cp38-cp38-linux_x86_64.whl",
+    "numpy-1.19.4-cp38-cp38-manylinux2010_x86_64.whl",
+    "some-package-1.0.tar.gz",
+)
+
+
+@pytest.fixture
+def wheel_dir(tmpdir):
+    for filename in FILENAMES:
+        tmpdir.join(filename).write("")
+    return str(tmpdir)
+
+
+def get_filenames(links):
+    return sorted(link.filename for link in links)
+
+
+def test_build(wheel_dir):
+    idx, changed = findlinks.build(wheel_dir)
+
+    assert changed
+    assert idx.filenames == set(FILENAMES)
+    with open(path.join(wheel_dir, findlinks.INDEX_FILE)) as fh:
+        assert json.load(fh)["projects"]["torch"] == {
+            "cpu": ["torch-1.7.0+cpu-cp38-cp38-linux_x86_64.whl"],
+            "cu110": ["torch-1.7.0+cu110-cp38-cp38-linux_x86_64.whl"],
+        }
+
+
+def test_get_links(wheel_dir):
+    idx, _ = findlinks.build(wheel_dir)
+
+    assert get_filenames(
+        idx.get_links("torch", ComputationBackend.from_str("cu110"))
+    ) == [
+        "some-package-1.0.tar.gz",
+        "torch-1.7.0+cu110-cp38-cp38-linux_x86_64.whl",
+    ]
+    assert get_filenames(
+        idx.get_links("torchtext", ComputationBackend.from_str("cpu"))
+    ) == [
+        "some-package-1.0.tar.gz",
+        "torchtext-0.8.0-cp38-cp38-linux_x86_64.whl",
+    ]
+    assert len(idx.get_links("torch")) == 3
+    assert all(link.url.startswith("file://") for link in idx.get_links("numpy"))
+
+
+def test_build_incremental(wheel_dir, tmpdir, mocker):
+    findlinks.build(wheel_dir)
+    tmpdir.join("torch-1.7.1+cpu-cp38-cp38-linux_x86_64.whl").write("")
+    tmpdir.join(FILENAMES[3]).remove()
+    classify = mocker.spy(findlinks, "classify")
+
+    idx, changed = findlinks.build(wheel_dir)
+
+    assert changed
+    classify.assert_called_once_with("torch-1.7.1+cpu-cp38-cp38-linux_x86_64.whl")
+    assert "numpy" not in idx.projects
+    assert len(findlinks.load(wheel_dir).projects["torch"]["cpu"]) == 2
+
+    _, changed = findlinks.build(wheel_dir)
+    assert not changed
+
+
+def test_load_location(wheel_dir):
+    assert findlinks.load_location(wheel_dir) is None
+
+    findlinks.build(wheel_dir)
+
+    assert findlinks.load_location(wheel_dir).filenames == set(FILENAMES)
+    assert findlinks.load_location(f"file://{wheel_dir}") is not None
+    assert findlinks.load_location("https://example.com/wheels/") is None
@@ -0,0 +1,87 @@
+import os
+import sys
+from os import path
+
+import pytest
+
+from pytorch_pip_shim import fleet, shim
+
+MAIN_CONTENT = "def main(args=None):\n    return 0\n"
+
+
+def make_env(root, *site_packages):
+    dir = path.join(root, *site_packages, "pip", "_internal", "cli")
+    os.makedirs(dir)
+    file = path.join(dir, "main.py")
+    with open(file, "w") as fh:
+        fh.write(MAIN_CONTENT)
+    return file
+
+
+@pytest.fixture
+def envs(tmpdir):
+    root = str(tmpdir)
+    return root, [
+        make_env(root, "lib", "python3.8", "site-packages"),
+        make_env(root, "envs", "a", "lib", "python3.7", "site-packages"),
+        make_env(root, "envs", "b", "Lib", "site-packages"),
+    ]
+
+
+def test_scan(envs):
+    root, (base, a, b) = envs
+
+    assert fleet.scan(root) == [base]
+    assert fleet.scan(path.join(root, "envs")) == sorted([a, b])
+
+
+def test_find_pip_main():
+    assert fleet.find_pip_main(sys.executable) == shim.FILE
+
+
+def test_find_pip_main_unknown_interpreter(tmpdir):
+    assert fleet.find_pip_main(path.join(str(tmpdir), "python")) is None
+
+
+def test_discover(envs):
+    root, files = envs
+
+    discovered = fleet.discover(
+        interpreters=[sys.executable], roots=[root, path.join(root, "envs")]
+    )
+
+    assert discovered == sorted([*files, shim.FILE])
+
+
+def test_run(envs):
+    root, files = envs
+
+    summary = fleet.run("status", files, max_workers=2)
+    assert summary["total"] == 3
+    assert summary["inserted"] == 0
+
+    summary = fleet.run("insert", files, max_workers=2)
+    assert summary["inserted"] == 3
+    assert summary["errors"] == 0
+    assert all(shim.is_inserted(file) for file in files)
+
+    summary = fleet.run("remove", files, max_workers=2)
+    assert summary["inserted"] == 0
+    for file in files:
+        with open(file) as fh:
+            assert fh.read() == MAIN_CONTENT
+
+
+def test_run_error(tmpdir):
+    file = path.join(str(tmpdir), "main.py")
+
+    summary = fleet.run("status", [file], max_workers=1)
+
+    assert summary["errors"] == 1
+    (result,) = summary["results"]
+    assert result["error"].startswith("FileNotFoundError")
+
+
+def test_run_unknown_action():
+    with pytest.raises(ValueError):
+        fleet.run("unknown", [])
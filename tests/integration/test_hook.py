@@ -0,0 +1,84 @@
+import importlib.util
+import os
+import subprocess
+import sys
+from os import path
+
+import pytest
+
+from pip._internal import cli
+
+import pytorch_pip_shim
+from pytorch_pip_shim import hook, shim
+
+ROOT = path.abspath(path.join(path.dirname(pytorch_pip_shim.__file__), ".."))
+
+
+def run_python(code):
+    env = os.environ.copy()
+    env["PYTHONPATH"] = os.pathsep.join((ROOT, *filter(None, [env.get("PYTHONPATH")])))
+    return subprocess.run(
+        [sys.executable, "-c", code],
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+
+
+def test_find_spec_other():
+    assert hook.PipMainFinder().find_spec("pip", None) is None
+
+
+def test_find_spec():
+    spec = hook.PipMainFinder().find_spec(hook.TARGET, cli.__path__)
+    assert isinstance(spec.loader, hook.PipMainLoader)
+
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    assert hasattr(module.main, "__wrapped__")
+
+
+def test_insert_remove_hook(tmpdir):
+    file = path.join(str(tmpdir), "pytorch-pip-shim.pth")
+    assert not shim.is_hook_inserted(file)
+
+    shim.insert_hook(file)
+    assert shim.is_hook_inserted(file)
+    with open(file) as fh:
+        (line,) = fh.readlines()
+    assert line.startswith("import ")
+    assert shim.HOOK in line
+
+    shim.remove_hook(file)
+    assert not shim.is_hook_inserted(file)
+
+
+@pytest.mark.slow
+def test_pth(tmpdir):
+    shim.insert_hook(path.join(str(tmpdir), "pytorch-pip-shim.pth"))
+
+    result = run_python(
+        "import site, sys; "
+        f"site.addsitedir({str(tmpdir)!r}); "
+        "assert 'pytorch_pip_shim' not in sys.modules; "
+        "assert 'pip' not in sys.modules; "
+        "from pip._internal.cli import main; "
+        "print(hasattr(main.main, '__wrapped__'))"
+    )
+
+    assert result.stdout.strip() == "True"
+
+
+@pytest.mark.slow
+def test_pth_missing_hook(tmpdir):
+    shim.insert_hook(
+        path.join(str(tmpdir), "pytorch-pip-shim.pth"),
+        hook=path.join(str(tmpdir), "missing.py"),
+    )
+
+    result = run_python(f"import site; site.addsitedir({str(tmpdir)!r})")
+
+    assert not result.stderr
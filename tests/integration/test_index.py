@@ -0,0 +1,322 @@
+import json
+
+import pytest
+
+from pip._internal.models.link import Link
+from pip._vendor.packaging.specifiers import SpecifierSet
+from pip._vendor.packaging.tags import Tag
+
+from pytorch_pip_shim import computation_backend as cb
+from pytorch_pip_shim import index, metrics
+
+
+@pytest.mark.parametrize(
+    ("computation_backend", "nightly", "url"),
+    [
+        (cb.CPUBackend(), False, "https://download.pytorch.org/whl/torch_stable.html"),
+        (
+            cb.CUDABackend(10, 2),
+            True,
+            "https://download.pytorch.org/whl/nightly/cu102/torch_nightly.html",
+        ),
+    ],
+)
+def test_make_url(computation_backend, nightly, url):
+    assert index.make_url(computation_backend, nightly) == url
+
+
+def test_make_url_base():
+    base = "https://mirror.example.com/pytorch/"
+    assert index.make_url(cb.CPUBackend(), False, base=base).startswith(base)
+
+
+def test_parse():
+    url = "https://download.pytorch.org/whl/torch_stable.html"
+    content = "\n".join(
+        (
+            "<html><body>",
+            '<a href="cpu/torch-1.7.0%2Bcpu-cp38-cp38-linux_x86_64.whl">'
+            "cpu/torch-1.7.0%2Bcpu-cp38-cp38-linux_x86_64.whl</a><br>",
+            '<a href="cu102/torchvision-0.8.1-cp38-cp38-linux_x86_64.whl" '
+            'data-requires-python="&gt;=3.6">',
+            "cu102/torchvision-0.8.1-cp38-cp38-linux_x86_64.whl</a><br>",
+            "<a>no href</a>",
+            "</body></html>",
+        )
+    )
+
+    links = index.parse(content, url)
+
+    assert [link.filename for link in links] == [
+        "torch-1.7.0+cpu-cp38-cp38-linux_x86_64.whl",
+        "torchvision-0.8.1-cp38-cp38-linux_x86_64.whl",
+    ]
+    assert links[0].url.startswith("https://download.pytorch.org/whl/cpu/")
+    assert links[1].requires_python == ">=3.6"
+
+
+STABLE = "https://download.pytorch.org/whl/torch_stable.html"
+NAMES = [
+    "cpu/torch-1.6.0%2Bcpu-cp38-cp38-linux_x86_64.whl",
+    "cpu/torch-1.7.0%2Bcpu-cp38-cp38-linux_x86_64.whl",
+    "cpu/torch-1.7.0%2Bcpu-cp38-cp38-macosx_10_9_x86_64.whl",
+    "cpu/torch-1.7.0%2Bcpu-cp38-cp38-win_amd64.whl",
+    "cpu/torch-1.7.1%2Bcpu-cp38-cp38-linux_x86_64.whl",
+    "cpu/torchvision-0.8.1%2Bcpu-cp38-cp38-linux_x86_64.whl",
+    "cu102/torch-1.7.0-cp38-cp38-linux_x86_64.whl",
+    "torch-1.7.0-cp38-none-macosx_10_9_x86_64.whl",
+]
+CONTENT = "<html><body>\n{}\n</body></html>".format(
+    "\n".join(f'<a href="{name}">{name}</a><br>' for name in NAMES)
+)
+
+
+class StreamingSessionMock:
+    def __init__(self, content=CONTENT, content_type="text/html"):
+        self.content = content.encode("utf-8")
+        self.content_type = content_type
+        self.chunks_read = 0
+
+    def get(self, url, **kwargs):
+        session = self
+
+        class ResponseMock:
+            encoding = "utf-8"
+            headers = {"Content-Type": session.content_type}
+            text = session.content.decode("utf-8")
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc_info):
+                pass
+
+            def raise_for_status(self):
+                pass
+
+            def iter_content(self, chunk_size):
+                content = session.content
+                for idx in range(0, len(content), chunk_size):
+                    session.chunks_read += 1
+                    yield content[idx : idx + chunk_size]
+
+        return ResponseMock()
+
+
+def test_iter_links_chunked():
+    session = StreamingSessionMock()
+
+    links = list(index.iter_links(STABLE, session=session, chunk_size=7))
+
+    assert [link.url for link in links] == [
+        f"https://download.pytorch.org/whl/{name}" for name in NAMES
+    ]
+    assert session.chunks_read > len(NAMES)
+
+
+def test_iter_links_multibyte():
+    session = StreamingSessionMock('<a href="torch-1.7.0-py3-none-any.whl">ä</a>' * 2)
+
+    assert len(list(index.iter_links(STABLE, session=session, chunk_size=1))) == 2
+
+
+@pytest.mark.parametrize(
+    ("name", "computation_backend"),
+    [
+        ("cpu/torch-1.7.0%2Bcpu-cp38-cp38-linux_x86_64.whl", "cpu"),
+        ("cu102/torch-1.7.0-cp38-cp38-linux_x86_64.whl", "cu102"),
+        ("torch-1.7.0%2Bcu110-cp38-cp38-linux_x86_64.whl", "cu110"),
+        ("torch-1.7.0-cp38-none-macosx_10_9_x86_64.whl", None),
+    ],
+)
+def test_get_computation_backend(name, computation_backend):
+    link = Link(f"https://download.pytorch.org/whl/{name}")
+    assert index.get_computation_backend(link) == computation_backend
+
+
+def collect_links(session, project_name="torch", computation_backend="cpu", **kwargs):
+    links, complete = index.collect_links(
+        STABLE,
+        session,
+        project_name,
+        cb.ComputationBackend.from_str(computation_backend),
+        **kwargs,
+    )
+    return [link.filename for link in links], complete
+
+
+def test_collect_links():
+    filenames, complete = collect_links(StreamingSessionMock())
+
+    assert complete
+    assert filenames == [
+        "torch-1.6.0+cpu-cp38-cp38-linux_x86_64.whl",
+        "torch-1.7.0+cpu-cp38-cp38-linux_x86_64.whl",
+        "torch-1.7.0+cpu-cp38-cp38-macosx_10_9_x86_64.whl",
+        "torch-1.7.0+cpu-cp38-cp38-win_amd64.whl",
+        "torch-1.7.1+cpu-cp38-cp38-linux_x86_64.whl",
+        "torch-1.7.0-cp38-none-macosx_10_9_x86_64.whl",
+    ]
+
+
+def test_collect_links_metrics():
+    session = StreamingSessionMock()
+    run = metrics.Run()
+
+    filenames, _ = collect_links(session, run=run)
+
+    assert run.values["index_bytes"] == len(session.content)
+    assert run.values["index_links_seen"] == len(NAMES)
+    assert run.values["index_links_kept"] == len(filenames)
+
+
+def test_collect_links_pinned_without_tags():
+    _, complete = collect_links(
+        StreamingSessionMock(), specifier=SpecifierSet("==1.7.0")
+    )
+
+    assert complete
+
+
+@pytest.mark.parametrize(
+    ("tag", "expected"),
+    [
+        (
+            Tag("cp38", "cp38", "linux_x86_64"),
+            ["torch-1.7.0+cpu-cp38-cp38-linux_x86_64.whl"],
+        ),
+        (
+            Tag("cp38", "cp38", "win_amd64"),
+            ["torch-1.7.0+cpu-cp38-cp38-win_amd64.whl"],
+        ),
+    ],
+)
+def test_collect_links_pinned_early_termination(tag, expected):
+    session = StreamingSessionMock()
+
+    filenames, complete = collect_links(
+        session, specifier=SpecifierSet("==1.7.0"), tags=[tag]
+    )
+
+    assert not complete
+    assert filenames == expected
+
+
+def test_collect_links_page_cache(mocker):
+    session = StreamingSessionMock()
+    get = mocker.spy(session, "get")
+    pages = index.PageCache()
+
+    torch, _ = collect_links(session, pages=pages)
+    torchvision, _ = collect_links(session, project_name="torchvision", pages=pages)
+    torch_again, _ = collect_links(session, pages=pages)
+
+    assert get.call_count == 1
+    assert torch == torch_again == collect_links(StreamingSessionMock())[0]
+    assert torchvision == ["torchvision-0.8.1+cpu-cp38-cp38-linux_x86_64.whl"]
+
+
+def test_collect_links_page_cache_pinned(mocker):
+    session = StreamingSessionMock()
+    get = mocker.spy(session, "get")
+    pages = index.PageCache()
+
+    _, complete = collect_links(
+        session,
+        specifier=SpecifierSet("==1.7.0"),
+        tags=[Tag("cp38", "cp38", "linux_x86_64")],
+        pages=pages,
+    )
+    assert not complete
+    assert not pages.get(STABLE, session=session).complete
+
+    torchvision, _ = collect_links(session, project_name="torchvision", pages=pages)
+
+    assert get.call_count == 1
+    assert torchvision == ["torchvision-0.8.1+cpu-cp38-cp38-linux_x86_64.whl"]
+
+
+def iter_failing():
+    raise OSError
+    yield
+
+
+def test_page_cache_failed(mocker):
+    session = StreamingSessionMock()
+    pages = index.PageCache()
+    mocker.patch.object(
+        index, "iter_links", side_effect=[iter_failing(), iter([])], autospec=True
+    )
+
+    with pytest.raises(OSError):
+        list(pages.get(STABLE, session=session).iter_links("torch"))
+
+    assert list(pages.get(STABLE, session=session).iter_links("torch")) == []
+
+
+JSON_CONTENT = json.dumps(
+    {
+        "meta": {"api-version": "1.0"},
+        "name": "torch",
+        "files": [
+            {
+                "filename": "torch-1.7.0+cpu-cp38-cp38-linux_x86_64.whl",
+                "url": "cpu/torch-1.7.0%2Bcpu-cp38-cp38-linux_x86_64.whl",
+                "hashes": {"sha256": "abc"},
+                "requires-python": ">=3.6",
+            },
+            {
+                "filename": "torch-1.6.0+cpu-cp38-cp38-linux_x86_64.whl",
+                "url": "https://example.com/torch-1.6.0%2Bcpu-cp38-cp38-linux_x86_64.whl",
+                "hashes": {},
+                "yanked": "broken",
+            },
+            {"filename": "no-url"},
+        ],
+    }
+)
+
+
+def test_parse_json():
+    links = index.parse_json(JSON_CONTENT, STABLE)
+
+    assert [link.filename for link in links] == [
+        "torch-1.7.0+cpu-cp38-cp38-linux_x86_64.whl",
+        "torch-1.6.0+cpu-cp38-cp38-linux_x86_64.whl",
+    ]
+    assert links[0].url.startswith("https://download.pytorch.org/whl/cpu/")
+    assert links[0].hash_name == "sha256"
+    assert links[0].hash == "abc"
+    assert links[0].requires_python == ">=3.6"
+    assert not links[0].is_yanked
+    assert links[1].url.startswith("https://example.com/")
+    assert links[1].yanked_reason == "broken"
+
+
+@pytest.mark.parametrize(
+    ("content", "content_type"),
+    [
+        (CONTENT, "text/html"),
+        (JSON_CONTENT, "application/vnd.pypi.simple.v1+json; charset=utf-8"),
+    ],
+)
+def test_iter_links_negotiation(content, content_type):
+    session = StreamingSessionMock(content, content_type=content_type)
+
+    links = list(index.iter_links(STABLE, session=session))
+
+    assert any(
+        link.filename == "torch-1.7.0+cpu-cp38-cp38-linux_x86_64.whl" for link in links
+    )
+
+
+def test_fetch_links_json():
+    session = StreamingSessionMock(
+        JSON_CONTENT, content_type="application/vnd.pypi.simple.v1+json"
+    )
+
+    assert len(index.fetch_links(STABLE, session=session)) == 2
+
+
+def test_accept_prefers_json():
+    assert index.ACCEPT.startswith("application/vnd.pypi.simple.v1+json")
@@ -0,0 +1,105 @@
+from os import path
+from types import SimpleNamespace
+
+import pytest
+
+import pip
+from pip._vendor.packaging.specifiers import SpecifierSet
+
+from pytorch_pip_shim import computation_backend as cb
+from pytorch_pip_shim import installation
+
+from tests import mocks
+
+
+@pytest.fixture
+def patch_distribution(mocker):
+    def patch_distribution_(version, project_name="torch"):
+        return mocker.patch(
+            mocks.make_target("installation", "get_distribution"),
+            return_value=SimpleNamespace(
+                project_name=project_name, version=version, location="/site-packages"
+            ),
+        )
+
+    return patch_distribution_
+
+
+@pytest.mark.parametrize(
+    ("specifier", "pinned"),
+    [
+        (None, False),
+        (SpecifierSet(""), False),
+        (SpecifierSet(">=1.6"), False),
+        (SpecifierSet("==1.7.*"), False),
+        (SpecifierSet("==1.7.0"), True),
+        (SpecifierSet("===1.7.0+cpu"), True),
+    ],
+)
+def test_is_pinned(specifier, pinned):
+    assert installation.is_pinned(specifier) is pinned
+
+
+def test_get_distribution():
+    dist = installation.get_distribution("Pip")
+
+    assert dist.project_name == "pip"
+    assert dist.version == pip.__version__
+    assert dist.egg_info == path.join(dist.location, f"pip-{pip.__version__}.dist-info")
+    assert path.isdir(path.join(dist.location, "pip"))
+
+
+def test_get_distribution_not_installed():
+    assert installation.get_distribution("pytorch-pip-shim-not-installed") is None
+
+
+def test_find_installed_candidates_not_installed(mocker):
+    mocker.patch(
+        mocks.make_target("installation", "get_distribution"), return_value=None
+    )
+
+    assert (
+        installation.find_installed_candidates("torch", None, cb.CPUBackend()) is None
+    )
+
+
+def test_find_installed_candidates(patch_distribution):
+    patch_distribution("1.7.0+cpu")
+
+    (candidate,) = installation.find_installed_candidates(
+        "torch", SpecifierSet(">=1.6"), cb.CPUBackend()
+    )
+
+    assert candidate.name == "torch"
+    assert str(candidate.version) == "1.7.0+cpu"
+
+
+@pytest.mark.parametrize(
+    ("version", "specifier", "kwargs"),
+    [
+        pytest.param("1.7.0", None, {}, id="no local"),
+        pytest.param("1.7.0+cu110", None, {}, id="other computation backend"),
+        pytest.param("1.7.0+cpu", SpecifierSet("<1.7"), {}, id="unsatisfied"),
+        pytest.param("1.8.0.dev20201204+cpu", None, {}, id="prerelease"),
+        pytest.param(
+            "1.7.0+cpu", SpecifierSet(">=1.6"), dict(upgrade=True), id="upgrade"
+        ),
+    ],
+)
+def test_find_installed_candidates_miss(patch_distribution, version, specifier, kwargs):
+    patch_distribution(version)
+
+    assert (
+        installation.find_installed_candidates(
+            "torch", specifier, cb.CPUBackend(), **kwargs
+        )
+        is None
+    )
+
+
+def test_find_installed_candidates_upgrade_pinned(patch_distribution):
+    patch_distribution("1.7.0+cpu")
+
+    assert installation.find_installed_candidates(
+        "torch", SpecifierSet("==1.7.0"), cb.CPUBackend(), upgrade=True
+    )
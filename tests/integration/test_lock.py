@@ -0,0 +1,96 @@
+import hashlib
+import io
+
+import pytest
+
+from pip._internal.models.candidate import InstallationCandidate
+from pip._internal.models.link import Link
+
+from pytorch_pip_shim import lock
+
+URL = (
+    "https://download.pytorch.org/whl/cpu/torch-1.7.0%2Bcpu-cp38-cp38-linux_x86_64.whl"
+)
+
+
+class SessionMock:
+    def __init__(self, content):
+        self.content = content
+        self.urls = []
+
+    def get(self, url, stream=False):
+        self.urls.append(url)
+        return ResponseMock(self.content)
+
+
+class ResponseMock:
+    def __init__(self, content):
+        self.content = content
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for idx in range(0, len(self.content), chunk_size):
+            yield self.content[idx : idx + chunk_size]
+
+
+def make_candidate(url=URL):
+    return InstallationCandidate("torch", "1.7.0+cpu", Link(url))
+
+
+def test_compute_hash_from_link():
+    hash = "0" * 64
+    session = SessionMock(b"")
+
+    assert lock.compute_hash(Link(f"{URL}#sha256={hash}"), session=session) == hash
+    assert not session.urls
+
+
+def test_compute_hash_download():
+    content = b"wheel" * 1024
+    session = SessionMock(content)
+
+    assert (
+        lock.compute_hash(Link(f"{URL}#md5=abc"), session=session)
+        == hashlib.sha256(content).hexdigest()
+    )
+    assert session.urls == [URL]
+
+
+@pytest.mark.parametrize("hash", [None, "0" * 64])
+def test_format_requirement(hash):
+    line = lock.format_requirement(make_candidate(), hash)
+
+    assert line.startswith(f"torch @ {URL}")
+    assert (f"--hash=sha256:{hash}" in line) is (hash is not None)
+
+
+def test_write_no_hashes():
+    session = SessionMock(b"")
+    with io.StringIO() as fh:
+        lock.write(fh, [make_candidate()], hashes=False, session=session)
+        content = fh.getvalue()
+
+    assert content == f"torch @ {URL}\n"
+    assert not session.urls
+
+
+def test_read_requirements(tmpdir):
+    file = tmpdir.join("requirements.txt")
+    file.write("# comment\ntorch>=1.6\n\ntorchvision\n")
+
+    assert lock.read_requirements(str(file)) == ["torch>=1.6", "torchvision"]
+
+
+def test_download_hash_mismatch():
+    session = SessionMock(b"wheel")
+
+    with pytest.raises(lock.HashMismatchError):
+        lock.download(Link(f"{URL}#sha256={'0' * 64}"), session=session)
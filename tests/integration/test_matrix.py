@@ -0,0 +1,198 @@
+import json
+import re
+from unittest import mock
+
+import pytest
+
+from pip._internal.index import package_finder
+from pip._internal.models.link import Link
+
+from pytorch_pip_shim import computation_backend as cb
+from pytorch_pip_shim import index, matrix
+from pytorch_pip_shim.compatibility import Matrix
+
+from tests import mocks
+
+FILENAME_PATTERN = re.compile(r"^(?P<name>[^-]+)-(?P<version>[^-]+)-")
+
+STABLE = "https://download.pytorch.org/whl/torch_stable.html"
+NAMES = [
+    "cpu/torch-1.7.0%2Bcpu-cp38-cp38-linux_x86_64.whl",
+    "cpu/torch-1.6.0%2Bcpu-cp38-cp38-linux_x86_64.whl",
+    "cu102/torch-1.7.0-cp38-cp38-linux_x86_64.whl",
+    "cu110/torch-1.7.0%2Bcu110-cp38-cp38-linux_x86_64.whl",
+    "cpu/torchvision-0.8.1%2Bcpu-cp38-cp38-linux_x86_64.whl",
+]
+
+
+class LinkEvaluatorMock:
+    def __init__(self, project_name):
+        self.project_name = project_name
+
+    def evaluate_link(self, link):
+        match = FILENAME_PATTERN.match(link.filename)
+        if match is None or match.group("name") != self.project_name:
+            return False, "wrong project name"
+        return True, match.group("version")
+
+
+class LinkTypeEvaluatorMock(LinkEvaluatorMock):
+    # Mimics pip>=22.2, which returns a LinkType instead of a bool
+    def __init__(self, project_name, link_type):
+        super().__init__(project_name)
+        self.link_type = link_type
+
+    def evaluate_link(self, link):
+        is_candidate, result = super().evaluate_link(link)
+        return (
+            self.link_type.candidate
+            if is_candidate
+            else self.link_type.different_project
+        ), result
+
+
+class CandidateEvaluatorMock:
+    def __init__(self, specifier):
+        self.specifier = specifier
+
+    def compute_best_candidate(self, candidates):
+        candidates = [
+            candidate
+            for candidate in candidates
+            if self.specifier.contains(candidate.version, prereleases=True)
+        ]
+
+        class Result:
+            best_candidate = (
+                max(candidates, key=lambda candidate: candidate.version)
+                if candidates
+                else None
+            )
+
+        return Result
+
+
+class FinderMock:
+    def __init__(self):
+        self.evaluated = []
+
+    def make_link_evaluator(self, project_name):
+        self.evaluated.append(project_name)
+        return LinkEvaluatorMock(project_name)
+
+    def make_candidate_evaluator(self, project_name, specifier=None):
+        return CandidateEvaluatorMock(specifier)
+
+
+@pytest.fixture
+def patch_fetch(mocker):
+    return mocker.patch(
+        mocks.make_target("matrix", "index", "fetch_links"),
+        return_value=index.parse(
+            "".join(f'<a href="{name}">{name}</a>' for name in NAMES), STABLE
+        ),
+    )
+
+
+def test_resolve_matrix(patch_fetch):
+    finder = FinderMock()
+    backends = [cb.CPUBackend(), cb.CUDABackend(10, 2), cb.CUDABackend(9, 2)]
+
+    results = matrix.resolve_matrix(
+        ["torch", "torchvision"], backends, finder=finder, session=object(), sizes=False
+    )
+
+    assert set(results) == {"cpu", "cu102", "cu92"}
+    cpu_torch, cpu_torchvision = results["cpu"]
+    assert cpu_torch["version"] == "1.7.0+cpu"
+    assert cpu_torch["url"] == f"https://download.pytorch.org/whl/{NAMES[0]}"
+    assert cpu_torchvision["version"] == "0.8.1+cpu"
+    assert results["cu102"][0]["version"] == "1.7.0+cu102"
+    assert results["cu92"][0]["version"] is None
+    json.dumps(results)
+
+    patch_fetch.assert_called_once_with(STABLE, session=mock.ANY)
+    assert sorted(finder.evaluated) == ["torch", "torchvision"]
+
+
+def test_resolve_matrix_specifier(patch_fetch):
+    results = matrix.resolve_matrix(
+        ["torch<1.7"],
+        [cb.CPUBackend()],
+        finder=FinderMock(),
+        session=object(),
+        sizes=False,
+    )
+
+    assert results["cpu"][0]["version"] == "1.6.0+cpu"
+
+
+def test_resolve_matrix_no_pytorch_distribution():
+    with pytest.raises(ValueError):
+        matrix.resolve_matrix(
+            ["numpy"], [cb.CPUBackend()], finder=FinderMock(), session=object()
+        )
+
+
+def test_parse_requirement():
+    req = matrix.parse_requirement("TorchVision>=0.8")
+
+    assert req.name == "torchvision"
+    assert str(req.specifier) == ">=0.8"
+
+
+def test_resolve_matrix_pruning(mocker):
+    names = [
+        "cpu/torch-1.7.0%2Bcpu-cp38-cp38-linux_x86_64.whl",
+        "cpu/torchvision-0.8.1%2Bcpu-cp38-cp38-linux_x86_64.whl",
+        "cpu/torchvision-0.8.2%2Bcpu-cp38-cp38-linux_x86_64.whl",
+    ]
+    mocker.patch(
+        mocks.make_target("matrix", "index", "fetch_links"),
+        return_value=index.parse(
+            "".join(f'<a href="{name}">{name}</a>' for name in names), STABLE
+        ),
+    )
+
+    results = matrix.resolve_matrix(
+        ["torchvision", "torch==1.7.0"],
+        [cb.CPUBackend()],
+        finder=FinderMock(),
+        session=object(),
+        sizes=False,
+        matrix=Matrix(
+            [
+                dict(torch=["1.7.0"], torchvision=["0.8.1"]),
+                dict(torch=["1.7.1"], torchvision=["0.8.2"]),
+            ]
+        ),
+    )
+
+    torchvision, torch = results["cpu"]
+    assert torchvision["version"] == "0.8.1+cpu"
+    assert torch["version"] == "1.7.0+cpu"
+
+
+def test_evaluate_links_link_type():
+    link_type = getattr(package_finder, "LinkType", None)
+    if link_type is None:
+        pytest.skip("pip<22.2 does not return a LinkType")
+
+    finder = mock.Mock(
+        make_link_evaluator=lambda project_name: LinkTypeEvaluatorMock(
+            project_name, link_type
+        )
+    )
+    links = [Link(f"https://download.pytorch.org/whl/{name}") for name in NAMES]
+
+    candidates = matrix.evaluate_links(finder, "torchvision", links)
+
+    assert [str(candidate.version) for candidate in candidates] == ["0.8.1+cpu"]
+
+
+def test_fetch_size_failure():
+    class SessionMock:
+        def head(self, *args, **kwargs):
+            raise OSError
+
+    assert matrix.fetch_size(SessionMock(), Link(STABLE)) is None
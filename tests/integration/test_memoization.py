@@ -0,0 +1,109 @@
+from pip._internal.models.candidate import InstallationCandidate
+from pip._internal.models.link import Link
+from pip._vendor.packaging.specifiers import SpecifierSet
+
+from pytorch_pip_shim import computation_backend as cb
+from pytorch_pip_shim import memoization
+
+URL = "https://download.pytorch.org/whl/torch_stable.html"
+
+
+def make_key(**kwargs):
+    kwargs_ = dict(
+        project_name="torch",
+        specifier=SpecifierSet(">=1.6"),
+        tags=["cp38-cp38-linux_x86_64"],
+        computation_backend=cb.CPUBackend(),
+        url=URL,
+        index_version='"etag"',
+    )
+    kwargs_.update(kwargs)
+    return memoization.make_key(**kwargs_)
+
+
+def test_make_key_stable():
+    assert make_key() == make_key()
+    assert make_key(specifier=SpecifierSet("<2,>=1.6")) == make_key(
+        specifier=SpecifierSet(">=1.6,<2")
+    )
+
+
+def test_make_key_inputs():
+    key = make_key()
+
+    assert make_key(specifier=SpecifierSet(">=1.7")) != key
+    assert make_key(tags=["cp39-cp39-linux_x86_64"]) != key
+    assert make_key(computation_backend=cb.CUDABackend(10, 2)) != key
+    assert make_key(index_version='"other"') != key
+
+
+def test_store_load_roundtrip(cache_dir):
+    key = make_key()
+    candidate = InstallationCandidate(
+        "torch",
+        "1.7.0+cpu",
+        Link(
+            "https://download.pytorch.org/whl/cpu/torch-1.7.0%2Bcpu-cp38-cp38-linux_x86_64.whl",
+            requires_python=">=3.6",
+        ),
+    )
+
+    memoization.store(key, [candidate])
+    (loaded,) = memoization.load(key)
+
+    assert loaded == candidate
+    assert loaded.link.requires_python == ">=3.6"
+
+
+def test_store_load_roundtrip_yanked(cache_dir):
+    key = make_key()
+    candidate = InstallationCandidate(
+        "torch",
+        "1.7.0+cpu",
+        Link(
+            "https://download.pytorch.org/whl/cpu/torch-1.7.0%2Bcpu-cp38-cp38-linux_x86_64.whl",
+            yanked_reason="broken build",
+        ),
+    )
+
+    memoization.store(key, [candidate])
+    (loaded,) = memoization.load(key)
+
+    assert loaded.link.is_yanked
+    assert loaded.link.yanked_reason == "broken build"
+
+
+def test_load_missing_yanked_reason(cache_dir):
+    key = make_key()
+    memoization.cache.store(
+        memoization.get_file(key),
+        [
+            dict(
+                name="torch",
+                version="1.7.0+cpu",
+                url="https://download.pytorch.org/whl/cpu/torch-1.7.0%2Bcpu-cp38-cp38-linux_x86_64.whl",
+                requires_python=None,
+            )
+        ],
+    )
+
+    assert memoization.load(key) is None
+
+
+def test_load_miss(cache_dir):
+    assert memoization.load(make_key()) is None
+
+
+def test_get_index_version():
+    class ResponseMock:
+        headers = {"ETag": '"etag"'}
+
+        def raise_for_status(self):
+            pass
+
+    class SessionMock:
+        def head(self, url, **kwargs):
+            return ResponseMock()
+
+    memoization.get_index_version.cache_clear()
+    assert memoization.get_index_version(SessionMock(), URL) == '"etag"'
@@ -0,0 +1,98 @@
+from os import path
+
+import pytest
+
+from pytorch_pip_shim import metrics
+
+
+def make_run(**values):
+    run = metrics.Run()
+    for name, value in values.items():
+        run.increment(name, value)
+    return run
+
+
+def test_run():
+    run = metrics.Run()
+    run.increment("links")
+    run.increment("links", 2)
+    run.label("detection_source", "nvcc")
+    with run.timer("fetch_seconds"):
+        pass
+
+    obj = run.finish()
+    assert obj["labels"] == dict(detection_source="nvcc")
+    assert obj["values"]["links"] == 3
+    assert obj["values"]["fetch_seconds"] >= 0
+    assert obj["values"]["wall_seconds"] >= obj["values"]["fetch_seconds"]
+
+
+def test_record_load(cache_dir):
+    for idx in range(3):
+        metrics.record(make_run(idx=idx))
+
+    assert [run["values"]["idx"] for run in metrics.load()] == [0, 1, 2]
+    assert [run["values"]["idx"] for run in metrics.load(last=2)] == [1, 2]
+
+
+def test_record_disabled(cache_dir, monkeypatch):
+    monkeypatch.setenv(metrics.DISABLE_ENV_VAR, "1")
+
+    metrics.record(make_run())
+
+    assert not path.exists(metrics.get_file())
+
+
+def test_record_truncate(cache_dir):
+    for idx in range(100):
+        metrics.record(make_run(idx=idx), max_size=1000)
+
+    idcs = [run["values"]["idx"] for run in metrics.load()]
+    assert path.getsize(metrics.get_file()) <= 1000
+    assert idcs
+    assert idcs == list(range(100 - len(idcs), 100))
+
+
+def test_load_corrupted(cache_dir):
+    metrics.record(make_run(idx=0))
+    with open(metrics.get_file(), "a") as fh:
+        fh.write('{"values": {"idx"')
+
+    assert len(metrics.load()) == 1
+
+
+@pytest.mark.parametrize(("q", "expected"), [(0.5, 50), (0.9, 90), (0.99, 99)])
+def test_percentile(q, expected):
+    assert metrics.percentile(range(100, 0, -1), q) == expected
+
+
+def test_hit_rates():
+    runs = [
+        make_run(memoization_hits=1, daemon_misses=1).finish(),
+        make_run(memoization_misses=1, memoization_hits=2).finish(),
+    ]
+
+    assert metrics.hit_rates(runs) == dict(memoization=0.75, daemon=0.0)
+
+
+def test_to_openmetrics():
+    runs = [make_run(index_bytes=value).finish() for value in (1, 2, 3)]
+
+    lines = metrics.to_openmetrics(runs).splitlines()
+
+    assert "pytorch_pip_shim_runs 3" in lines
+    assert "# TYPE pytorch_pip_shim_index_bytes summary" in lines
+    assert 'pytorch_pip_shim_index_bytes{quantile="0.5"} 2.0' in lines
+    assert "pytorch_pip_shim_index_bytes_sum 6.0" in lines
+    assert "pytorch_pip_shim_index_bytes_count 3" in lines
+    assert lines[-1] == "# EOF"
+
+
+def test_write_textfile(tmpdir):
+    file = path.join(str(tmpdir), "pytorch_pip_shim.prom")
+
+    metrics.write_textfile(file, [make_run().finish()])
+
+    with open(file) as fh:
+        assert "pytorch_pip_shim_wall_seconds_count 1" in fh.read()
+    assert len(tmpdir.listdir()) == 1
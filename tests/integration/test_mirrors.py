@@ -0,0 +1,106 @@
+import time
+
+import pytest
+
+from pip._internal.network.session import PipSession
+from pip._vendor.requests import RequestException
+
+from pytorch_pip_shim import mirrors
+
+from tests.utils import fake_server
+
+
+@pytest.fixture
+def session():
+    return PipSession()
+
+
+def test_probe(session):
+    with fake_server() as base:
+        assert mirrors.probe(session, base) is not None
+
+
+def test_probe_server_error(session):
+    with fake_server(status=503) as base:
+        assert mirrors.probe(session, base) is None
+
+
+def test_probe_timeout(session):
+    with fake_server(delay=0.5) as base:
+        assert mirrors.probe(session, base, timeout=0.1) is None
+
+
+def test_mirrors_empty():
+    with pytest.raises(mirrors.MirrorError):
+        mirrors.Mirrors([])
+
+
+def test_rank_latency(session, cache_dir):
+    with fake_server(delay=0.3) as slow, fake_server(delay=0.0) as fast, fake_server(
+        status=500
+    ) as broken:
+        index_mirrors = mirrors.Mirrors([broken, slow, fast])
+
+        assert index_mirrors.rank(session) == [fast, slow, broken]
+
+
+def test_rank_concurrent(session, cache_dir):
+    with fake_server(delay=0.3) as a, fake_server(delay=0.3) as b, fake_server(
+        delay=0.3
+    ) as c:
+        start = time.perf_counter()
+        mirrors.Mirrors([a, b, c]).rank(session)
+
+        assert time.perf_counter() - start < 0.8
+
+
+def test_rank_single_without_probe(mocker, session):
+    probe = mocker.patch("pytorch_pip_shim.mirrors.probe")
+
+    assert mirrors.Mirrors(["https://example.com/"]).rank(session) == [
+        "https://example.com/"
+    ]
+    probe.assert_not_called()
+
+
+def test_rank_remembered(mocker, session, cache_dir):
+    with fake_server(delay=0.2) as slow, fake_server() as fast:
+        mirrors.Mirrors([slow, fast]).rank(session)
+
+        probe = mocker.patch("pytorch_pip_shim.mirrors.probe")
+        assert mirrors.Mirrors([slow, fast]).rank(session) == [fast, slow]
+        probe.assert_not_called()
+
+
+def test_call_failover(session, cache_dir):
+    with fake_server() as first, fake_server(delay=0.2) as second:
+        index_mirrors = mirrors.Mirrors([first, second])
+        calls = []
+
+        def fn(base):
+            calls.append(base)
+            if base == first:
+                raise RequestException("boom")
+            return base
+
+        assert index_mirrors.call(session, fn) == second
+        assert calls == [first, second]
+        # The failed mirror is not tried first again during the same run.
+        assert index_mirrors.rank(session) == [second, first]
+        assert (
+            mirrors.load_scores()[first]["latency"]
+            > mirrors.load_scores()[second]["latency"]
+        )
+
+
+def test_call_all_failed(session, cache_dir):
+    index_mirrors = mirrors.Mirrors(
+        ["https://a.example.com/", "https://b.example.com/"]
+    )
+    index_mirrors._ranked = list(index_mirrors.bases)
+
+    def fn(base):
+        raise OSError(base)
+
+    with pytest.raises(mirrors.MirrorError):
+        index_mirrors.call(session, fn)
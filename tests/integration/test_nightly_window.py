@@ -0,0 +1,112 @@
+import datetime
+
+import pytest
+
+from pip._internal.models.link import Link
+
+from pytorch_pip_shim import nightly_window
+
+URL = "https://download.pytorch.org/whl/nightly/cpu/torch_nightly.html"
+TODAY = datetime.date(2020, 10, 20)
+
+
+def make_link(version):
+    return Link(
+        f"https://download.pytorch.org/whl/nightly/cpu/"
+        f"torch-{version}%2Bcpu-cp38-cp38-linux_x86_64.whl"
+    )
+
+
+LINKS = [
+    make_link("1.7.0.dev20200901"),
+    make_link("1.8.0.dev20201017"),
+    make_link("1.8.0.dev20201018"),
+    make_link("1.8.0.dev20201020"),
+    make_link("1.7.0rc1"),
+]
+
+
+def versions(links):
+    return [link.filename.split("-")[1] for link in links]
+
+
+@pytest.mark.parametrize(
+    ("version", "date"),
+    [
+        ("1.8.0.dev20201020+cpu", datetime.date(2020, 10, 20)),
+        ("1.8.0.dev20201020", datetime.date(2020, 10, 20)),
+        ("1.7.0+cpu", None),
+        ("1.8.0.dev20201399", None),
+        (None, None),
+    ],
+)
+def test_get_dev_date(version, date):
+    assert nightly_window.get_dev_date(version) == date
+
+
+def test_apply_window_noop():
+    assert nightly_window.apply_window(LINKS) == LINKS
+
+
+def test_apply_window_days():
+    links = nightly_window.apply_window(LINKS, days=3, today=TODAY)
+
+    assert versions(links) == [
+        "1.8.0.dev20201018+cpu",
+        "1.8.0.dev20201020+cpu",
+        "1.7.0rc1+cpu",
+    ]
+
+
+def test_apply_window_builds():
+    links = nightly_window.apply_window(LINKS, builds=2)
+
+    assert versions(links) == [
+        "1.8.0.dev20201018+cpu",
+        "1.8.0.dev20201020+cpu",
+        "1.7.0rc1+cpu",
+    ]
+
+
+def test_apply_window_days_and_builds():
+    links = nightly_window.apply_window(LINKS, days=1, builds=3, today=TODAY)
+
+    assert versions(links) == ["1.8.0.dev20201020+cpu", "1.7.0rc1+cpu"]
+
+
+def make_key(**kwargs):
+    kwargs_ = dict(
+        url=URL,
+        project_name="torch",
+        tags=["cp38-cp38-linux_x86_64"],
+        days=7,
+        builds=None,
+        today=TODAY,
+    )
+    kwargs_.update(kwargs)
+    return nightly_window.make_key(**kwargs_)
+
+
+def test_make_key_inputs():
+    key = make_key()
+
+    assert make_key() == key
+    assert make_key(project_name="Torch") == key
+    assert make_key(days=8) != key
+    assert make_key(builds=3) != key
+    assert make_key(today=TODAY + datetime.timedelta(days=1)) != key
+
+
+def test_store_load_roundtrip(cache_dir):
+    key = make_key()
+    link = Link(LINKS[0].url, requires_python=">=3.6")
+
+    nightly_window.store(key, [link])
+    (loaded,) = nightly_window.load(key)
+
+    assert loaded == link
+    assert loaded.requires_python == ">=3.6"
+
+
+def test_load_miss(cache_dir):
+    assert nightly_window.load(make_key()) is None
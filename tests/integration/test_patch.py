@@ -8,18 +8,42 @@ import sys
 from enum import IntEnum
 from os import path
 from sys import platform
+from types import SimpleNamespace
 from unittest import mock
 
 import pytest
 
 from pip._internal.cli import main, status_codes
+from pip._internal.index.collector import LinkCollector
+from pip._internal.index.package_finder import (
+    BestCandidateResult,
+    CandidateEvaluator,
+    PackageFinder,
+)
+from pip._internal.models.candidate import InstallationCandidate
+from pip._internal.models.link import Link
 from pip._internal.network.download import _http_get_download
+from pip._internal.network.session import PipSession
 from pip._internal.operations.prepare import RequirementPreparer
+from pip._internal.req.req_uninstall import StashedUninstallPathSet, UninstallPathSet
+from pip._vendor.packaging.specifiers import SpecifierSet
 from pip._vendor.requests.models import Response
 from pip._vendor.urllib3.response import HTTPResponse
 
 import pytorch_pip_shim as pps
+from pytorch_pip_shim import findlinks, index
+from pytorch_pip_shim.compatibility import Matrix
 from pytorch_pip_shim.computation_backend import ComputationBackend
+from pytorch_pip_shim.metrics import Run
+from pytorch_pip_shim.mirrors import MirrorError, Mirrors
+from pytorch_pip_shim.patch import (
+    patch_candidate_lookup,
+    patch_candidate_pruning,
+    patch_link_collection,
+    patch_pytorch_uninstallation,
+    run_preflight,
+)
+from pytorch_pip_shim.utils import parse_pip_args
 
 from tests import mocks, utils
 
@@ -363,3 +387,405 @@ def test_uninstall(mocker):
     pip_uninstall(Package("pytorch-pip-shim", pps.__version__))
 
     mock.assert_called()
+
+
+class FinderMock:
+    def __init__(self, candidates, find_links=()):
+        self.candidates = candidates
+        self.find_links = list(find_links)
+        self._link_collector = SimpleNamespace(session=None)
+        self.target_python = SimpleNamespace(
+            get_tags=lambda: ["cp38-cp38-linux_x86_64"]
+        )
+
+    def find_all_candidates(self, project_name):
+        return self.candidates
+
+    def make_candidate_evaluator(self, project_name, specifier=None, hashes=None):
+        class CandidateEvaluatorMock:
+            def compute_best_candidate(self, candidates):
+                return BestCandidateResult(
+                    candidates,
+                    applicable_candidates=candidates,
+                    best_candidate=candidates[0] if candidates else None,
+                )
+
+        return CandidateEvaluatorMock()
+
+
+@pytest.fixture
+def memoizable_candidate(mocker):
+    mocker.patch(
+        mocks.make_target("patch", "installation", "find_installed_candidates"),
+        return_value=None,
+    )
+    mocker.patch(
+        mocks.make_target("patch", "memoization", "get_index_version"),
+        return_value='"etag"',
+    )
+    return InstallationCandidate(
+        "torch",
+        "1.7.0+cpu",
+        Link(
+            "https://download.pytorch.org/whl/cpu/torch-1.7.0%2Bcpu-cp38-cp38-linux_x86_64.whl"
+        ),
+    )
+
+
+def test_candidate_lookup_memoization(memoizable_candidate, cache_dir):
+    candidate = memoizable_candidate
+    backend = ComputationBackend.from_str("cpu")
+
+    with patch_candidate_lookup(backend, False):
+        miss = PackageFinder.find_best_candidate(FinderMock([candidate]), "torch")
+    with patch_candidate_lookup(backend, False):
+        hit = PackageFinder.find_best_candidate(FinderMock([]), "torch")
+
+    assert miss.best_candidate == candidate
+    assert hit.best_candidate == candidate
+
+
+def test_candidate_lookup_metrics(memoizable_candidate, cache_dir):
+    candidate = memoizable_candidate
+    run = Run()
+
+    for _ in range(2):
+        with patch_candidate_lookup(ComputationBackend.from_str("cpu"), False, run=run):
+            PackageFinder.find_best_candidate(FinderMock([candidate]), "torch")
+
+    assert run.values == dict(
+        installed_misses=2, memoization_misses=1, memoization_hits=1
+    )
+
+
+def test_candidate_lookup_nightly_window(memoizable_candidate, cache_dir):
+    run = Run()
+
+    for _ in range(2):
+        with patch_candidate_lookup(
+            ComputationBackend.from_str("cpu"), True, nightly_window_days=7, run=run
+        ):
+            PackageFinder.find_best_candidate(
+                FinderMock([memoizable_candidate]), "torch"
+            )
+
+    assert run.values == dict(installed_misses=2)
+
+
+def test_candidate_lookup_find_links_index(memoizable_candidate, cache_dir, tmpdir):
+    findlinks.build(str(tmpdir))
+    run = Run()
+
+    for _ in range(2):
+        with patch_candidate_lookup(ComputationBackend.from_str("cpu"), False, run=run):
+            PackageFinder.find_best_candidate(
+                FinderMock([memoizable_candidate], find_links=[str(tmpdir)]), "torch"
+            )
+
+    assert run.values == dict(installed_misses=2)
+
+
+def test_candidate_lookup_non_pytorch(mocker, cache_dir):
+    get_index_version = mocker.patch(
+        mocks.make_target("patch", "memoization", "get_index_version")
+    )
+    backend = ComputationBackend.from_str("cpu")
+
+    with patch_candidate_lookup(backend, False):
+        PackageFinder.find_best_candidate(FinderMock([]), "numpy")
+
+    get_index_version.assert_not_called()
+
+
+def test_candidate_lookup_installed(mocker, cache_dir):
+    get_index_version = mocker.patch(
+        mocks.make_target("patch", "memoization", "get_index_version")
+    )
+    candidate = InstallationCandidate(
+        "torch", "1.7.0+cpu", Link("file:///site-packages")
+    )
+    mocker.patch(
+        mocks.make_target("patch", "installation", "find_installed_candidates"),
+        return_value=[candidate],
+    )
+    backend = ComputationBackend.from_str("cpu")
+
+    with patch_candidate_lookup(backend, False):
+        result = PackageFinder.find_best_candidate(FinderMock([]), "torch")
+
+    assert result.best_candidate == candidate
+    get_index_version.assert_not_called()
+
+
+def test_candidate_lookup_force_reinstall(mocker, cache_dir):
+    find_installed_candidates = mocker.patch(
+        mocks.make_target("patch", "installation", "find_installed_candidates")
+    )
+    mocker.patch(
+        mocks.make_target("patch", "memoization", "get_index_version"),
+        return_value=None,
+    )
+    backend = ComputationBackend.from_str("cpu")
+
+    with patch_candidate_lookup(backend, False, force_reinstall=True):
+        PackageFinder.find_best_candidate(FinderMock([]), "torch")
+
+    find_installed_candidates.assert_not_called()
+
+
+@pytest.mark.parametrize("project_name", ["torch", "numpy"])
+def test_pytorch_uninstallation_commit(mocker, tmpdir, project_name):
+    remove_in_background = mocker.patch(
+        mocks.make_target("patch", "uninstallation", "remove_in_background")
+    )
+    dir = tmpdir.mkdir("torch")
+    dir.join("__init__.py").write("")
+    moved_paths = StashedUninstallPathSet()
+    stash = moved_paths.stash(str(dir))
+    self = SimpleNamespace(
+        dist=SimpleNamespace(project_name=project_name), _moved_paths=moved_paths
+    )
+
+    with patch_pytorch_uninstallation():
+        UninstallPathSet.commit(self)
+
+    assert not path.exists(str(dir))
+    if project_name == "torch":
+        remove_in_background.assert_called_once_with([stash])
+    else:
+        remove_in_background.assert_not_called()
+        assert not path.exists(stash)
+
+
+def test_link_collection_mirror_failover(mocker, cache_dir):
+    mocker.patch(mocks.make_target("patch", "SearchScope"))
+    collected_links = SimpleNamespace
+    mocker.patch.object(
+        LinkCollector,
+        "collect_links",
+        create=True,
+        new=lambda self, project_name: collected_links(
+            files=[], find_links=[], project_urls=[]
+        ),
+    )
+    name = "cpu/torch-1.7.0%2Bcpu-cp38-cp38-linux_x86_64.whl"
+    page = (f'<a href="{name}">{name}</a>', "text/html")
+
+    with utils.fake_server(
+        {"/torch_stable.html": page}, status=500
+    ) as broken, utils.fake_server({"/torch_stable.html": page}, delay=0.1) as mirror:
+        index_mirrors = Mirrors([broken, mirror])
+        # Pretend the broken mirror was healthy when the mirrors were probed.
+        index_mirrors._ranked = [broken, mirror]
+        collector = SimpleNamespace(
+            session=PipSession(), search_scope=SimpleNamespace(find_links=[])
+        )
+
+        with patch_link_collection(
+            ComputationBackend.from_str("cpu"), False, index_mirrors=index_mirrors
+        ):
+            output = LinkCollector.collect_links(collector, "torch")
+
+    (link,) = output.find_links
+    assert link.url == f"{mirror}{name}"
+    assert index_mirrors.rank(None) == [mirror, broken]
+
+
+def test_link_collection_prefetched(mocker, cache_dir):
+    mocker.patch(mocks.make_target("patch", "SearchScope"))
+    mocker.patch.object(
+        LinkCollector,
+        "collect_links",
+        create=True,
+        new=lambda self, project_name: SimpleNamespace(
+            files=[], find_links=[], project_urls=[]
+        ),
+    )
+    collect_links = mocker.patch(mocks.make_target("patch", "index", "collect_links"))
+    backend = ComputationBackend.from_str("cpu")
+    url = index.make_url(backend, False)
+    links = [Link(f"{index.BASE}cpu/torch-1.7.0%2Bcpu-cp38-cp38-linux_x86_64.whl")]
+    collector = SimpleNamespace(
+        session=None, search_scope=SimpleNamespace(find_links=[])
+    )
+
+    with patch_link_collection(backend, False, prefetched={(url, "torch"): links}):
+        output = LinkCollector.collect_links(collector, "torch")
+
+    assert output.find_links == links
+    collect_links.assert_not_called()
+
+
+def test_link_collection_find_links_index(mocker, tmpdir, cache_dir):
+    mocker.patch(mocks.make_target("patch", "SearchScope"))
+    seen_find_links = []
+
+    def collect_links(self, project_name):
+        seen_find_links.append(list(self.search_scope.find_links))
+        return SimpleNamespace(files=[], find_links=[], project_urls=[])
+
+    mocker.patch.object(LinkCollector, "collect_links", create=True, new=collect_links)
+    for filename in (
+        "torch-1.7.0+cpu-cp38-cp38-linux_x86_64.whl",
+        "torch-1.7.0+cu110-cp38-cp38-linux_x86_64.whl",
+        "numpy-1.19.4-cp38-cp38-manylinux2010_x86_64.whl",
+    ):
+        tmpdir.join(filename).write("")
+    findlinks.build(str(tmpdir))
+    index_mirrors = Mirrors(["http://127.0.0.1:1/"])
+    mocker.patch.object(
+        index_mirrors, "call", side_effect=MirrorError("All PyTorch indices failed")
+    )
+    collector = SimpleNamespace(
+        session=None,
+        search_scope=SimpleNamespace(find_links=[str(tmpdir), "https://example.com"]),
+    )
+
+    with patch_link_collection(
+        ComputationBackend.from_str("cpu"), False, index_mirrors=index_mirrors
+    ):
+        numpy = LinkCollector.collect_links(collector, "numpy")
+        torch = LinkCollector.collect_links(collector, "torch")
+
+    assert seen_find_links[0] == ["https://example.com"]
+    assert [link.filename for link in numpy.files] == [
+        "numpy-1.19.4-cp38-cp38-manylinux2010_x86_64.whl"
+    ]
+    assert [link.filename for link in torch.files] == [
+        "torch-1.7.0+cpu-cp38-cp38-linux_x86_64.whl"
+    ]
+    assert not torch.find_links
+
+
+def test_link_collection_mirrors_unreachable(mocker, caplog, cache_dir):
+    mocker.patch(mocks.make_target("patch", "SearchScope"))
+    mocker.patch.object(
+        LinkCollector,
+        "collect_links",
+        create=True,
+        new=lambda self, project_name: SimpleNamespace(
+            files=[], find_links=[], project_urls=[]
+        ),
+    )
+    index_mirrors = Mirrors(["http://127.0.0.1:1/"])
+    mocker.patch.object(
+        index_mirrors, "call", side_effect=MirrorError("All PyTorch indices failed")
+    )
+    collector = SimpleNamespace(
+        session=None, search_scope=SimpleNamespace(find_links=[])
+    )
+
+    with patch_link_collection(
+        ComputationBackend.from_str("cpu"), False, index_mirrors=index_mirrors
+    ):
+        output = LinkCollector.collect_links(collector, "torch")
+
+    assert not output.files
+    assert not output.find_links
+    assert "All PyTorch indices failed" in caplog.text
+
+
+def make_candidate(name, version):
+    return InstallationCandidate(
+        name, version, Link(f"https://download.pytorch.org/whl/{name}-{version}.whl")
+    )
+
+
+@pytest.mark.parametrize(
+    ("specifier", "candidates", "expected"),
+    [
+        (None, ["0.8.1", "0.8.2"], ["0.8.1", "0.8.2"]),
+        ("==1.7.1", ["0.8.1", "0.8.2"], ["0.8.2"]),
+        ("==1.7.1", ["0.8.1"], ["0.8.1"]),
+    ],
+)
+def test_candidate_pruning(mocker, specifier, candidates, expected):
+    mocker.patch.object(
+        CandidateEvaluator,
+        "get_applicable_candidates",
+        create=True,
+        new=lambda self, candidates: candidates,
+    )
+    matrix = Matrix(
+        [
+            dict(torch=["1.7.0"], torchvision=["0.8.1"]),
+            dict(torch=["1.7.1"], torchvision=["0.8.2"]),
+        ]
+    )
+
+    with patch_candidate_pruning(matrix=matrix):
+        PackageFinder.find_best_candidate(
+            FinderMock([make_candidate("torch", "1.7.1+cpu")]),
+            "torch",
+            SpecifierSet(specifier) if specifier else None,
+        )
+        output = CandidateEvaluator.get_applicable_candidates(
+            None,
+            [make_candidate("torchvision", version) for version in candidates],
+        )
+
+    assert [str(candidate.version) for candidate in output] == expected
+
+
+class PruningFinderMock(FinderMock):
+    def make_candidate_evaluator(self, project_name, specifier=None, hashes=None):
+        class CandidateEvaluatorMock:
+            def compute_best_candidate(self, candidates):
+                applicable = CandidateEvaluator.get_applicable_candidates(
+                    None, candidates
+                )
+                return BestCandidateResult(
+                    candidates,
+                    applicable_candidates=applicable,
+                    best_candidate=max(
+                        applicable, key=lambda candidate: candidate.version
+                    ),
+                )
+
+        return CandidateEvaluatorMock()
+
+
+def test_candidate_lookup_memoization_pruning(memoizable_candidate, cache_dir, mocker):
+    mocker.patch.object(
+        CandidateEvaluator,
+        "get_applicable_candidates",
+        create=True,
+        new=lambda self, candidates: candidates,
+    )
+    matrix = Matrix(
+        [
+            dict(torch=["1.8.0"], torchvision=["0.9.0"]),
+            dict(torch=["1.9.0"], torchvision=["0.10.0"]),
+        ]
+    )
+    backend = ComputationBackend.from_str("cpu")
+    torchvision = [
+        make_candidate("torchvision", version) for version in ("0.9.0", "0.10.0")
+    ]
+
+    with patch_candidate_pruning(matrix=matrix), patch_candidate_lookup(backend, False):
+        PackageFinder.find_best_candidate(
+            PruningFinderMock([make_candidate("torch", "1.8.0")]),
+            "torch",
+            SpecifierSet("==1.8.0"),
+        )
+        pruned = PackageFinder.find_best_candidate(
+            PruningFinderMock(torchvision), "torchvision"
+        )
+    with patch_candidate_pruning(matrix=matrix), patch_candidate_lookup(backend, False):
+        memoized = PackageFinder.find_best_candidate(
+            PruningFinderMock([]), "torchvision"
+        )
+
+    assert str(pruned.best_candidate.version) == "0.9.0"
+    assert str(memoized.best_candidate.version) == "0.10.0"
+
+
+def test_run_preflight_no_index(mocker):
+    check_requirements = mocker.patch(
+        mocks.make_target("patch", "preflight", "check_requirements")
+    )
+    args = parse_pip_args(["install", "--no-index", "--cpu", "torch"])
+
+    assert run_preflight(args, Mirrors([index.BASE])) == {}
+    check_requirements.assert_not_called()
@@ -0,0 +1,168 @@
+import pytest
+
+from pip._internal.models.link import Link
+from pip._internal.network.session import PipSession
+from pip._vendor.packaging.requirements import Requirement
+from pip._vendor.packaging.tags import Tag
+
+from pytorch_pip_shim import index, preflight
+from pytorch_pip_shim.computation_backend import ComputationBackend
+from pytorch_pip_shim.mirrors import Mirrors
+
+from tests import mocks, utils
+
+TAGS = [Tag("cp38", "cp38", "linux_x86_64")]
+NAMES = [
+    "cpu/torch-1.6.0%2Bcpu-cp38-cp38-linux_x86_64.whl",
+    "cpu/torch-1.7.0%2Bcpu-cp37-cp37m-linux_x86_64.whl",
+    "cpu/torch-1.7.0%2Bcpu-cp38-cp38-linux_x86_64.whl",
+    "cu101/torch-1.7.0%2Bcu101-cp38-cp38-linux_x86_64.whl",
+    "cu110/torch-1.7.1%2Bcu110-cp38-cp38-linux_x86_64.whl",
+    "cpu/torchvision-0.8.1%2Bcpu-cp38-cp38-linux_x86_64.whl",
+]
+LINKS = [Link(f"https://download.pytorch.org/whl/{name}") for name in NAMES]
+
+
+@pytest.fixture(autouse=True)
+def no_daemon(mocker):
+    return mocker.patch(
+        mocks.make_target("preflight", "daemon", "collect_links"), return_value=None
+    )
+
+
+def test_get_requirements():
+    requirements = preflight.get_requirements(
+        [
+            "torch==1.7.0",
+            "numpy",
+            "requirements.txt",
+            "https://example.com/simple",
+            "torchvision @ https://example.com/torchvision.whl",
+            "torchaudio; python_version < '3'",
+            "TorchText>=0.8",
+        ],
+        ("torch", "torchvision", "torchaudio", "torchtext"),
+    )
+
+    assert [str(requirement) for requirement in requirements] == [
+        "torch==1.7.0",
+        "TorchText>=0.8",
+    ]
+
+
+def test_check_requirement():
+    links = preflight.check_requirement(
+        Requirement("torch==1.7.0"), LINKS, ComputationBackend.from_str("cpu"), TAGS, ""
+    )
+
+    assert [link.filename for link in links] == [
+        "torch-1.6.0+cpu-cp38-cp38-linux_x86_64.whl",
+        "torch-1.7.0+cpu-cp38-cp38-linux_x86_64.whl",
+    ]
+
+
+def test_check_requirement_unavailable():
+    with pytest.raises(preflight.PreflightError) as info:
+        preflight.check_requirement(
+            Requirement("torch==1.7.1"),
+            LINKS,
+            ComputationBackend.from_str("cpu"),
+            TAGS,
+            "https://download.pytorch.org/whl/torch_stable.html",
+        )
+
+    message = str(info.value)
+    assert "'torch==1.7.1'" in message
+    assert "'cpu'" in message
+    assert "'cp38-cp38-linux_x86_64'" in message
+    assert "  cpu: 1.6.0, 1.7.0\n" in message
+    assert "  cu101: 1.7.0\n" in message
+    assert "  cu110: 1.7.1\n" in message
+    assert "torchvision" not in message
+
+
+def test_check_requirement_unsupported_interpreter():
+    with pytest.raises(preflight.PreflightError, match="for this interpreter"):
+        preflight.check_requirement(
+            Requirement("torch"),
+            LINKS,
+            ComputationBackend.from_str("cpu"),
+            [Tag("cp39", "cp39", "linux_x86_64")],
+            "",
+        )
+
+
+def test_check_requirements(cache_dir):
+    page = ("".join(f'<a href="{name}">{name}</a>' for name in NAMES), "text/html")
+    with utils.fake_server({"/torch_stable.html": page}) as base:
+        links = preflight.check_requirements(
+            [Requirement("torch==1.7.0"), Requirement("torchvision")],
+            ComputationBackend.from_str("cpu"),
+            False,
+            TAGS,
+            index_mirrors=Mirrors([base]),
+            session=PipSession(),
+        )
+
+        url = f"{base}torch_stable.html"
+        assert set(links.keys()) == {(url, "torch"), (url, "torchvision")}
+        assert len(links[(url, "torch")]) == 2
+        assert len(links[(url, "torchvision")]) == 1
+
+        with pytest.raises(preflight.PreflightError):
+            preflight.check_requirements(
+                [Requirement("torchvision==0.8.2")],
+                ComputationBackend.from_str("cpu"),
+                False,
+                TAGS,
+                index_mirrors=Mirrors([base]),
+                session=PipSession(),
+            )
+
+
+def test_check_requirements_pages(cache_dir):
+    page = ("".join(f'<a href="{name}">{name}</a>' for name in NAMES), "text/html")
+    pages = index.PageCache()
+    with utils.fake_server({"/torch_stable.html": page}) as base:
+        preflight.check_requirements(
+            [Requirement("torch==1.7.0")],
+            ComputationBackend.from_str("cpu"),
+            False,
+            TAGS,
+            index_mirrors=Mirrors([base]),
+            session=PipSession(),
+            pages=pages,
+        )
+
+    # The server is gone. Thus, the links can only come from the parsed page.
+    links = pages.get(f"{base}torch_stable.html").iter_links("torchvision")
+    assert len(list(links)) == 1
+
+
+def test_check_requirements_daemon(no_daemon):
+    no_daemon.return_value = LINKS[:1]
+
+    links = preflight.check_requirements(
+        [Requirement("torch==1.6.0")],
+        ComputationBackend.from_str("cpu"),
+        False,
+        TAGS,
+        index_mirrors=Mirrors(["http://127.0.0.1:1/"]),
+        session=PipSession(),
+    )
+
+    assert list(links.values()) == [LINKS[:1]]
+
+
+def test_make_session():
+    session = preflight.make_session(
+        proxy="http://proxy:3128", cert="ca.pem", trusted_hosts=["example.com"]
+    )
+
+    assert session.proxies == {
+        "http": "http://proxy:3128",
+        "https": "http://proxy:3128",
+    }
+    assert session.verify == "ca.pem"
+    assert session.timeout == preflight.TIMEOUT
+    assert preflight.make_session(timeout=30).timeout == 30
@@ -0,0 +1,163 @@
+import zipfile
+from types import SimpleNamespace
+
+import pytest
+
+from pip._internal.models.candidate import InstallationCandidate
+from pip._internal.models.link import Link
+from pip._internal.network.session import PipSession
+from pip._internal.utils.urls import path_to_url
+from pip._vendor.packaging.requirements import Requirement
+
+from pytorch_pip_shim import resolution
+from pytorch_pip_shim.computation_backend import ComputationBackend
+
+from tests import utils
+
+
+def make_wheel(dir, name, version, requires=()):
+    file = dir.join(f"{name}-{version}-py3-none-any.whl")
+    metadata = "".join(
+        (
+            "Metadata-Version: 2.1\n",
+            f"Name: {name}\n",
+            f"Version: {version}\n",
+            *[f"Requires-Dist: {requirement}\n" for requirement in requires],
+        )
+    )
+    with zipfile.ZipFile(str(file), "w") as fh:
+        fh.writestr(f"{name}/__init__.py", "")
+        fh.writestr(f"{name}-{version}.dist-info/METADATA", metadata)
+    return InstallationCandidate(name, version, Link(path_to_url(str(file))))
+
+
+class FinderMock:
+    def __init__(self, candidates):
+        self.candidates = candidates
+        self._link_collector = SimpleNamespace(session=PipSession())
+
+    def find_best_candidate(self, project_name, specifier=None):
+        candidates = [
+            candidate
+            for candidate in self.candidates
+            if candidate.name == project_name
+            and (specifier is None or specifier.contains(candidate.version))
+        ]
+        return SimpleNamespace(
+            best_candidate=(
+                max(candidates, key=lambda candidate: candidate.version)
+                if candidates
+                else None
+            )
+        )
+
+
+@pytest.fixture
+def candidates(tmpdir):
+    return [
+        make_wheel(
+            tmpdir,
+            "a",
+            "1.0",
+            requires=("b>=1.0", 'c; extra == "x"', 'd; python_version < "3"'),
+        ),
+        make_wheel(tmpdir, "b", "1.0"),
+        make_wheel(tmpdir, "b", "2.0"),
+        make_wheel(tmpdir, "c", "1.0"),
+        make_wheel(tmpdir, "d", "1.0"),
+    ]
+
+
+def resolve_dependencies(candidates, *requirements):
+    return [
+        f"{candidate.name}=={candidate.version}"
+        for candidate in resolution.resolve_dependencies(
+            FinderMock(candidates),
+            [Requirement(requirement) for requirement in requirements],
+            ComputationBackend.from_str("cpu"),
+        )
+    ]
+
+
+def test_get_dependencies(candidates):
+    assert [
+        str(requirement)
+        for requirement in resolution.get_dependencies(
+            candidates[0], PipSession(), extras=["x"]
+        )
+    ] == ["b>=1.0", 'c; extra == "x"']
+
+
+def test_read_metadata_download(candidates):
+    with open(candidates[0].link.file_path, "rb") as fh:
+        content = fh.read()
+    with utils.fake_server(
+        {"/a-1.0-py3-none-any.whl": (content, "application/octet-stream")}
+    ) as base:
+        metadata = resolution.read_metadata(
+            Link(f"{base}a-1.0-py3-none-any.whl"), PipSession()
+        )
+
+    assert metadata["Name"] == "a"
+
+
+def test_read_metadata_sdist():
+    with pytest.raises(resolution.MetadataError):
+        resolution.read_metadata(Link("https://example.com/a-1.0.tar.gz"), object())
+
+
+def test_resolve_dependencies(candidates):
+    assert resolve_dependencies(candidates, "a[x]", "b<2") == [
+        "a==1.0",
+        "b==1.0",
+        "c==1.0",
+    ]
+
+
+def test_resolve_dependencies_replace(candidates, tmpdir):
+    candidates[0] = make_wheel(tmpdir, "a", "1.0", requires=("b<2",))
+
+    assert resolve_dependencies(candidates, "b", "a") == ["b==1.0", "a==1.0"]
+
+
+def test_resolve_dependencies_replace_queued_dependencies(tmpdir):
+    candidates = [
+        make_wheel(tmpdir, "a", "1.0"),
+        make_wheel(tmpdir, "a", "2.0", requires=("b",)),
+        make_wheel(tmpdir, "b", "1.0"),
+    ]
+
+    assert resolve_dependencies(candidates, "a", "a<2") == ["a==1.0"]
+
+
+def test_resolve_dependencies_replace_resolved_dependencies(tmpdir):
+    candidates = [
+        make_wheel(tmpdir, "a", "1.0"),
+        make_wheel(tmpdir, "a", "2.0", requires=("b",)),
+        make_wheel(tmpdir, "b", "1.0", requires=("d",)),
+        make_wheel(tmpdir, "c", "1.0", requires=("a<2",)),
+        make_wheel(tmpdir, "d", "1.0"),
+    ]
+
+    assert resolve_dependencies(candidates, "a", "c") == ["a==1.0", "c==1.0"]
+
+
+def test_resolve_dependencies_replace_specifiers(tmpdir):
+    candidates = [
+        make_wheel(tmpdir, "a", "1.0"),
+        make_wheel(tmpdir, "a", "2.0", requires=("b<2",)),
+        make_wheel(tmpdir, "b", "1.0"),
+        make_wheel(tmpdir, "b", "2.0"),
+        make_wheel(tmpdir, "c", "1.0", requires=("a<2", "b")),
+    ]
+
+    assert resolve_dependencies(candidates, "a", "c") == [
+        "a==1.0",
+        "c==1.0",
+        "b==2.0",
+    ]
+
+
+def test_resolve_dependencies_unavailable(candidates):
+    with pytest.raises(resolution.ResolutionError):
+        resolve_dependencies(candidates, "a", "b>2")
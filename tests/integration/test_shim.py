@@ -1,5 +1,9 @@
 import hashlib
 import importlib.util
+import os
+import py_compile
+import stat
+import threading
 from os import path
 from urllib.request import urlopen
 
@@ -163,3 +167,67 @@ def test_fallback(mocker, shimmed_pip_main_file):
         module.main()
 
     mock.assert_not_called()
+
+
+MAIN_CONTENT = "import sys\n\n\ndef main(args=None):\n    return 0\n"
+
+
+@pytest.fixture
+def local_pip_main_file(tmpdir, cache_dir):
+    file, _ = make_pip_main_file(str(tmpdir), MAIN_CONTENT, name="main.py")
+    return file
+
+
+def test_is_inserted_stops_at_main(tmpdir):
+    file, _ = make_pip_main_file(
+        str(tmpdir), f"def main():\n    pass\n{shim.IDENTIFIER}\n"
+    )
+
+    assert not shim.is_inserted(file)
+
+
+def test_insert_remove_roundtrip(local_pip_main_file):
+    file = local_pip_main_file
+    os.chmod(file, 0o640)
+
+    shim.insert(file)
+    assert shim.is_inserted(file)
+    assert stat.S_IMODE(os.stat(file).st_mode) == 0o640
+
+    shim.remove(file)
+    with open(file) as fh:
+        assert fh.read() == MAIN_CONTENT
+    assert not [name for name in os.listdir(path.dirname(file)) if name.startswith(".")]
+
+
+def read_bytecode_source_size(file, optimization=""):
+    with open(
+        importlib.util.cache_from_source(file, optimization=optimization), "rb"
+    ) as fh:
+        return int.from_bytes(fh.read(16)[12:16], "little")
+
+
+def test_insert_compiles_bytecode(local_pip_main_file):
+    file = local_pip_main_file
+    py_compile.compile(
+        file, optimize=1, cfile=importlib.util.cache_from_source(file, optimization=1)
+    )
+
+    shim.insert(file)
+
+    size = os.stat(file).st_size
+    assert read_bytecode_source_size(file) == size
+    assert read_bytecode_source_size(file, optimization=1) == size
+
+
+def test_insert_concurrent(local_pip_main_file):
+    file = local_pip_main_file
+
+    threads = [threading.Thread(target=shim.insert, args=(file,)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with open(file) as fh:
+        assert fh.read().count(shim.IDENTIFIER) == 1
@@ -0,0 +1,215 @@
+import base64
+import hashlib
+import os
+import zipfile
+from os import path
+from types import SimpleNamespace
+
+import pytest
+
+from pip._internal.models.link import Link
+from pip._internal.network.session import PipSession
+
+from pytorch_pip_shim import switch
+
+from tests import utils
+
+
+def record_hash(content):
+    digest = hashlib.sha256(content).digest()
+    return "sha256=" + base64.urlsafe_b64encode(digest).decode().rstrip("=")
+
+
+def make_record(files):
+    return {
+        file: (record_hash(content), str(len(content)))
+        for file, content in files.items()
+    }
+
+
+def format_record(dist_info, files, extra=()):
+    record = make_record(files)
+    record.update({file: ("", "") for file in extra})
+    record[f"{dist_info}/RECORD"] = ("", "")
+    return switch.format_record(record)
+
+
+OLD_DIST_INFO = "torch-1.7.0+cpu.dist-info"
+NEW_DIST_INFO = "torch-1.7.0+cu110.dist-info"
+
+OLD_FILES = {
+    "torch/__init__.py": b"shared",
+    "torch/version.py": b"cuda = None",
+    "torch/lib/libtorch_cpu.so": b"cpu",
+    f"{OLD_DIST_INFO}/METADATA": b"Version: 1.7.0+cpu",
+}
+NEW_FILES = {
+    "torch/__init__.py": b"shared",
+    "torch/version.py": b"cuda = '11.0'",
+    "torch/lib/libtorch_cuda.so": b"cuda",
+    f"{NEW_DIST_INFO}/METADATA": b"Version: 1.7.0+cu110",
+}
+PYCS = (
+    "torch/__pycache__/__init__.cpython-38.pyc",
+    "torch/__pycache__/version.cpython-38.pyc",
+)
+
+
+@pytest.fixture
+def installed_dist(tmpdir):
+    root = str(tmpdir.mkdir("site-packages"))
+    files = dict(OLD_FILES)
+    files.update({pyc: b"bytecode" for pyc in PYCS})
+    files[f"{OLD_DIST_INFO}/INSTALLER"] = b"pip\n"
+    files[f"{OLD_DIST_INFO}/REQUESTED"] = b""
+    files[f"{OLD_DIST_INFO}/RECORD"] = format_record(
+        OLD_DIST_INFO,
+        OLD_FILES,
+        extra=(
+            *PYCS,
+            f"{OLD_DIST_INFO}/INSTALLER",
+            f"{OLD_DIST_INFO}/REQUESTED",
+            "../../../bin/convert-caffe2-to-onnx",
+        ),
+    ).encode()
+    for file, content in files.items():
+        target = path.join(root, *file.split("/"))
+        os.makedirs(path.dirname(target), exist_ok=True)
+        with open(target, "wb") as fh:
+            fh.write(content)
+
+    return SimpleNamespace(
+        location=root, egg_info=path.join(root, OLD_DIST_INFO), project_name="torch"
+    )
+
+
+@pytest.fixture
+def wheel_file(tmpdir):
+    file = str(tmpdir.join("torch-1.7.0+cu110-cp38-cp38-linux_x86_64.whl"))
+    with zipfile.ZipFile(file, "w") as fh:
+        for name, content in NEW_FILES.items():
+            fh.writestr(name, content)
+        fh.writestr(f"{NEW_DIST_INFO}/RECORD", format_record(NEW_DIST_INFO, NEW_FILES))
+    return file
+
+
+def read(root, file):
+    with open(path.join(root, *file.split("/")), "rb") as fh:
+        return fh.read()
+
+
+def test_read_record():
+    content = "torch/__init__.py,sha256=abc,6\ntorch/__pycache__/x.pyc,,\n"
+    assert switch.read_record(content) == {
+        "torch/__init__.py": ("sha256=abc", "6"),
+        "torch/__pycache__/x.pyc": ("", ""),
+    }
+
+
+@pytest.mark.parametrize(
+    ("file", "source"),
+    [
+        ("torch/__pycache__/version.cpython-38.pyc", "torch/version.py"),
+        ("torch/__pycache__/version.cpython-38.opt-1.pyc", "torch/version.py"),
+        ("torch/version.py", None),
+    ],
+)
+def test_source_of(file, source):
+    assert switch.source_of(file) == source
+
+
+def test_make_plan():
+    installed = make_record(OLD_FILES)
+    installed.update({pyc: ("", "") for pyc in PYCS})
+    wheel = make_record(NEW_FILES)
+
+    plan = switch.make_plan(installed, wheel)
+
+    assert plan.keep == sorted(["torch/__init__.py", PYCS[0]])
+    assert plan.write == sorted(
+        [
+            "torch/version.py",
+            "torch/lib/libtorch_cuda.so",
+            f"{NEW_DIST_INFO}/METADATA",
+        ]
+    )
+    assert plan.remove == sorted(
+        ["torch/lib/libtorch_cpu.so", f"{OLD_DIST_INFO}/METADATA", PYCS[1]]
+    )
+
+
+def test_switch_distribution(installed_dist, wheel_file):
+    root = installed_dist.location
+
+    switch.switch_distribution(installed_dist, wheel_file)
+
+    for file, content in NEW_FILES.items():
+        assert read(root, file) == content
+    assert read(root, PYCS[0]) == b"bytecode"
+    assert not path.exists(path.join(root, PYCS[1]))
+    assert not path.exists(path.join(root, "torch", "lib", "libtorch_cpu.so"))
+    assert not path.exists(path.join(root, OLD_DIST_INFO))
+    assert read(root, f"{NEW_DIST_INFO}/INSTALLER") == b"pip\n"
+    assert path.exists(path.join(root, NEW_DIST_INFO, "REQUESTED"))
+
+    record = switch.read_record(read(root, f"{NEW_DIST_INFO}/RECORD").decode())
+    assert set(record) == {
+        *NEW_FILES,
+        PYCS[0],
+        f"{NEW_DIST_INFO}/INSTALLER",
+        f"{NEW_DIST_INFO}/REQUESTED",
+        f"{NEW_DIST_INFO}/RECORD",
+        "../../../bin/convert-caffe2-to-onnx",
+    }
+    assert sorted(os.listdir(root)) == sorted([NEW_DIST_INFO, "torch"])
+
+
+@pytest.mark.parametrize("fail_at", [5, 10], ids=["backup", "write"])
+def test_switch_distribution_rollback(mocker, installed_dist, wheel_file, fail_at):
+    root = installed_dist.location
+    replace = os.replace
+    calls = []
+
+    def failing_replace(src, dst):
+        calls.append((src, dst))
+        if len(calls) == fail_at:
+            raise OSError
+        return replace(src, dst)
+
+    mocker.patch.object(switch.os, "replace", new=failing_replace)
+
+    with pytest.raises(OSError):
+        switch.switch_distribution(installed_dist, wheel_file)
+
+    for file, content in OLD_FILES.items():
+        assert read(root, file) == content
+    assert not path.exists(path.join(root, NEW_DIST_INFO))
+    assert sorted(os.listdir(root)) == sorted([OLD_DIST_INFO, "torch"])
+
+
+def test_switch_distribution_data_dir(installed_dist, tmpdir):
+    file = str(tmpdir.join("torch-1.7.0+cu110-cp38-cp38-linux_x86_64.whl"))
+    with zipfile.ZipFile(file, "w") as fh:
+        fh.writestr(f"{NEW_DIST_INFO}/RECORD", "")
+        fh.writestr("torch-1.7.0+cu110.data/scripts/foo", "")
+
+    with pytest.raises(switch.SwitchError):
+        switch.switch_distribution(installed_dist, file)
+
+
+def test_switch_not_pytorch_distribution():
+    with pytest.raises(switch.SwitchError):
+        switch.switch("cpu", project_names=["numpy"], session=object())
+
+
+def test_download_hash_mismatch(tmpdir):
+    content = b"wheel"
+    name = "torch-1.7.0+cu110-cp38-cp38-linux_x86_64.whl"
+    dir = str(tmpdir)
+    with utils.fake_server({f"/{name}": (content, "application/octet-stream")}) as base:
+        with pytest.raises(switch.SwitchError):
+            switch.download(
+                Link(f"{base}{name}#sha256={'0' * 64}"), dir, session=PipSession()
+            )
+
+    assert not tmpdir.listdir()
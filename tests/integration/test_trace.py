@@ -0,0 +1,121 @@
+import json
+import os
+from os import path
+from types import SimpleNamespace
+
+import pytest
+
+from pytorch_pip_shim import computation_backend as cb
+from pytorch_pip_shim import trace, utils
+
+from tests import mocks
+
+
+@pytest.fixture(autouse=True)
+def events(mocker):
+    return mocker.patch.object(trace, "_events", [])
+
+
+@pytest.fixture
+def enabled(monkeypatch, tmpdir):
+    file = path.join(str(tmpdir), "trace.json")
+    monkeypatch.setenv(trace.ENV_VAR, file)
+    return file
+
+
+@pytest.fixture
+def disabled(monkeypatch):
+    monkeypatch.delenv(trace.ENV_VAR, raising=False)
+
+
+class Target:
+    def fn(self, project_name, links=()):
+        return list(links)
+
+
+TARGET = "tests.integration.test_trace.Target.fn"
+
+
+@pytest.mark.parametrize(
+    ("obj", "summary"),
+    [
+        (None, None),
+        (1, 1),
+        ("torch", "torch"),
+        ("a" * 200, f"{'a' * 97}..."),
+        ([1, 2, 3], "list(len=3)"),
+        (
+            SimpleNamespace(files=[], find_links=[1, 2]),
+            "SimpleNamespace files=0 find_links=2",
+        ),
+    ],
+)
+def test_summarize(obj, summary):
+    assert trace.summarize(obj) == summary
+
+
+def test_span(events):
+    with trace.span("name", foo="bar") as args:
+        args["baz"] = 1
+
+    (event,) = events
+    assert event["name"] == "name"
+    assert event["ph"] == "X"
+    assert event["dur"] >= 0
+    assert event["args"] == dict(foo="bar", baz=1)
+
+
+def test_write(enabled):
+    with trace.span("name"):
+        pass
+
+    trace.write()
+
+    with open(enabled) as fh:
+        obj = json.load(fh)
+    assert [event["name"] for event in obj["traceEvents"]] == ["name"]
+
+
+def test_write_dir(tmpdir):
+    with trace.span("name"):
+        pass
+
+    trace.write(str(tmpdir))
+
+    assert os.listdir(str(tmpdir)) == [f"pytorch-pip-shim-{os.getpid()}.json"]
+
+
+def test_write_nothing(enabled):
+    trace.write()
+
+    assert not path.exists(enabled)
+
+
+def test_apply_patch(enabled, events):
+    with utils.apply_patch(TARGET):
+        Target().fn("torch", links=[1, 2])
+
+    (event,) = events
+    assert event["name"] == TARGET
+    assert event["args"]["arg1"] == "torch"
+    assert event["args"]["links"] == "list(len=2)"
+    assert event["args"]["output"] == "list(len=2)"
+
+
+def test_apply_patch_disabled(disabled, events):
+    with utils.apply_patch(TARGET):
+        Target().fn("torch")
+
+    assert not events
+
+
+def test_detect(mocker, enabled, events):
+    mocker.patch(
+        mocks.make_target("computation_backend", "detect_from_nvcc"),
+        return_value=cb.CPUBackend(),
+    )
+
+    assert cb.detect() == cb.CPUBackend()
+    (event,) = events
+    assert event["name"] == "detect"
+    assert event["args"]["output"] == "cpu"
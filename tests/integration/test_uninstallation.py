@@ -0,0 +1,106 @@
+import os
+from os import path
+from types import SimpleNamespace
+
+from pytorch_pip_shim import uninstallation
+
+
+class DistMock(SimpleNamespace):
+    def has_metadata(self, name):
+        return name in self.metadata
+
+    def get_metadata_lines(self, name):
+        return self.metadata[name].splitlines()
+
+
+def make_dist(root, top_level=("torch", "caffe2")):
+    for name in (*top_level, "torch-1.7.0+cpu.dist-info"):
+        os.makedirs(path.join(root, name), exist_ok=True)
+
+    return DistMock(
+        location=root,
+        egg_info=path.join(root, "torch-1.7.0+cpu.dist-info"),
+        metadata={"top_level.txt": "\n".join((*top_level, "missing"))},
+    )
+
+
+def test_get_owned_dirs(tmpdir):
+    root = str(tmpdir)
+    dist = make_dist(root)
+
+    assert uninstallation.get_owned_dirs(dist) == {
+        path.join(root, "torch"),
+        path.join(root, "caffe2"),
+        path.join(root, "torch-1.7.0+cpu.dist-info"),
+    }
+
+
+def touch(file):
+    os.makedirs(path.dirname(file), exist_ok=True)
+    with open(file, "w"):
+        pass
+
+
+def test_compress_for_rename(tmpdir):
+    root = str(tmpdir.mkdir("site-packages"))
+    owned_dir = path.join(root, "torch")
+    script = path.join(str(tmpdir), "bin", "convert-caffe2-to-onnx")
+    paths = [
+        path.join(owned_dir, "__init__.py"),
+        path.join(owned_dir, "lib", "libtorch.so"),
+        path.join(root, "torch.pth"),
+        script,
+    ]
+    for file in paths:
+        touch(file)
+    touch(path.join(root, "numpy", "__init__.py"))
+    touch(path.join(str(tmpdir), "bin", "pip"))
+
+    compressed = uninstallation.compress_for_rename(paths, {owned_dir})
+
+    assert compressed == {owned_dir + os.sep, path.join(root, "torch.pth"), script}
+
+
+def test_compress_for_rename_foreign_file(tmpdir):
+    root = str(tmpdir)
+    owned_dir = path.join(root, "torch")
+    paths = [
+        path.join(owned_dir, "__init__.py"),
+        path.join(owned_dir, "lib", "libtorch.so"),
+    ]
+    for file in paths:
+        touch(file)
+    foreign = path.join(owned_dir, "contrib", "__init__.py")
+    touch(foreign)
+
+    compressed = uninstallation.compress_for_rename(paths, {owned_dir})
+
+    assert owned_dir + os.sep not in compressed
+    assert not any(foreign.startswith(file) for file in compressed)
+    assert path.join(owned_dir, "__init__.py") in compressed
+    assert path.join(owned_dir, "lib") + os.sep in compressed
+
+
+def test_remove_in_background(mocker):
+    popen = mocker.patch.object(uninstallation.subprocess, "Popen")
+
+    uninstallation.remove_in_background(["foo", "bar"])
+
+    args, _ = popen.call_args
+    assert args[0][-2:] == ["foo", "bar"]
+
+
+def test_remove_in_background_fallback(mocker, tmpdir):
+    mocker.patch.object(uninstallation.subprocess, "Popen", side_effect=OSError)
+    dir = str(tmpdir.mkdir("stash"))
+
+    uninstallation.remove_in_background([dir])
+
+    assert not path.exists(dir)
+
+
+def test_remove_in_background_smoke(tmpdir):
+    dir = tmpdir.mkdir("stash")
+    dir.join("file").write("content")
+
+    uninstallation.remove_in_background([str(dir)])
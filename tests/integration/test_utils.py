@@ -1,3 +1,4 @@
+import contextlib
 import optparse
 
 import pytest
@@ -52,3 +53,102 @@ def test_process_computation_backend_detect(
 def test_import_fn():
     with pytest.raises(utils.InternalError):
         utils.import_fn("")
+
+
+def test_parse_pip_args_nightly_window(mocker):
+    mocker.patch(mocks.make_target("computation_backend", "detect"))
+    args = utils.parse_pip_args(
+        ["install", "--pre", "--nightly-window-days", "7", "torch"]
+    )
+
+    assert args.nightly
+    assert args.nightly_window_days == 7
+    assert args.nightly_window_builds is None
+
+
+def test_parse_pip_args_requirements(mocker):
+    mocker.patch(mocks.make_target("computation_backend", "detect"))
+    args = utils.parse_pip_args(
+        ["install", "--no-deps", "torch==1.7.0", "--cpu", "torchvision"]
+    )
+
+    assert args.requirements == ["torch==1.7.0", "torchvision"]
+    assert args.pytorch_preflight
+    assert not args.custom_target
+
+
+def test_parse_pip_args_preflight(mocker):
+    mocker.patch(mocks.make_target("computation_backend", "detect"))
+    args = utils.parse_pip_args(
+        ["install", "--no-pytorch-preflight", "--platform", "win_amd64", "torch"]
+    )
+
+    assert not args.pytorch_preflight
+    assert args.custom_target
+
+
+def test_parse_pip_args_network(mocker):
+    mocker.patch(mocks.make_target("computation_backend", "detect"))
+    args = utils.parse_pip_args(
+        [
+            "install",
+            "--no-index",
+            "--proxy",
+            "http://proxy:3128",
+            "--trusted-host",
+            "example.com",
+            "--timeout",
+            "2.5",
+            "torch",
+        ]
+    )
+
+    assert args.no_index
+    assert args.proxy == "http://proxy:3128"
+    assert args.trusted_hosts == ["example.com"]
+    assert args.timeout == 2.5
+    assert args.retries is None
+    assert args.requirements == ["torch"]
+
+
+def add(a, b=0):
+    return a + b
+
+
+@pytest.mark.parametrize("preprocessing", [False, True])
+@pytest.mark.parametrize("context", [False, True])
+@pytest.mark.parametrize("postprocessing", [False, True])
+def test_make_wrapper(preprocessing, context, postprocessing):
+    calls = []
+
+    def preprocessing_(args, kwargs):
+        calls.append("preprocessing")
+        return (args[0] * 10,), kwargs
+
+    @contextlib.contextmanager
+    def context_(args, kwargs):
+        calls.append(("context", args, kwargs))
+        yield
+
+    def postprocessing_(args, kwargs, output):
+        calls.append(("postprocessing", args, output))
+        return -output
+
+    wrapper = utils.make_wrapper(
+        add,
+        preprocessing=preprocessing_ if preprocessing else None,
+        context=context_ if context else None,
+        postprocessing=postprocessing_ if postprocessing else None,
+    )
+    output = wrapper(1, b=2)
+
+    a = 10 if preprocessing else 1
+    expected_calls = []
+    if preprocessing:
+        expected_calls.append("preprocessing")
+    if context:
+        expected_calls.append(("context", (a,), dict(b=2)))
+    if postprocessing:
+        expected_calls.append(("postprocessing", (a,), a + 2))
+    assert calls == expected_calls
+    assert output == (-(a + 2) if postprocessing else a + 2)
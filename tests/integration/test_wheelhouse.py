@@ -0,0 +1,137 @@
+import contextlib
+import hashlib
+import os
+from os import path
+from unittest import mock
+
+import pytest
+
+from pip._internal.index.package_finder import PackageFinder
+from pip._internal.models.candidate import InstallationCandidate
+from pip._internal.models.link import Link
+from pip._internal.network.session import PipSession
+
+from pytorch_pip_shim import resolution, wheelhouse
+from pytorch_pip_shim.computation_backend import ComputationBackend
+
+from tests import mocks, utils
+
+CPU = "cpu/torch-1.7.0%2Bcpu-cp38-cp38-linux_x86_64.whl"
+CU110 = "cu110/torch-1.7.0%2Bcu110-cp38-cp38-linux_x86_64.whl"
+SHARED = "torchtext-0.8.0-cp38-cp38-linux_x86_64.whl"
+
+
+def make_pages():
+    return {
+        f"/{name}": (name.encode("utf-8") * 100, "application/octet-stream")
+        for name in (CPU, CU110, SHARED)
+    }
+
+
+def make_candidate(base, name):
+    link = Link(f"{base}{name}")
+    _, version, *_ = link.filename.split("-")
+    return InstallationCandidate(link.filename.split("-")[0], version, link)
+
+
+def test_resolve_wheelhouse(mocker):
+    resolve = mocker.patch(mocks.make_target("wheelhouse", "resolve"), return_value=[])
+
+    candidates = wheelhouse.resolve_wheelhouse(
+        ["torch"],
+        [ComputationBackend.from_str("cpu"), ComputationBackend.from_str("cu110")],
+        finder=object(),
+    )
+
+    assert set(candidates) == {"cpu", "cu110"}
+    for _, kwargs in resolve.call_args_list:
+        assert kwargs["dependencies"]
+
+
+def test_resolve_wheelhouse_fresh_candidates(mocker):
+    @contextlib.contextmanager
+    def patch_resolution(computation_backend, nightly=False):
+        version = f"1.7.0+{computation_backend}"
+        candidate = InstallationCandidate(
+            "torch",
+            version,
+            Link(f"https://download.pytorch.org/whl/torch-{version}-py3-none-any.whl"),
+        )
+        with mock.patch.object(
+            PackageFinder,
+            "find_all_candidates",
+            new=lambda self, project_name: [candidate],
+        ):
+            yield
+
+    mocker.patch.object(resolution, "patch_resolution", new=patch_resolution)
+
+    candidates = wheelhouse.resolve_wheelhouse(
+        ["torch"],
+        [ComputationBackend.from_str("cpu"), ComputationBackend.from_str("cu110")],
+        finder=resolution.make_finder(),
+        dependencies=False,
+    )
+
+    assert {
+        cb: [str(candidate.version) for candidate in candidates]
+        for cb, candidates in candidates.items()
+    } == {"cpu": ["1.7.0+cpu"], "cu110": ["1.7.0+cu110"]}
+
+
+def test_export(tmpdir):
+    dir = str(tmpdir)
+    pages = make_pages()
+    with utils.fake_server(pages) as base:
+        manifest = wheelhouse.export(
+            {
+                "cpu": [make_candidate(base, CPU), make_candidate(base, SHARED)],
+                "cu110": [make_candidate(base, CU110), make_candidate(base, SHARED)],
+            },
+            dir,
+            session=PipSession(),
+        )
+
+    assert [entry["status"] for entry in manifest["cpu"]] == [
+        "downloaded",
+        "downloaded",
+    ]
+    assert [entry["status"] for entry in manifest["cu110"]] == ["downloaded", "linked"]
+
+    cpu_shared = path.join(dir, "cpu", SHARED)
+    cu110_shared = path.join(dir, "cu110", SHARED)
+    assert os.stat(cpu_shared).st_ino == os.stat(cu110_shared).st_ino
+
+    for name, entry in zip((CPU, SHARED), manifest["cpu"]):
+        content, _ = pages[f"/{name}"]
+        assert entry["sha256"] == hashlib.sha256(content).hexdigest()
+
+    with open(path.join(dir, "cpu", wheelhouse.INDEX_FILE)) as fh:
+        index = fh.read()
+    assert "torch-1.7.0+cpu-cp38-cp38-linux_x86_64.whl#sha256=" in index
+    assert f"{SHARED}#sha256=" in index
+    assert "cu110" not in index
+
+
+def test_export_reuse(tmpdir):
+    dir = str(tmpdir)
+    with utils.fake_server(make_pages()) as base:
+        candidates = {"cpu": [make_candidate(base, SHARED)]}
+        wheelhouse.export(candidates, dir, session=PipSession())
+        manifest = wheelhouse.export(candidates, dir, session=PipSession())
+
+    (entry,) = manifest["cpu"]
+    assert entry["status"] == "reused"
+
+
+def test_download_hash_mismatch(tmpdir):
+    file = str(tmpdir.join(SHARED))
+    with utils.fake_server(make_pages()) as base:
+        with pytest.raises(wheelhouse.WheelhouseError):
+            wheelhouse.download(
+                Link(f"{base}{SHARED}#sha256={'0' * 64}"),
+                file,
+                session=PipSession(),
+            )
+
+    assert not tmpdir.listdir()
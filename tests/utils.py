@@ -1,10 +1,15 @@
+import contextlib
+import http.server
 import subprocess
+import sys
+import threading
+import time
 
 import pytest
 
 from pytorch_pip_shim import shim
 
-__all__ = ["skip_if_cuda_unavailable", "skip_if_pip_is_not_shimmed"]
+__all__ = ["skip_if_cuda_unavailable", "skip_if_pip_is_not_shimmed", "fake_server"]
 
 try:
     subprocess.check_call(
@@ -25,3 +30,54 @@ skip_if_cuda_unavailable = pytest.mark.skipif(
 skip_if_pip_is_not_shimmed = pytest.mark.skipif(
     not shim.is_inserted(), reason="pytorch-pip-shim is not inserted."
 )
+
+
+@contextlib.contextmanager
+def fake_server(pages=None, delay=0.0, status=200):
+    # pages maps paths to (content, content type). Unknown paths are answered with
+    # 404 for GET requests. HEAD requests are always answered with status.
+    if pages is None:
+        pages = {}
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def _respond(self, body):
+            time.sleep(delay)
+            page = pages.get(self.path)
+            if self.command == "HEAD":
+                code = status
+            else:
+                code = status if page is not None else 404
+            content, content_type = page if page is not None else (b"", "text/plain")
+            if isinstance(content, str):
+                content = content.encode("utf-8")
+
+            self.send_response(code)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            if body:
+                self.wfile.write(content)
+
+        def do_HEAD(self):
+            self._respond(body=False)
+
+        def do_GET(self):
+            self._respond(body=True)
+
+        def log_message(self, *args):
+            pass
+
+    class Server(http.server.ThreadingHTTPServer):
+        def handle_error(self, request, client_address):
+            # Streaming clients might hang up before the whole page is sent.
+            if not isinstance(sys.exc_info()[1], ConnectionError):
+                super().handle_error(request, client_address)
+
+    server = Server(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/"
+    finally:
+        server.shutdown()
+        server.server_close()